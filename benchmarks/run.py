@@ -0,0 +1,249 @@
+"""
+Offline benchmark suite for seed generation, OKS update and scan planning.
+
+    python -m benchmarks.run                          # all sizes, print table
+    python -m benchmarks.run -o results.json          # also save results
+    python -m benchmarks.run --baseline old.json      # fail on regressions
+
+Every case is run `--repeat` times after one warm-up call; the median is
+what gets compared.  A case regresses when its median is more than
+`--threshold` (relative) *and* `--min-delta-ms` (absolute) slower than in
+the baseline file; the exit status is then 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from pds.core.constants import CONFIGURATIONS
+from pds.core.oks import update_daphne_confs
+from pds.core.scan import expand_points
+from pds.core.seed import SeedExecutor, compile_devices, generate_configuration, generate_seeds
+from pds.core.utils import pretty_compact_json
+
+from .synthetic import ROOT, SIZES, details_for, make_segment
+
+Case = tuple[str, Callable[[], Any], Optional[Callable[[], Any]]]  # name, fn, setup
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Timing
+# ──────────────────────────────────────────────────────────────────────────────
+def measure(fn: Callable[[], Any], setup: Optional[Callable[[], Any]], repeat: int) -> dict[str, Any]:
+    """Warm up once, then time *repeat* calls of *fn* (each after *setup*)."""
+    samples = []
+    for i in range(repeat + 1):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        if i:
+            samples.append(elapsed)
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "repeat": repeat,
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Cases
+# ──────────────────────────────────────────────────────────────────────────────
+def _clear_seeds(work: Path) -> None:
+    for cfg in CONFIGURATIONS:
+        (work / f"{cfg}.json").unlink(missing_ok=True)
+
+
+def _check_seeds(changed: dict[str, bool]) -> None:
+    if len(changed) != len(CONFIGURATIONS):  # generate_seeds logs, never raises
+        raise RuntimeError("generate_seeds failed – see log above")
+
+
+def size_cases(size: str, work: Path, executors: dict[str, SeedExecutor]) -> list[Case]:
+    data = details_for(size)
+    work.mkdir(parents=True, exist_ok=True)
+    details = work / "details.json"
+    details.write_text(json.dumps(data), encoding="utf-8")
+
+    seeds = {cfg: generate_configuration(data, cfg) for cfg in CONFIGURATIONS}
+    selftrigger = seeds["np02_daphne_selftrigger"]
+    xml = work / "np02-pds.data.xml"
+    segment = make_segment()
+
+    def seeds_with(strategy: str) -> Callable[[], None]:
+        def run() -> None:
+            _check_seeds(generate_seeds(details, force=True, executor=executors[strategy]))
+        return run
+
+    return [
+        ("compile_devices", lambda: compile_devices(data), None),
+        ("generate_configuration",
+         lambda: [generate_configuration(data, cfg) for cfg in CONFIGURATIONS], None),
+        ("generate_seeds/inline", seeds_with("inline"), lambda: _clear_seeds(work)),
+        ("generate_seeds/pool", seeds_with("pool"), lambda: _clear_seeds(work)),
+        ("pretty_compact_json/compact", lambda: pretty_compact_json(selftrigger), None),
+        ("pretty_compact_json/multiline",
+         lambda: pretty_compact_json(selftrigger, multiline=True), None),
+        ("oks_update", lambda: update_daphne_confs(xml, seeds),
+         lambda: xml.write_text(segment, encoding="utf-8")),
+    ]
+
+
+def scan_cases() -> list[Case]:
+    calibration = {
+        "mode": "calibration",
+        "mask_values": list(range(1, 65)),
+        "min_bias": 0,
+        "max_bias": 10000,
+        "step": 10,
+    }
+    thrscan = {"mode": "thrscan", "min_corr": 0, "max_corr": 100000, "corr_step": 1}
+    return [
+        ("expand_points/calibration", lambda: expand_points(calibration), None),
+        ("expand_points/thrscan", lambda: expand_points(thrscan), None),
+    ]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Results
+# ──────────────────────────────────────────────────────────────────────────────
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _numpy_version() -> Optional[str]:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy.__version__
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    threshold: float,
+    min_delta_s: float,
+) -> list[str]:
+    """Descriptions of every case that regressed w.r.t. *baseline*."""
+    regressions = []
+    for name, res in results["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        new_s, old_s = res["median_s"], old["median_s"]
+        if new_s > old_s * (1 + threshold) and new_s - old_s > min_delta_s:
+            regressions.append(
+                f"{name}: {old_s * 1e3:.2f} ms → {new_s * 1e3:.2f} ms "
+                f"(+{(new_s / old_s - 1) * 100:.0f} %)"
+            )
+    return regressions
+
+
+def format_table(results: dict[str, Any], baseline: Optional[dict[str, Any]] = None) -> str:
+    old = (baseline or {}).get("results", {})
+    width = max(map(len, results["results"]), default=10)
+    lines = [f"{'case':<{width}}  {'median ms':>10}  {'min ms':>10}  {'vs base':>8}"]
+    for name, res in results["results"].items():
+        ratio = ""
+        if name in old and old[name]["median_s"]:
+            ratio = f"{res['median_s'] / old[name]['median_s']:.2f}x"
+        lines.append(
+            f"{name:<{width}}  {res['median_s'] * 1e3:>10.2f}  "
+            f"{res['min_s'] * 1e3:>10.2f}  {ratio:>8}"
+        )
+    return "\n".join(lines)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Entry point
+# ──────────────────────────────────────────────────────────────────────────────
+def run_suite(sizes: list[str], repeat: int, *, workers: int = 2) -> dict[str, Any]:
+    executors = {
+        "inline": SeedExecutor(inline_max_channels=sys.maxsize),
+        "pool": SeedExecutor(inline_max_channels=0, max_workers=max(2, workers)),
+    }
+    results: dict[str, Any] = {}
+    tmp = Path(tempfile.mkdtemp(prefix="pds-bench-"))
+    try:
+        for size in sizes:
+            for name, fn, setup in size_cases(size, tmp / size, executors):
+                results[f"{size}/{name}"] = measure(fn, setup, repeat)
+                logging.info("⏱  %s/%s done", size, name)
+        for name, fn, setup in scan_cases():
+            results[name] = measure(fn, setup, repeat)
+    finally:
+        executors["pool"].shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": _numpy_version(),
+            "machine": platform.machine(),
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", action="append", choices=list(SIZES),
+                        help="input size to run (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2, help="pool size for the pooled seeds")
+    parser.add_argument("-o", "--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative slow-down before failing (default 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore slow-downs smaller than this (default 1 ms)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    results = run_suite(args.size or list(SIZES), args.repeat, workers=args.workers)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print(format_table(results, baseline))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nResults written to {args.output}")
+
+    if baseline is None:
+        return 0
+    regressions = compare(
+        results, baseline, threshold=args.threshold, min_delta_s=args.min_delta_ms / 1e3
+    )
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        print("\n".join(f"  {r}" for r in regressions))
+        return 1
+    print(f"\n✅ No regression beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Synthetic inputs for the benchmarks: details files of any size and an OKS
+segment shaped like `np02-pds.data.xml`.
+
+Every board is derived from the real NP02 board in `configs/np02` so the
+generated details exercise the same code paths as production inputs.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from pathlib import Path
+from typing import Any
+
+from pds.core.constants import CONFIGURATIONS
+
+ROOT = Path(__file__).resolve().parent.parent
+NP02_DETAILS = ROOT / "configs" / "np02" / "details.json"
+
+# name → (boards, channels per board); None = the real NP02 board as is
+SIZES: dict[str, tuple[int, int] | None] = {
+    "1-board": (1, 40),
+    "np02": None,
+    "50-boards": (50, 40),
+    "500-boards": (500, 40),
+}
+
+
+def make_details(boards: int, channels: int = 40) -> dict[str, Any]:
+    """Details document with *boards* copies of the NP02 board, *channels* each."""
+    data = json.loads(NP02_DETAILS.read_text(encoding="utf-8"))
+    template = data["devices"][0]
+    indices = list(range(channels))
+    devices = []
+    for i in range(boards):
+        dev = copy.deepcopy(template)
+        dev["ip"] = f"10.73.{137 + i // 250}.{1 + i % 250}"
+        dev["slot_id"] = i % 16
+        dev["det_id"] = 9 + i // 16
+        ch = dev["channels"]
+        ch["indices"] = indices
+        ch["trim"] = [(i + c) % 7 for c in range(40)]
+        ch["offsets"] = [2100 + (i + c) % 50 for c in indices]
+        dev["self_trigger"]["enable_compensator"] = indices
+        dev["self_trigger"]["enable_inverter"] = [c for c in indices if c >= 32]
+        devices.append(dev)
+    data["devices"] = devices
+    return data
+
+
+def details_for(size: str) -> dict[str, Any]:
+    spec = SIZES[size]
+    if spec is None:
+        return json.loads(NP02_DETAILS.read_text(encoding="utf-8"))
+    return make_details(*spec)
+
+
+def make_segment(n_other: int = 200) -> str:
+    """
+    OKS segment with stale `DaphneConf` objects for every configuration and
+    *n_other* unrelated objects around them, as in a real session file.
+    """
+    objs = [
+        f'<obj class="SSPConf" id="ssp-{i}">\n'
+        f' <attr name="channel_mask" type="u32" val="{i % 16}"/>\n'
+        f' <attr name="pulse_bias_percent_270nm" type="u32" val="{4000 + i}"/>\n'
+        "</obj>\n\n"
+        for i in range(n_other)
+    ]
+    objs += [
+        f'<obj class="DaphneConf" id="{cfg}">\n'
+        ' <attr name="json_file" type="string" val="{&quot;stale&quot;:1}"/>\n'
+        "</obj>\n\n"
+        for cfg in CONFIGURATIONS
+    ]
+    return (
+        '<?xml version="1.0" encoding="ASCII"?>\n\n'
+        "<!-- oks-data version 2.2 -->\n\n\n"
+        "<!DOCTYPE oks-data [\n"
+        "  <!ELEMENT oks-data (info, (include)?, (comments)?, (obj)+)>\n"
+        "]>\n\n"
+        "<oks-data>\n\n"
+        f'<info name="" type="" num-of-items="{len(objs)}" oks-format="data" oks-version="862"/>\n\n'
+        + "".join(objs)
+        + "</oks-data>\n"
+    )
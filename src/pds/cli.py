@@ -3,7 +3,10 @@ Command-line entry point for PDS tooling.
 
 * Adds --verbose / -v flag for DEBUG logging.
 * Avoids double-initialising the root logger (Typer calls main() twice).
-* Provides three sub-commands: run, seed, set.
+* Provides the sub-commands run, thr-scan, seed, set, validate,
+  import-coldbox and store-gc.
+* Imports the pds.core modules inside the sub-commands, so `--help` and
+  shell completion (one CLI call per TAB) only pay for Typer.
 """
 
 from __future__ import annotations
@@ -11,12 +14,10 @@ from logging.handlers import RotatingFileHandler
 from pathlib import Path
 import logging
 from enum import Enum
-from pathlib import Path
+from typing import Optional
 
 import typer
 
-from pds.core import run, run_thr, seed, set_daphne_conf
-from pds.core.run_thr import main as thr_main
 # ──────────────────────────────────────────────────────────────────────────────
 # Typer app & mode enum
 # ──────────────────────────────────────────────────────────────────────────────
@@ -49,10 +50,39 @@ def run_command(
         readable=True,
         help="Path to conf JSON file.",
     ),
+    persistent: bool = typer.Option(
+        False,
+        "--persistent-session",
+        help="Boot the drunc session once and keep it across scan points.",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Skip scan points the journal already records as done.",
+    ),
+    plan: bool = typer.Option(
+        False,
+        "--plan",
+        help="Print the scan points and estimated wall time, then exit.",
+    ),
+    trace: Optional[Path] = typer.Option(
+        None,
+        "--trace",
+        help="Write per-phase timing spans to this file (Chrome/Perfetto trace format).",
+    ),
+    reapply: bool = typer.Option(
+        False,
+        "--reapply",
+        help="Re-apply DaphneConf, SSP and DTS settings even if an earlier run applied them.",
+    ),
 ) -> None:
     """Launch a PDS data-acquisition run."""
-    logging.info("🚀 Starting a PDS %s run using %s!", mode.value, conf)
-    run.main(mode.value, conf)
+    from pds.core import run
+
+    if not plan:
+        logging.info("🚀 Starting a PDS %s run using %s!", mode.value, conf)
+    run.main(mode.value, conf, persistent=persistent, resume=resume, plan=plan, trace=trace,
+             reapply=reapply)
 
 @app.command("thr-scan")
 def thr_scan(                     # ← name shown in `--help`
@@ -67,6 +97,8 @@ def thr_scan(                     # ← name shown in `--help`
     Iterate over correlation_threshold values defined in *conf* and
     take one run per setting.
     """
+    from pds.core.run_thr import main as thr_main
+
     thr_main(conf)
 
 
@@ -79,11 +111,16 @@ def seed_command(
         exists=True,
         readable=True,
         help="Path to details JSON file.",
-    )
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Regenerate seeds even if the cache is up to date."
+    ),
 ) -> None:
     """Generate configuration files from details."""
+    from pds.core import seed
+
     logging.info("🛠  Generating configuration files using %s!", details)
-    seed.generate_seeds(details)
+    seed.generate_seeds(details, force=force)
 
 
 @app.command(name="set")
@@ -95,11 +132,110 @@ def set_command(
         exists=True,
         readable=True,
         help="Path to conf JSON file.",
-    )
+    ),
+    reapply: bool = typer.Option(
+        False, "--reapply", help="Update the OKS segment even if an earlier run applied these seeds."
+    ),
 ) -> None:
     """Apply configuration settings to hardware."""
+    from pds.core import set_daphne_conf
+
     logging.info("🔧 Setting configuration using %s!", conf)
-    set_daphne_conf.main(conf_path=conf)
+    set_daphne_conf.main(conf_path=conf, reapply=reapply)
+
+
+@app.command(name="validate")
+def validate_command(
+    conf: Path = typer.Option(
+        ...,
+        "--conf",
+        "-c",
+        exists=True,
+        readable=True,
+        help="Path to conf JSON file.",
+    ),
+    mode: Optional[str] = typer.Option(
+        None,
+        "--mode",
+        "-m",
+        help="Validate as this mode (default: the conf's \"mode\").",
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Skip the checks for drunc_working_dir, oks_file and the details file existing.",
+    ),
+) -> None:
+    """Check conf + details and every scan point without touching hardware."""
+    import json
+
+    from pds.core.validate import collect_problems
+
+    cfg = json.loads(conf.read_text())
+    if mode:
+        cfg["mode"] = mode
+    problems = collect_problems(cfg, conf, check_paths=not offline)
+    for problem in problems:
+        typer.echo(f"❌ {problem}")
+    if problems:
+        raise typer.Exit(code=1)
+    typer.echo(f"✅ {conf} is valid.")
+
+
+@app.command(name="import-coldbox")
+def import_coldbox_command(
+    source: Path = typer.Argument(
+        ...,
+        exists=True,
+        readable=True,
+        help="vd_coldbox configuration JSON (IP-keyed boards + constants).",
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Details file to write (default: <source>.details.json).",
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Convert even if the output matches the source hash."
+    ),
+    seeds: bool = typer.Option(
+        False, "--seed", help="Generate the configuration files from the result."
+    ),
+) -> None:
+    """Convert a vd_coldbox configuration into a details file."""
+    from pds.core.coldbox import import_coldbox
+
+    details, _ = import_coldbox(source, output, force=force)
+    if seeds:
+        from pds.core import seed
+
+        seed.generate_seeds(details, force=force)
+
+
+@app.command(name="store-gc")
+def store_gc_command(
+    max_size: str = typer.Option(
+        ..., "--max-size", help="Size limit of the artifact store, e.g. 200M or 1G."
+    ),
+    store: Optional[Path] = typer.Option(
+        None, "--store", help="Artifact store directory (default: ~/.pds/store)."
+    ),
+    min_age: float = typer.Option(
+        600.0, "--min-age", help="Keep objects used within this many seconds."
+    ),
+) -> None:
+    """Remove least recently used generated artifacts beyond a size limit."""
+    from pds.core.store import ArtifactStore, parse_size
+
+    try:
+        limit = parse_size(max_size)
+    except ValueError as err:
+        raise typer.BadParameter(str(err), param_hint="--max-size") from None
+    artifacts = ArtifactStore.for_config({"artifact_store": str(store) if store else None})
+    removed, freed = artifacts.gc(limit, min_age_s=min_age)
+    typer.echo(f"🧹 {artifacts.root}: removed {removed} object(s), {freed} bytes; "
+               f"{artifacts.size()} bytes left.")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
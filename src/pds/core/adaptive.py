@@ -0,0 +1,334 @@
+"""
+Adaptive (coarse-to-fine) correlation-threshold scan and LED calibration.
+
+The grid scan takes one acquisition every `corr_step` between `min_corr`
+and `max_corr`, most of them far from the trigger-rate knee.  With
+
+    "thrscan_strategy": "adaptive",
+    "thrscan_metric": {"type": "file", "path": "/data/rate_{corr}.txt"},
+    "corr_coarse_points": 5,
+    "corr_resolution": 500
+
+the scan first takes `corr_coarse_points` evenly spaced points, then bisects
+the interval holding the transition until it is at most `corr_resolution`
+wide: ~coarse + log2(range / coarse / resolution) acquisitions instead of
+range / step.  The transition is the steepest change of the metric, or,
+with `"thrscan_target": <value>`, where the metric crosses that value.
+
+The calibration scan sweeps every mask the same way:
+
+    "calibration_strategy": "adaptive",
+    "calibration_metric": {"type": "file", "path": "/data/charge_{mask}_{bias}.txt"},
+    "bias_coarse_step": 200,
+    "bias_resolution": 25,
+    "calibration_max_delta": 50.0,
+    "calibration_target": 900.0
+
+`BiasRefiner` takes the coarse `min_bias..max_bias` grid in ascending order,
+stops a mask once the metric reaches `calibration_target`, then bisects
+every interval over which the metric changes by more than
+`calibration_max_delta` (default: a tenth of the range seen) until it is
+`bias_resolution` wide.  Flat parts of the response keep the coarse step.
+
+The metric is read after every acquisition by a callable taking the
+`ScanPoint`:
+
+    {"type": "file", "path": ..., "pattern": ...}   last regex match in a file
+                                                    ({corr}, {mask}, {bias} are
+                                                    replaced)
+    {"type": "synthetic", "knee": ..., "width": ...} falling rate vs threshold
+    {"type": "synthetic_charge", "knee": ..., ...}   rising charge vs LED bias
+                                                    (offline stand-ins)
+
+Measured values go to the scan journal, so `--resume` replays the search
+without repeating finished acquisitions.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from pds.core.scan import ScanPoint
+
+Metric = Callable[[ScanPoint], float]
+
+_NUMBER = r"([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Metric sources
+# ──────────────────────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class FileMetric:
+    """Last match of *pattern* (group 1) in *path*, formatted with the point."""
+
+    path: str
+    pattern: str = _NUMBER
+
+    def __call__(self, point: ScanPoint) -> float:
+        path = Path(self.path.format(
+            corr=point.correlation_threshold,
+            mask=point.channel_mask,
+            bias=point.pulse_bias_percent_270nm,
+        )).expanduser()
+        matches = re.findall(self.pattern, path.read_text(errors="replace"))
+        if not matches:
+            raise ValueError(f"No metric matching /{self.pattern}/ in {path}")
+        last = matches[-1]
+        return float(last[0] if isinstance(last, tuple) else last)
+
+    def __str__(self) -> str:
+        return f"file {self.path}"
+
+
+@dataclass(slots=True)
+class SyntheticRate:
+    """Logistic trigger rate falling from *high* to *low* around *knee*."""
+
+    knee: float = 20000.0
+    width: float = 2000.0
+    high: float = 1000.0
+    low: float = 1.0
+
+    def __call__(self, point: ScanPoint) -> float:
+        x = (point.correlation_threshold - self.knee) / self.width
+        return self.low + (self.high - self.low) / (1.0 + math.exp(min(x, 700.0)))
+
+    def __str__(self) -> str:
+        return f"synthetic knee={self.knee:g}"
+
+
+@dataclass(slots=True)
+class SyntheticCharge:
+    """Logistic mean charge rising with the LED bias (knee shifts per mask bit)."""
+
+    knee: float = 3900.0
+    width: float = 30.0
+    high: float = 1000.0
+    mask_shift: float = 0.0
+
+    def __call__(self, point: ScanPoint) -> float:
+        knee = self.knee + self.mask_shift * (point.channel_mask.bit_length() - 1)
+        x = (point.pulse_bias_percent_270nm - knee) / self.width
+        return self.high / (1.0 + math.exp(-max(min(x, 700.0), -700.0)))
+
+    def __str__(self) -> str:
+        return f"synthetic charge knee={self.knee:g}"
+
+
+_METRICS: dict[str, Callable[..., Metric]] = {
+    "file": FileMetric,
+    "synthetic": SyntheticRate,
+    "synthetic_charge": SyntheticCharge,
+}
+
+# mode → (strategy key, metric key)
+_KEYS: dict[str, tuple[str, str]] = {
+    "thrscan": ("thrscan_strategy", "thrscan_metric"),
+    "threshold": ("thrscan_strategy", "thrscan_metric"),
+    "calibration": ("calibration_strategy", "calibration_metric"),
+}
+
+
+def build_metric(cfg: dict[str, Any]) -> Metric:
+    """Instantiate the metric source of the adaptive scan in *cfg*."""
+    key = _KEYS[cfg["mode"]][1]
+    spec = dict(cfg.get(key) or {})
+    kind = spec.pop("type", None)
+    if kind not in _METRICS:
+        raise ValueError(f"Unsupported {key} type: {kind}")
+    return _METRICS[kind](**spec)
+
+
+def is_adaptive(cfg: dict[str, Any]) -> bool:
+    keys = _KEYS.get(cfg.get("mode"))
+    return keys is not None and cfg.get(keys[0], "grid") == "adaptive"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Search
+# ──────────────────────────────────────────────────────────────────────────────
+class CoarseToFine:
+    """
+    Threshold search: `next()` proposes the threshold to measure (None when
+    done), `record()` takes its metric value.
+    """
+
+    def __init__(
+        self,
+        lo: int,
+        hi: int,
+        *,
+        coarse: int = 5,
+        resolution: int = 500,
+        target: Optional[float] = None,
+    ) -> None:
+        if hi <= lo:
+            raise ValueError(f"Empty threshold range {lo}..{hi}")
+        if coarse < 2 or resolution < 1:
+            raise ValueError("need at least 2 coarse points and a resolution >= 1")
+        self.lo, self.hi = lo, hi
+        self.resolution = resolution
+        self.target = target
+        self.coarse = sorted({lo + round(i * (hi - lo) / (coarse - 1)) for i in range(coarse)})
+        self.values: dict[int, float] = {}
+        self.bracket: Optional[tuple[int, int]] = None
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any]) -> "CoarseToFine":
+        return cls(
+            cfg.get("min_corr", 4000),
+            cfg.get("max_corr", 8000),
+            coarse=cfg.get("corr_coarse_points", 5),
+            resolution=cfg.get("corr_resolution", cfg.get("corr_step", 500)),
+            target=cfg.get("thrscan_target"),
+        )
+
+    def max_refinements(self) -> int:
+        widest = max(b - a for a, b in zip(self.coarse, self.coarse[1:]))
+        return max(0, math.ceil(math.log2(widest / self.resolution)))
+
+    def record(self, threshold: int, value: float) -> None:
+        self.values[threshold] = value
+        if self.bracket and threshold not in self.coarse:
+            a, b = self.bracket
+            halves = [(a, threshold), (threshold, b)]
+            self.bracket = self._pick(halves) or halves[0]
+
+    def next(self) -> Optional[int]:
+        for threshold in self.coarse:
+            if threshold not in self.values:
+                return threshold
+        if self.bracket is None:
+            self.bracket = self._pick(list(zip(self.coarse, self.coarse[1:])))
+            if self.bracket is None:
+                logging.warning("⚠️  thrscan: metric never crosses %s – no refinement.",
+                                self.target)
+                return None
+        a, b = self.bracket
+        if b - a <= self.resolution or b - a < 2:
+            return None
+        return (a + b) // 2
+
+    def _pick(self, pairs: list[tuple[int, int]]) -> Optional[tuple[int, int]]:
+        """The interval holding the transition (target crossing or steepest)."""
+        if self.target is not None:
+            for a, b in pairs:
+                va, vb = self.values[a] - self.target, self.values[b] - self.target
+                if va == 0 or va * vb < 0:
+                    return a, b
+            return None
+        return max(pairs, key=lambda p: abs(self.values[p[1]] - self.values[p[0]]))
+
+    def summary(self) -> str:
+        if not self.bracket:
+            return f"{len(self.values)} acquisition(s), no transition found"
+        a, b = self.bracket
+        return (f"transition between corr={a} ({self.values[a]:g}) and "
+                f"corr={b} ({self.values[b]:g}) after {len(self.values)} acquisition(s)")
+
+
+class BiasRefiner:
+    """
+    LED-bias search of one mask: `next()` proposes the bias to measure
+    (None when done), `record()` takes its metric value.
+    """
+
+    def __init__(
+        self,
+        lo: int,
+        hi: int,
+        *,
+        coarse_step: int,
+        resolution: int,
+        max_delta: Optional[float] = None,
+        target: Optional[float] = None,
+    ) -> None:
+        if hi < lo:
+            raise ValueError(f"Empty bias range {lo}..{hi}")
+        if coarse_step < 1 or resolution < 1:
+            raise ValueError("bias_coarse_step and bias_resolution must be >= 1")
+        self.coarse = list(range(lo, hi + 1, coarse_step))
+        if self.coarse[-1] != hi:
+            self.coarse.append(hi)
+        self.resolution = resolution
+        self.max_delta = max_delta
+        self.target = target
+        self.values: dict[int, float] = {}
+        self.reached: Optional[int] = None  # bias at which the target was met
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any]) -> "BiasRefiner":
+        step = cfg.get("step", 500)
+        return cls(
+            cfg.get("min_bias", 4000),
+            cfg.get("max_bias", 4000),
+            coarse_step=cfg.get("bias_coarse_step", 4 * step),
+            resolution=cfg.get("bias_resolution", step),
+            max_delta=cfg.get("calibration_max_delta"),
+            target=cfg.get("calibration_target"),
+        )
+
+    def record(self, bias: int, value: float) -> None:
+        self.values[bias] = value
+        if self.target is not None and value >= self.target and (
+            self.reached is None or bias < self.reached
+        ):
+            self.reached = bias
+
+    def next(self) -> Optional[int]:
+        if self.reached is None:
+            for bias in self.coarse:
+                if bias not in self.values:
+                    return bias
+        measured = sorted(self.values)
+        if len(measured) < 2:
+            return None
+        delta = self.max_delta
+        if delta is None:
+            delta = (max(self.values.values()) - min(self.values.values())) / 10
+        steep = [
+            (abs(self.values[b] - self.values[a]), a, b)
+            for a, b in zip(measured, measured[1:])
+            if b - a > self.resolution and b - a >= 2
+            and abs(self.values[b] - self.values[a]) > delta
+        ]
+        if not steep:
+            return None
+        _, a, b = max(steep)
+        return (a + b) // 2
+
+    def summary(self) -> str:
+        biases = sorted(self.values)
+        out = f"{len(biases)} point(s) {biases}"
+        if self.reached is not None:
+            out += f", target {self.target:g} reached at bias {self.reached}"
+        return out
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Planning
+# ──────────────────────────────────────────────────────────────────────────────
+def coarse_points(cfg: dict[str, Any]) -> list[ScanPoint]:
+    """The coarse pass of an adaptive scan, for `--plan`."""
+    masks = cfg.get("mask_values", [1])
+    if cfg.get("mode") == "calibration":
+        biases = BiasRefiner.from_config(cfg).coarse
+        pairs = [(mask, bias) for mask in masks for bias in biases]
+        return [ScanPoint(i, m, b) for i, (m, b) in enumerate(pairs)]
+    search = CoarseToFine.from_config(cfg)
+    return [ScanPoint(i, masks[0], 0, corr) for i, corr in enumerate(search.coarse)]
+
+
+def plan_note(cfg: dict[str, Any]) -> str:
+    """What `--plan` cannot list: the refinement of an adaptive scan."""
+    if cfg.get("mode") == "calibration":
+        return ("then refinement point(s) per mask where the metric changes quickly "
+                "(coarse points above the target are skipped)")
+    n = CoarseToFine.from_config(cfg).max_refinements()
+    return f"then up to {n} refinement point(s) around the transition"
@@ -0,0 +1,159 @@
+"""
+Batched channel / AFE tables for every device of a details file at once.
+
+`ChannelBatch` keeps the channels, trims, AFE indices and attenuators of
+all devices in flat (or padded 2-D) arrays, so that the channel → AFE
+bucketing and the per-AFE gathers are bulk operations instead of
+per-channel Python loops.  Offsets are copied per device as they are (no
+per-channel work), and the AFE biases are gathered when a configuration
+is rendered, since the bias_off configurations replace them.  NumPy is
+used when it is installed; otherwise the same tables are held in
+`array('q')` buffers.
+
+Rows are read back with `ChannelBatch.row(i)`, which returns plain Python
+lists/ints so the generated JSON is byte-identical to the scalar path.
+"""
+
+from __future__ import annotations
+
+from array import array
+from itertools import chain
+from typing import Any, NamedTuple, Optional, Sequence
+
+from .constants import CHANNELS_PER_AFE
+
+try:  # optional accelerator
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+
+class DeviceChannels(NamedTuple):
+    channel_ids: list[int]
+    trims: list[Any]
+    afe_ids: list[int]
+    afe_attenuators: list[Any]
+    missing_afe: Optional[int]  # first populated AFE without an attenuator
+
+
+def _int_store(values: Sequence[Any]) -> Any:
+    """Flat integer buffer, or a list if some value is not a plain int."""
+    values = list(values)
+    if np is not None:
+        arr = np.array(values)
+        if not values or (arr.dtype.kind in "iu" and bool not in set(map(type, values))):
+            return arr.astype(np.int64)
+        return np.array(values, dtype=object)  # floats/bools keep their type
+    try:
+        return array("q", values)
+    except (TypeError, OverflowError):
+        return values
+
+
+def _padded(rows: list[Sequence[Any]]) -> tuple[Any, Any]:
+    """(n × width) matrix of *rows* padded with 0, plus the row lengths."""
+    lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    width = int(lengths.max()) if len(rows) else 0
+    flat = _int_store(list(chain.from_iterable(rows)))
+    mat = np.zeros((len(rows), width), dtype=flat.dtype)
+    mat[np.arange(width) < lengths[:, None]] = flat
+    return mat, lengths
+
+
+class ChannelBatch:
+    """Channel and AFE tables of *n* devices."""
+
+    def __init__(
+        self,
+        channel_ids: list[Sequence[int]],
+        trims: list[Sequence[Any]],
+        attenuators: list[Sequence[Any]],
+        *,
+        num_afes: int = 5,
+    ) -> None:
+        self.n = len(channel_ids)
+        self.num_afes = num_afes
+        counts = [len(ids) for ids in channel_ids]
+        self.starts = [0]
+        for c in counts:
+            self.starts.append(self.starts[-1] + c)
+
+        self.channels = _int_store(list(chain.from_iterable(channel_ids)))
+        if np is not None:
+            self._build_numpy(counts, trims, attenuators)
+        else:
+            self._build_array(channel_ids, trims, attenuators)
+
+    # ------------------------------------------------------------------ #
+    # NumPy backend: everything as whole-array operations
+    # ------------------------------------------------------------------ #
+    def _build_numpy(self, counts, trims, attenuators) -> None:
+        dev = np.repeat(np.arange(self.n), counts)
+        ch = self.channels.astype(np.int64)
+        afe = ch // CHANNELS_PER_AFE
+        bad = (afe < 0) | (afe >= self.num_afes)
+
+        ok = ~bad
+        occupancy = np.zeros((self.n, self.num_afes), dtype=bool)
+        occupancy[dev[ok], afe[ok]] = True
+
+        # trims[k] = trim[ch] if 0 <= ch < len(trim) else 0
+        trim_mat, trim_len = _padded(trims)
+        in_range = (ch >= 0) & (ch < trim_len[dev])
+        gathered = np.zeros(len(ch), dtype=trim_mat.dtype)
+        if trim_mat.shape[1]:
+            gathered[in_range] = trim_mat[dev[in_range], ch[in_range]]
+        self.trims = gathered
+
+        # first out-of-range AFE per device (rare → dict)
+        self._bad_afe: dict[int, int] = {}
+        for k in np.flatnonzero(bad).tolist():
+            self._bad_afe.setdefault(int(dev[k]), int(afe[k]))
+
+        # one bulk conversion back to Python objects; rows are list slices
+        self._channels = self.channels.tolist()
+        self._trims = gathered.tolist()
+        self._afe_ids = [np.flatnonzero(r).tolist() for r in occupancy]
+        self._attenuators = [list(a) for a in attenuators]
+        self.afe, self.occupancy = afe, occupancy
+
+    # ------------------------------------------------------------------ #
+    # array backend: same tables, filled row by row
+    # ------------------------------------------------------------------ #
+    def _build_array(self, channel_ids, trims, attenuators) -> None:
+        self.afe = array("q", (c // CHANNELS_PER_AFE for c in self.channels))
+        self._bad_afe = {}
+        self._afe_ids = []
+        trims_out = []
+        for i, (ids, trim) in enumerate(zip(channel_ids, trims)):
+            n_trim = len(trim)
+            trims_out.extend(trim[c] if 0 <= c < n_trim else 0 for c in ids)
+            occ = bytearray(self.num_afes)
+            for c in ids:
+                afe = c // CHANNELS_PER_AFE
+                if 0 <= afe < self.num_afes:
+                    occ[afe] = 1
+                else:
+                    self._bad_afe.setdefault(i, afe)
+            self._afe_ids.append([a for a, used in enumerate(occ) if used])
+        self.trims = _int_store(trims_out)
+        self._channels = list(self.channels)
+        self._trims = list(self.trims)
+        self._attenuators = [list(a) for a in attenuators]
+
+    # ------------------------------------------------------------------ #
+
+    def row(self, i: int) -> DeviceChannels:
+        if i in self._bad_afe:
+            raise KeyError(self._bad_afe[i])
+        s, e = self.starts[i], self.starts[i + 1]
+        afe_ids = self._afe_ids[i]
+        att = self._attenuators[i]
+        n_att = len(att)
+        return DeviceChannels(
+            self._channels[s:e],
+            self._trims[s:e],
+            afe_ids,
+            [att[a] for a in afe_ids if a < n_att],
+            next((a for a in afe_ids if a >= n_att), None),
+        )
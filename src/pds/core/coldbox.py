@@ -0,0 +1,225 @@
+"""
+Import vd_coldbox configuration files into the details schema.
+
+A coldbox file is keyed by board IP, plus a top-level "constants" block:
+
+    "10.73.137.106": {"id": 6, "channel_list": [...], "channel_range": [],
+                      "bias": [5], "trim": [40], "v_gains": [5],
+                      "afe": {"adcs": [5], "pgas": [5], "lnas": [5]},
+                      "ov": {...}, "run": "..."},
+    "constants": {"DEFAULT_THRESHOLD_CALIB": 8000, "DEFAULT_OFFSET": 2250,
+                  "GAIN_DEFAULT": 1}
+
+`convert_coldbox` maps it to the `details.json` layout read by
+`seed.generate_seeds` in one pass over the boards.  The details schema has
+a single value per run for the AFE settings (adcs / pgas / lnas) and the
+over-voltage, so the importer refuses files in which they differ between
+AFEs or boards instead of silently picking one.  Self-trigger settings are
+not part of the coldbox format and get the NP02 defaults below.
+
+`import_coldbox` writes the result next to the source and records the
+source hash in its metadata; re-running on an unchanged source reuses the
+existing file.  The output is streamed to disk (`write_json` /
+`iter_json`).  The source is parsed whole: its bytes are read anyway for the
+hash, the files are a few kB (one entry per board), and the standard
+library has no incremental JSON parser.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from .utils import write_json
+
+IMPORTER_VERSION = 1
+
+# Used when the source has no "constants" block (values of the Dec-24 files)
+DEFAULT_CONSTANTS: dict[str, int] = {
+    "DEFAULT_THRESHOLD_CALIB": 8000,
+    "DEFAULT_OFFSET": 2250,
+    "GAIN_DEFAULT": 1,
+}
+
+DEFAULT_BIAS_CTRL = 4095
+
+# Not in the coldbox format: NP02 self-trigger defaults
+SELF_TRIGGER_DEFAULTS: dict[str, Any] = {
+    "filter_mode": "inverted",
+    "slope_mode": "20",
+    "slope_threshold": 109,
+    "pedestal_length": 128,
+    "spybuffer_channel": 8,
+    "self_trigger_xcorr": {
+        "correlation_threshold": 4000,
+        "discrimination_threshold": 11000,
+    },
+    "enable_compensator": [],
+    "enable_inverter": [],
+}
+
+# details common_conf key → (afe block, key in the coldbox file)
+_AFE_KEYS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "resolution": ("adcs", ("resolution",)),
+    "output_format": ("adcs", ("output_format",)),
+    "SB_first": ("adcs", ("SB_first",)),
+    # the coldbox files spell it "lpf_cut_frequnecy"
+    "lpf_cut_frequency": ("pgas", ("lpf_cut_frequency", "lpf_cut_frequnecy")),
+    "pga_integrator_disable": ("pgas", ("integrator_disable",)),
+    "pga_gain": ("pgas", ("gain",)),
+    "clamp": ("lnas", ("clamp",)),
+    "lna_integrator_disable": ("lnas", ("integrator_disable",)),
+    "lna_gain": ("lnas", ("gain",)),
+}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Conversion
+# ──────────────────────────────────────────────────────────────────────────────
+def _lookup(entry: dict[str, Any], names: tuple[str, ...], where: str) -> Any:
+    for name in names:
+        if name in entry:
+            return entry[name]
+    raise ValueError(f"{where}: missing '{names[0]}'")
+
+
+def _single(values: dict[Any, list[str]], key: str) -> Any:
+    """The one value seen for *key*; ValueError if boards / AFEs disagree."""
+    if len(values) != 1:
+        seen = "; ".join(f"{json.dumps(v)} on {', '.join(w)}" for v, w in values.items())
+        raise ValueError(f"'{key}' differs between AFEs/boards ({seen}); "
+                         "the details schema has one value per run")
+    return json.loads(next(iter(values)))
+
+
+def _channels(ip: str, board: dict[str, Any], offset: int) -> dict[str, Any]:
+    indices = board.get("channel_list") or []
+    span = board.get("channel_range") or []
+    if indices:
+        channels: dict[str, Any] = {"indices": list(indices)}
+        n = len(indices)
+    elif len(span) == 2:
+        channels = {"range": list(span)}
+        n = span[1] - span[0] + 1
+    else:
+        raise ValueError(f"{ip}: needs a non-empty channel_list or a [start, end] channel_range")
+    channels.update(
+        attenuators=list(board["v_gains"]),
+        bias=list(board["bias"]),
+        trim=list(board.get("trim", [])),
+        offsets=[offset] * n,
+    )
+    return channels
+
+
+def convert_coldbox(
+    source: dict[str, Any],
+    *,
+    bias_ctrl: int = DEFAULT_BIAS_CTRL,
+    config_name: str = "np02_daphne_selftrigger",
+) -> dict[str, Any]:
+    """Details document for the coldbox configuration *source*."""
+    constants = {**DEFAULT_CONSTANTS, **source.get("constants", {})}
+    common: dict[str, dict[str, list[str]]] = {key: {} for key in ("ov", *_AFE_KEYS)}
+    devices = []
+    runs = set()
+
+    for ip, board in source.items():
+        if ip == "constants":
+            continue
+        try:
+            common["ov"].setdefault(json.dumps(board["ov"], sort_keys=True), []).append(ip)
+            afe = board["afe"]
+            for key, (block, names) in _AFE_KEYS.items():
+                for i, entry in enumerate(afe[block]):
+                    value = _lookup(entry, names, f"{ip} afe.{block}[{i}]")
+                    common[key].setdefault(json.dumps(value), []).append(f"{ip}/{i}")
+
+            trigger = copy.deepcopy(SELF_TRIGGER_DEFAULTS)
+            trigger["threshold"] = constants["DEFAULT_THRESHOLD_CALIB"]
+            devices.append({
+                "ip": ip,
+                "slot_id": board["id"],
+                "version": 1,
+                "mode": "self-trigger",
+                "self_trigger": trigger,
+                "channels": _channels(ip, board, constants["DEFAULT_OFFSET"]),
+            })
+        except KeyError as err:
+            raise ValueError(f"{ip}: missing {err}") from None
+        if "run" in board:
+            runs.add(board["run"])
+
+    if not devices:
+        raise ValueError("No boards in the coldbox configuration")
+
+    common_conf = {
+        "ov": _single(common["ov"], "ov"),
+        "offset_gain": constants["GAIN_DEFAULT"],
+        "bias_ctrl": bias_ctrl,
+    }
+    common_conf.update((key, _single(common[key], key)) for key in _AFE_KEYS)
+    metadata = {
+        "type": "daphne_configuration",
+        "version": "1.0",
+        "configuration": config_name,
+    }
+    if runs:
+        metadata["run"] = ", ".join(sorted(runs))
+    return {"metadata": metadata, "common_conf": common_conf, "devices": devices}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# File-level import with a source-hash cache
+# ──────────────────────────────────────────────────────────────────────────────
+def default_output(source_path: Path) -> Path:
+    return source_path.with_name(f"{source_path.stem}.details.json")
+
+
+def _source_stamp(raw: bytes, bias_ctrl: int) -> dict[str, Any]:
+    return {
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "importer": IMPORTER_VERSION,
+        "bias_ctrl": bias_ctrl,
+    }
+
+
+def _cached_stamp(output: Path) -> Optional[dict[str, Any]]:
+    try:
+        return json.loads(output.read_text(encoding="utf-8"))["metadata"].get("source")
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def import_coldbox(
+    source_path: str | Path,
+    output: Optional[str | Path] = None,
+    *,
+    force: bool = False,
+    bias_ctrl: int = DEFAULT_BIAS_CTRL,
+) -> tuple[Path, bool]:
+    """
+    Convert *source_path* into a details file (default
+    `<source>.details.json`); returns (output path, converted?).  An output
+    whose recorded source hash matches is reused unless *force*.
+    """
+    source_path = Path(source_path)
+    output = Path(output) if output else default_output(source_path)
+    raw = source_path.read_bytes()
+    stamp = {"file": source_path.name, **_source_stamp(raw, bias_ctrl)}
+
+    cached = _cached_stamp(output)
+    if not force and cached is not None and {**cached, "file": source_path.name} == stamp:
+        logging.info("✅ %s is up to date with %s (cache hit).", output, source_path)
+        return output, False
+
+    details = convert_coldbox(json.loads(raw), bias_ctrl=bias_ctrl)
+    details["metadata"]["source"] = stamp
+    write_json(output, details, multiline=True)
+    logging.info("✅ Converted %s → %s (%d board(s)).",
+                 source_path, output, len(details["devices"]))
+    return output, True
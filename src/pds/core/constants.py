@@ -16,3 +16,10 @@ JSON_INDENT: int = 2
 
 # Channels per AFE on NP02 boards
 CHANNELS_PER_AFE: int = 8
+
+# Below this many channels (all devices) seeds are rendered in-process
+# instead of on the worker pool
+SEED_INLINE_MAX_CHANNELS: int = 4000
+
+# AFEs per DAPHNE board (length of the bias / attenuator vectors)
+AFES_PER_DEVICE: int = 5
@@ -0,0 +1,113 @@
+"""
+In-memory state of one `pds-run` invocation.
+
+A run used to hand its settings from stage to stage through files: the
+conf was re-dumped to `conf_temp.json`, the details to `temp_details.json`
+and `daphne_config.json`, and every seed went through `<cfg>.json` before
+being read back for the OKS splice.  `RunContext` carries the parsed conf,
+the effective details (mode xcorr and conf bias / attenuators applied once,
+at load) and the rendered seed texts instead.
+
+Only what an external tool reads is written: the OKS segment (drunc,
+`set_ssp_conf`), and the seed files when `"oks_backend": "add_daphne_conf"`
+needs them on disk — in both cases only if the content changed.  With an
+`ArtifactStore` the seed files are workspace links to stored objects.  Seeds are
+re-rendered only when the details changed since the last render.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from .constants import CONFIGURATIONS
+from .devices import apply_channel_settings, apply_mode_xcorr
+from .seed import SeedExecutor, render_seeds, write_seeds
+from .state import AppliedState
+from .store import ArtifactStore
+from .utils import json_key
+
+
+@dataclass(slots=True)
+class RunContext:
+    cfg: dict[str, Any]
+    details: dict[str, Any]
+    workspace: Path
+    state: Optional[AppliedState] = None  # what earlier invocations applied
+    store: Optional[ArtifactStore] = None
+    seed_texts: dict[str, str] = field(default_factory=dict)
+    _seeds: Optional[dict[str, dict[str, Any]]] = None
+    _rendered: Optional[str] = None  # details key of seed_texts
+
+    @classmethod
+    def load(
+        cls,
+        cfg: dict[str, Any],
+        details_path: Path,
+        workspace: Path,
+        *,
+        state: Optional[AppliedState] = None,
+        store: Optional[ArtifactStore] = None,
+    ) -> "RunContext":
+        """Context for *cfg* with the effective details read from *details_path*."""
+        details = json.loads(Path(details_path).read_text())
+        mode = cfg["mode"]
+        apply_mode_xcorr(details, mode)
+        boards = apply_channel_settings(details, cfg, mode)
+        logging.info("ℹ️ Bias / attenuators applied to %d board(s): %s",
+                     len(boards), ", ".join(boards))
+        return cls(cfg, details, Path(workspace), state, store)
+
+    @property
+    def xml_path(self) -> Path:
+        return Path(self.cfg["drunc_working_dir"]) / self.cfg["oks_file"]
+
+    @property
+    def oks_backend(self) -> str:
+        return self.cfg.get("oks_backend", "native")
+
+    def seed_paths(self) -> dict[str, Path]:
+        return {name: self.workspace / f"{name}.json" for name in CONFIGURATIONS}
+
+    @property
+    def seeds(self) -> dict[str, dict[str, Any]]:
+        """Parsed `seed_texts` (cached until the next render)."""
+        if self._seeds is None:
+            self._seeds = {name: json.loads(text) for name, text in self.seed_texts.items()}
+        return self._seeds
+
+    def set_correlation_threshold(self, value: int) -> None:
+        for dev in self.details.get("devices", []):
+            xcorr = dev.setdefault("self_trigger", {}).setdefault("self_trigger_xcorr", {})
+            xcorr["correlation_threshold"] = value
+
+    def render_seeds(
+        self, *, force: bool = False, executor: Optional[SeedExecutor] = None
+    ) -> bool:
+        """Render the seeds of the current details; False if they are up to date."""
+        key = json_key(self.details)
+        if not force and key == self._rendered:
+            logging.info("✅ Seeds up to date with the details (cache hit).")
+            return False
+        self.seed_texts = render_seeds(self.details, executor=executor)
+        self._seeds = None
+        self._rendered = key
+        return True
+
+    def write_seed_files(
+        self, texts: Optional[dict[str, str]] = None, directory: Optional[Path] = None
+    ) -> dict[str, bool]:
+        """
+        Write *texts* (default: the rendered seeds) as `<cfg>.json` in
+        *directory* (default: the workspace); {cfg: rewritten?}.
+        """
+        texts = self.seed_texts if texts is None else texts
+        directory = self.workspace if directory is None else directory
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.store is None:
+            return write_seeds(directory, texts)
+        return {name: self.store.store(text, directory / f"{name}.json")
+                for name, text in texts.items()}
@@ -0,0 +1,111 @@
+"""
+Per-device bias / attenuator settings from conf.json.
+
+`bias` and `attenuators` accept either one vector of AFES_PER_DEVICE values
+(a "800,800,1200,1200,1200" string or a list), applied to the first device
+as before, or an object keyed by device IP or slot number, with "*" for
+every device not listed:
+
+    "bias": {"10.73.137.107": "800,800,1200,1200,1200", "9": [0, 0, 0, 0, 0]},
+    "attenuators": {"*": "1996,1996,1996,1996,1996"}
+
+All vectors are parsed and validated up front and applied to every device
+of the details document in one pass, so several boards cost one seed and
+XML regeneration.  Devices that no key selects keep their details values.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+from .constants import AFES_PER_DEVICE
+
+DEFAULT_KEY = "*"
+
+
+@lru_cache(maxsize=256)
+def _parse_csv(text: str) -> tuple[int, ...]:
+    return tuple(int(x) for x in text.split(","))
+
+
+def parse_vector(value: Any, *, what: str) -> list[int]:
+    """One AFE vector from a comma-separated string or a list of integers."""
+    try:
+        if isinstance(value, str):
+            vector = list(_parse_csv(value))
+        elif isinstance(value, (list, tuple)) and not any(isinstance(v, bool) for v in value):
+            vector = [int(v) for v in value]
+        else:
+            raise TypeError
+    except (TypeError, ValueError):
+        raise ValueError(f"{what}: {value!r} is not a list of integers") from None
+    if len(vector) != AFES_PER_DEVICE:
+        raise ValueError(
+            f"{what}: expected exactly {AFES_PER_DEVICE} values, got {len(vector)}"
+        )
+    return vector
+
+
+def device_vectors(
+    devices: list[dict[str, Any]], spec: Any, *, what: str
+) -> dict[int, list[int]]:
+    """{device index: vector} selected by *spec* (see module docstring)."""
+    if not isinstance(spec, dict):
+        return {0: parse_vector(spec, what=what)} if devices else {}
+
+    by_ip = {dev.get("ip"): i for i, dev in enumerate(devices)}
+    by_slot = {str(dev.get("slot_id")): i for i, dev in enumerate(devices)}
+    out: dict[int, list[int]] = {}
+    for key, value in spec.items():
+        if key == DEFAULT_KEY:
+            continue
+        idx = by_ip.get(key, by_slot.get(str(key)))
+        if idx is None:
+            raise ValueError(f"{what}: no device with IP or slot '{key}'")
+        if idx in out:
+            raise ValueError(f"{what}: device {devices[idx]['ip']} is listed twice")
+        out[idx] = parse_vector(value, what=f"{what}[{key}]")
+
+    if DEFAULT_KEY in spec:
+        default = parse_vector(spec[DEFAULT_KEY], what=f"{what}[{DEFAULT_KEY}]")
+        for i in range(len(devices)):
+            out.setdefault(i, default)
+    return out
+
+
+def apply_mode_xcorr(data: dict[str, Any], mode: str) -> None:
+    """Self-trigger xcorr thresholds a run of *mode* uses (noise/calibration: off)."""
+    for dev in data.get("devices", []):
+        xcorr = dev.setdefault("self_trigger", {}).setdefault("self_trigger_xcorr", {})
+        if mode == "cosmics":
+           pass
+           # xcorr.update(correlation_threshold=4000, discrimination_threshold=5000)
+        elif mode in ("noise", "calibration"):
+            xcorr.update(correlation_threshold=99999999, discrimination_threshold=10)
+
+
+def apply_channel_settings(data: dict[str, Any], config: dict[str, Any], mode: str) -> list[str]:
+    """
+    Write the conf.json `bias` / `attenuators` into the devices of *data*
+    (bias forced to 0 in noise mode); returns the IPs of the devices touched.
+    Raises ValueError before modifying anything if a vector is invalid.
+    """
+    devices = data.get("devices", [])
+    for key in ("attenuators",) if mode == "noise" else ("bias", "attenuators"):
+        if key not in config:
+            raise ValueError(f"conf.json has no '{key}'")
+
+    attenuators = device_vectors(devices, config["attenuators"], what="attenuators")
+    if mode == "noise":
+        # bias off on every device the conf would otherwise bias
+        selected = device_vectors(devices, config.get("bias", [0] * AFES_PER_DEVICE), what="bias")
+        bias = {i: [0] * AFES_PER_DEVICE for i in selected}
+    else:
+        bias = device_vectors(devices, config["bias"], what="bias")
+
+    for i, vector in bias.items():
+        devices[i]["channels"]["bias"] = vector
+    for i, vector in attenuators.items():
+        devices[i]["channels"]["attenuators"] = vector
+    return [devices[i]["ip"] for i in sorted(bias.keys() | attenuators.keys())]
@@ -0,0 +1,300 @@
+"""
+Helpers that drive `drunc-unified-shell`.
+
+Two flavours are provided:
+
+* one-shot   – the whole `boot conf start … stop scrap terminate` chain is
+               run for every acquisition (historic behaviour);
+* persistent – a single shell is kept alive for the whole scan: the session
+               is booted and configured once, every scan point only runs
+               `start … stop`, and `scrap terminate` happens at the end.
+
+The persistent session watches the OKS segment file; when a scan point has
+modified it (new DaphneConf / SSP settings) the session is re-configured
+according to `drunc_reconf_policy` before the next `start`.  The default,
+"auto", keeps the session booted (scrap + conf) when only the objects a
+scan point rewrites changed, and reboots for any other edit.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from pds.core.oks import without_objects
+from pds.core.readiness import wait_for_session
+from pds.core.trace import TRACER, Span, run_subprocess, span
+from pds.core.utils import file_hash, json_key
+
+# Commands executed for every acquisition inside a booted + configured session
+ACQUIRE_COMMANDS: tuple[str, ...] = (
+    "start",
+    "enable-triggers",
+    "change-rate --trigger-rate {change_rate}",
+    "wait {wait_time}",
+    "disable-triggers",
+    "drain-dataflow",
+    "stop-trigger-sources",
+    "stop",
+)
+
+# drunc_reconf_policy values (see DruncSession)
+RECONF_POLICIES: tuple[str, ...] = ("auto", "reboot", "scrap")
+
+# Default regex matching the interactive prompt of drunc-unified-shell
+DEFAULT_PROMPT = r"drunc-unified-shell.*>\s*$"
+
+# Matches ANSI escape sequences (rich colours the prompt)
+_ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# One-shot mode
+# ──────────────────────────────────────────────────────────────────────────────
+def shell_prefix(cfg: dict[str, Any]) -> str:
+    return (
+        "drunc-unified-shell ssh-standalone "
+        f"{cfg['oks_session']} {cfg['session_name']} np02-pds"
+    )
+
+
+def generate_drunc_command(cfg: dict[str, Any]) -> str:
+    acquire = " ".join(c.format(**cfg) for c in ACQUIRE_COMMANDS)
+    return f"{shell_prefix(cfg)} boot conf {acquire} scrap terminate"
+
+
+def run_drunc_command(cfg: dict[str, Any], *, post_delay_s: int = 20) -> None:
+    run_subprocess(
+        generate_drunc_command(cfg),
+        name="drunc-unified-shell",
+        shell=True,
+        cwd=cfg["drunc_working_dir"],
+        check=True,
+    )
+    wait_for_session(cfg, upper_s=post_delay_s)
+
+
+def oks_fingerprints(cfg: dict[str, Any]) -> tuple[Optional[str], Optional[str]]:
+    """
+    sha256 of the OKS segment, and of the segment without the scan-point
+    objects (`oks.SCAN_POINT_CLASSES`); (None, None) if it cannot be read.
+    """
+    path = Path(cfg["drunc_working_dir"]) / cfg["oks_file"]
+    full = file_hash(path)
+    if full is None:
+        return None, None
+    text = path.read_bytes().decode("utf-8", errors="replace")
+    return full, json_key(without_objects(text))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Persistent mode
+# ──────────────────────────────────────────────────────────────────────────────
+class DruncSession:
+    """
+    Keep one interactive `drunc-unified-shell` alive across scan points.
+
+    Commands are written to the shell's stdin; completion is detected when
+    the prompt (regex `drunc_prompt`) re-appears on stdout.  The conf.json
+    can add:
+      drunc_prompt          (default: DEFAULT_PROMPT)
+      drunc_cmd_timeout_s   (default: wait_time + 600)
+      drunc_reconf_policy   "auto" (default) → "scrap" if only scan-point
+                                             objects changed, else "reboot"
+                            "reboot"         → terminate + boot + conf
+                            "scrap"          → scrap + conf, stay booted
+      drunc_error_pattern   regex; a match in a command's output aborts
+    """
+
+    def __init__(self, cfg: dict[str, Any]) -> None:
+        self.cfg = cfg
+        self.delay_s = cfg.get("drunc_delay_s", 20)
+        self.prompt = re.compile(cfg.get("drunc_prompt", DEFAULT_PROMPT))
+        self.timeout_s = cfg.get("drunc_cmd_timeout_s", int(cfg["wait_time"]) + 600)
+        self.policy = cfg.get("drunc_reconf_policy", "auto")
+        if self.policy not in RECONF_POLICIES:
+            raise ValueError(f"Unsupported drunc_reconf_policy: {self.policy}")
+        if self.policy == "reboot" and cfg.get("mode") in ("calibration", "thrscan", "threshold"):
+            logging.warning("⚠️  drunc_reconf_policy 'reboot': every %s point changes the OKS "
+                            "segment and reboots the session – no saving over one-shot runs.",
+                            cfg["mode"])
+        pattern = cfg.get("drunc_error_pattern")
+        self.error_re = re.compile(pattern) if pattern else None
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._buf = ""
+        self._cond = threading.Condition()
+        self._configured_with: Optional[str] = None  # OKS fingerprint at last conf
+        self._frame: Optional[str] = None  # ... without the scan-point objects
+        self._span: Optional[Span] = None  # lifetime of the shell process
+        self.reconfs = 0
+        self.boots = 0
+
+    # ------------------------------------------------------------------ #
+    # Context manager
+    # ------------------------------------------------------------------ #
+    def __enter__(self) -> "DruncSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def acquire(self) -> None:
+        """Take one acquisition, (re-)configuring the session if needed."""
+        fingerprint, frame = oks_fingerprints(self.cfg)
+
+        if self._proc is None:
+            self._boot(fingerprint, frame)
+        elif fingerprint != self._configured_with:
+            self.reconfs += 1
+            scrap = self.policy == "scrap" or (
+                self.policy == "auto" and frame is not None and frame == self._frame
+            )
+            if scrap:
+                logging.info("📢  OKS changed – scrap + conf in the booted session.")
+                self.send("scrap", "conf")
+                self._configured_with, self._frame = fingerprint, frame
+            else:
+                logging.info("📢  OKS changed – rebooting drunc session.")
+                self.close()
+                self._boot(fingerprint, frame)
+
+        self.send(*(c.format(**self.cfg) for c in ACQUIRE_COMMANDS))
+
+    def close(self) -> None:
+        """Scrap + terminate the session and wait for the shell to exit."""
+        if self._proc is None:
+            return
+        proc, self._proc = self._proc, None
+        try:
+            if proc.poll() is None:
+                self._write(proc, "scrap", "terminate", "exit")
+                proc.wait(timeout=self.timeout_s)
+        except subprocess.TimeoutExpired:
+            logging.warning("⚠️  drunc shell did not exit – killing it.")
+            proc.kill()
+            proc.wait()
+        finally:
+            self._configured_with = self._frame = None
+            if self._reader is not None:
+                self._reader.join(timeout=5)
+            logging.info("✅  drunc session terminated (exit %s).", proc.returncode)
+            if self._span is not None:
+                TRACER.end(self._span, exit_code=proc.returncode)
+                self._span = None
+            wait_for_session(self.cfg, upper_s=self.delay_s)
+
+    def send(self, *commands: str) -> None:
+        """Run *commands* one after another, each waiting for the prompt."""
+        for command in commands:
+            logging.info("📢  drunc> %s", command)
+            with span(f"drunc {command.split()[0]}", "drunc", command=command):
+                with self._cond:
+                    self._buf = ""
+                self._write(self._proc, command)
+                output = self._wait_prompt()
+                if self.error_re and self.error_re.search(output):
+                    raise RuntimeError(f"drunc command '{command}' failed:\n{output}")
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+    def _boot(self, fingerprint: Optional[str], frame: Optional[str]) -> None:
+        cmd = shlex.split(shell_prefix(self.cfg))
+        logging.info("📢  Starting persistent drunc shell: %s", " ".join(cmd))
+        self._proc = subprocess.Popen(
+            cmd,
+            cwd=self.cfg["drunc_working_dir"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        self._span = TRACER.begin("drunc-unified-shell", "subprocess", command=" ".join(cmd))
+        self._buf = ""
+        self._reader = threading.Thread(target=self._pump, daemon=True)
+        self._reader.start()
+        self._wait_prompt()
+        self.send("boot", "conf")
+        self._configured_with, self._frame = fingerprint, frame
+        self.boots += 1
+        logging.info("✅  drunc session booted and configured.")
+
+    def _pump(self) -> None:
+        """Forward shell output to our stdout and keep it for prompt matching."""
+        proc = self._proc
+        fd = proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            text = chunk.decode(errors="replace")
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            with self._cond:
+                self._buf += _ANSI.sub("", text)
+                self._cond.notify_all()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _wait_prompt(self) -> str:
+        deadline = time.monotonic() + self.timeout_s
+        with self._cond:
+            while not self.prompt.search(self._buf):
+                if self._proc is None or self._proc.poll() is not None:
+                    raise subprocess.CalledProcessError(
+                        self._proc.returncode if self._proc else -1,
+                        shell_prefix(self.cfg),
+                        output=self._buf,
+                    )
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"drunc prompt not seen within {self.timeout_s} s"
+                    )
+                self._cond.wait(timeout=min(remaining, 1.0))
+            return self._buf
+
+    @staticmethod
+    def _write(proc: subprocess.Popen, *commands: str) -> None:
+        for command in commands:
+            proc.stdin.write(f"{command}\n".encode())
+        proc.stdin.flush()
+
+
+class OneShotDrunc:
+    """Historic behaviour: one full boot … terminate chain per acquisition."""
+
+    def __init__(self, cfg: dict[str, Any]) -> None:
+        self.cfg = cfg
+        self.delay_s = cfg.get("drunc_delay_s", 20)
+
+    def __enter__(self) -> "OneShotDrunc":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def acquire(self) -> None:
+        run_drunc_command(self.cfg, post_delay_s=self.delay_s)
+
+    def close(self) -> None:
+        pass
+
+
+def open_session(cfg: dict[str, Any]) -> DruncSession | OneShotDrunc:
+    """Pick the drunc driver requested by `drunc_persistent` in *cfg*."""
+    if cfg.get("drunc_persistent", False):
+        return DruncSession(cfg)
+    return OneShotDrunc(cfg)
@@ -0,0 +1,98 @@
+"""
+Run the independent setup steps of a run concurrently.
+
+Each `Step` names the steps it must wait for (`after`).  `run_steps`
+starts every step whose dependencies have finished on a small thread pool
+and returns once all of them are done.  On the first failure no further
+step is started, the ones not yet running are cancelled, the running ones
+are awaited (they are external tools and are left to finish rather than
+killed half-way) and the original exception is re-raised.
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from pds.core.trace import span
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    name: str
+    fn: Callable[[], Any]
+    after: tuple[str, ...] = ()
+
+
+def _check_graph(steps: list[Step]) -> None:
+    names = [s.name for s in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate setup step names: {names}")
+    deps = {s.name: set(s.after) for s in steps}
+    for name, after in deps.items():
+        unknown = after - deps.keys()
+        if unknown:
+            raise ValueError(f"Setup step '{name}' depends on unknown {sorted(unknown)}")
+    done: set[str] = set()
+    while len(done) < len(deps):
+        ready = {n for n, after in deps.items() if n not in done and after <= done}
+        if not ready:
+            raise ValueError(f"Cycle among setup steps {sorted(deps.keys() - done)}")
+        done |= ready
+
+
+def _run_step(step: Step) -> Any:
+    # prefixed: the tool a step runs records its own span under the same name
+    with span(f"setup:{step.name}", "setup"):
+        return step.fn()
+
+
+def run_steps(steps: Iterable[Step], *, max_workers: Optional[int] = None) -> dict[str, Any]:
+    """
+    Run *steps* respecting their `after` dependencies; {name: return value}.
+
+    With max_workers=1 the steps run one by one in the given order.
+    """
+    steps = list(steps)
+    _check_graph(steps)
+    pending = {s.name: s for s in steps}
+    results: dict[str, Any] = {}
+    running: dict[Future, str] = {}
+    error: Optional[BaseException] = None
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers or max(1, len(steps)), thread_name_prefix="pds-setup"
+    ) as pool:
+        while pending or running:
+            if error is None:
+                for name, step in list(pending.items()):
+                    if all(dep in results for dep in step.after):
+                        logging.info("📢  Setup: starting %s", name)
+                        running[pool.submit(_run_step, step)] = name
+                        del pending[name]
+            if not running:
+                break  # failed: nothing left that could complete
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                if fut.cancelled():
+                    continue
+                exc = fut.exception()
+                if exc is None:
+                    results[name] = fut.result()
+                    continue
+                logging.error("❌  Setup step %s failed: %s", name, exc)
+                if error is None:
+                    error = exc
+                    for other in running:
+                        other.cancel()  # only effective if not started yet
+                    if pending:
+                        logging.warning("⚠️  Setup: not starting %s.", ", ".join(pending))
+                    pending.clear()
+
+    if error is not None:
+        raise error
+    return results
@@ -0,0 +1,224 @@
+"""
+In-process editing of OKS segment files.
+
+`update_daphne_confs` inserts or replaces several `DaphneConf` objects in
+one pass: the segment is read once, every object is spliced in memory and
+the file is written atomically once (and not at all if nothing changed).
+`update_attrs` does the same for the attributes of one existing object
+(e.g. the `SSPConf` of the LED pulser).
+
+Editing is done on the text rather than through ElementTree so that the
+OKS header (`<!DOCTYPE oks-data [...]>`, comments, attribute order) is
+preserved byte for byte outside the objects we touch.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any
+from xml.sax.saxutils import escape, unescape
+
+from .utils import pretty_compact_json
+
+_XML_ATTR_ENTITIES = {'"': "&quot;"}
+_XML_ATTR_UNENTITIES = {"&quot;": '"', "&apos;": "'"}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Low-level helpers
+# ──────────────────────────────────────────────────────────────────────────────
+def _obj_re(cls: str, obj_id: str) -> re.Pattern[str]:
+    return re.compile(
+        rf'(?P<head>[ \t]*<obj\s+class="{re.escape(cls)}"\s+id="{re.escape(obj_id)}"\s*>)'
+        r"(?P<body>.*?)"
+        r"(?P<tail></obj>)",
+        re.DOTALL,
+    )
+
+
+def _attr_re(name: str) -> re.Pattern[str]:
+    return re.compile(
+        rf'(?P<pre><attr\s+name="{re.escape(name)}"\s+type="[^"]*"\s+val=")'
+        r'(?P<val>[^"]*)'
+        r'(?P<post>"\s*/>)'
+    )
+
+
+def attr_value(value: Any) -> str:
+    return escape(str(value), _XML_ATTR_ENTITIES)
+
+
+def read_attr(body: str, name: str) -> str | None:
+    """Unescaped value of attribute *name* inside an object body, if any."""
+    m = _attr_re(name).search(body)
+    return unescape(m.group("val"), _XML_ATTR_UNENTITIES) if m else None
+
+
+def stage_text(path: Path, text: str) -> Path:
+    """
+    Write *text* to a hidden temp file next to *path* (same filesystem, same
+    permissions) and return it; `os.replace` it onto *path* to publish.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o7777)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return Path(tmp)
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write *text* to *path* through a temp file + rename in the same dir."""
+    tmp = stage_text(path, text)
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# Objects a scan point rewrites (LED pulser settings, DAPHNE seeds)
+SCAN_POINT_CLASSES: tuple[str, ...] = ("SSPConf", "DaphneConf")
+
+
+def without_objects(text: str, classes: tuple[str, ...] = SCAN_POINT_CLASSES) -> str:
+    """*text* with every object of *classes* removed (the rest untouched)."""
+    names = "|".join(map(re.escape, classes))
+    return re.sub(
+        rf'[ \t]*<obj\s+class="(?:{names})"\s+id="[^"]*"\s*>.*?</obj>',
+        "",
+        text,
+        flags=re.DOTALL,
+    )
+
+
+def _bump_num_of_items(text: str, added: int) -> str:
+    if not added:
+        return text
+    return re.sub(
+        r'(<info\b[^>]*\bnum-of-items=")(\d+)(")',
+        lambda m: f"{m.group(1)}{int(m.group(2)) + added}{m.group(3)}",
+        text,
+        count=1,
+    )
+
+
+def _insert_objects(text: str, blocks: list[str]) -> str:
+    idx = text.rfind("</oks-data>")
+    if idx < 0:
+        raise ValueError("Not an OKS data file: missing </oks-data>")
+    return text[:idx] + "".join(blocks) + text[idx:]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Attributes of an existing object
+# ──────────────────────────────────────────────────────────────────────────────
+def splice_attrs(
+    text: str, cls: str, obj_id: str, attrs: dict[str, Any]
+) -> tuple[str, list[str]]:
+    """
+    Return *text* with the attributes *attrs* of object *cls*/*obj_id* set,
+    and the attribute names whose value changed.  Raises KeyError if the
+    object or one of the attributes does not exist (nothing is added).
+    """
+    m = _obj_re(cls, obj_id).search(text)
+    if m is None:
+        raise KeyError(f"{cls} '{obj_id}' not found")
+    body = m.group("body")
+    changed: list[str] = []
+    for name, value in attrs.items():
+        attr = _attr_re(name).search(body)
+        if attr is None:
+            raise KeyError(f"{cls} '{obj_id}' has no attribute '{name}'")
+        if unescape(attr.group("val"), _XML_ATTR_UNENTITIES) == str(value):
+            continue
+        body = body[: attr.start("val")] + attr_value(value) + body[attr.end("val"):]
+        changed.append(name)
+    if changed:
+        text = text[: m.start("body")] + body + text[m.end("body"):]
+    return text, changed
+
+
+def update_attrs(
+    xml_path: str | Path, cls: str, obj_id: str, attrs: dict[str, Any]
+) -> list[str]:
+    """Set *attrs* of one object in *xml_path*; written only if something changed."""
+    xml_path = Path(xml_path)
+    text, changed = splice_attrs(xml_path.read_text(encoding="utf-8"), cls, obj_id, attrs)
+    if changed:
+        write_atomic(xml_path, text)
+    return changed
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# DaphneConf objects
+# ──────────────────────────────────────────────────────────────────────────────
+def daphne_conf_block(name: str, payload: str) -> str:
+    return (
+        f'<obj class="DaphneConf" id="{attr_value(name)}">\n'
+        f' <attr name="json_file" type="string" val="{attr_value(payload)}"/>\n'
+        "</obj>\n\n"
+    )
+
+
+def splice_daphne_confs(
+    text: str, seeds: dict[str, dict[str, Any] | str]
+) -> tuple[str, list[str]]:
+    """
+    Return *text* with one `DaphneConf` object per entry of *seeds*
+    (configuration name → seed blob, or its compact JSON text) inserted or
+    replaced, and the names that changed.
+    """
+    changed: list[str] = []
+    new_blocks: list[str] = []
+    for name, seed in seeds.items():
+        payload = seed if isinstance(seed, str) else pretty_compact_json(seed)
+        m = _obj_re("DaphneConf", name).search(text)
+        if m is None:
+            new_blocks.append(daphne_conf_block(name, payload))
+            changed.append(name)
+            continue
+
+        body = m.group("body")
+        if read_attr(body, "json_file") == payload:
+            continue
+        attr = _attr_re("json_file").search(body)
+        if attr is not None:
+            body = body[: attr.start("val")] + attr_value(payload) + body[attr.end("val"):]
+        else:
+            body = (
+                f'\n <attr name="json_file" type="string" val="{attr_value(payload)}"/>'
+                + body
+            )
+        text = text[: m.start("body")] + body + text[m.end("body"):]
+        changed.append(name)
+
+    if new_blocks:
+        text = _bump_num_of_items(_insert_objects(text, new_blocks), len(new_blocks))
+    return text, changed
+
+
+def update_daphne_confs(
+    xml_path: str | Path, seeds: dict[str, dict[str, Any] | str]
+) -> list[str]:
+    """
+    Insert or replace the `DaphneConf` objects for *seeds* in *xml_path*
+    (read once, written atomically once) and return the names that changed.
+    """
+    xml_path = Path(xml_path)
+    text, changed = splice_daphne_confs(xml_path.read_text(encoding="utf-8"), seeds)
+
+    if changed:
+        write_atomic(xml_path, text)
+        logging.info("✅ %s: updated DaphneConf %s", xml_path, ", ".join(changed))
+    else:
+        logging.info("ℹ️ %s: DaphneConf objects already up to date.", xml_path)
+    return changed
@@ -0,0 +1,196 @@
+"""
+Order scan points to minimise the cost of the transitions between them.
+
+Going from one point to the next costs whatever has to be redone:
+
+    ssp                  SSPConf rewrite (mask or LED bias changed)
+    led_settle_per_unit  LED settling, per unit of |Δ pulse_bias_percent_270nm|
+    seeds                seed + DaphneConf splice (correlation threshold changed)
+    reconf               drunc re-configuration after any OKS change
+                         (persistent session only; one-shot runs boot anyway)
+
+The defaults below are rough; measured values can be taken from a trace
+of an earlier run (`pds-run run --trace`) with `"transition_costs_trace"`,
+and any cost can be set in `"transition_costs"` (seconds).
+
+With `"scan_order": "optimized"` the points of a grid scan are ordered
+by a nearest-neighbour tour refined with 2-opt, starting from the first
+point of the naive (mask-outer, bias-inner) order; for a calibration this
+turns the bias saw-tooth into a serpentine.  The predicted cost of both
+orders is logged at run start and printed by `--plan`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Optional
+
+from pds.core.scan import ScanPoint
+
+# Rough transition costs (s); see module docstring
+DEFAULT_TRANSITION_COSTS: dict[str, float] = {
+    "ssp": 2.0,
+    "led_settle_per_unit": 0.01,
+    "seeds": 5.0,
+    "reconf": 45.0,
+}
+
+# 2-opt is O(n²) per pass: larger scans keep the nearest-neighbour tour
+_TWO_OPT_MAX_POINTS = 1500
+_TWO_OPT_MAX_PASSES = 20
+
+# trace span names → cost, per drunc_reconf_policy for "reconf"
+_TRACE_SPANS: dict[str, tuple[str, ...]] = {
+    "ssp": ("ssp_native", "set_ssp_conf"),
+    "seeds": ("update_xml",),
+}
+_RECONF_SPANS: dict[str, tuple[str, ...]] = {
+    "reboot": ("drunc terminate", "drunc boot", "drunc conf"),
+    "scrap": ("drunc scrap", "drunc conf"),
+    "auto": ("drunc scrap", "drunc conf"),  # scan points only rewrite their objects
+}
+
+
+@dataclass(frozen=True, slots=True)
+class TransitionCosts:
+    ssp: float = DEFAULT_TRANSITION_COSTS["ssp"]
+    led_settle_per_unit: float = DEFAULT_TRANSITION_COSTS["led_settle_per_unit"]
+    seeds: float = DEFAULT_TRANSITION_COSTS["seeds"]
+    reconf: float = DEFAULT_TRANSITION_COSTS["reconf"]
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any]) -> "TransitionCosts":
+        costs = cls()
+        if "transition_costs_trace" in cfg:
+            costs = replace(costs, **measured_costs(
+                cfg["transition_costs_trace"], policy=cfg.get("drunc_reconf_policy", "auto")
+            ))
+        names = {f.name for f in fields(cls)}
+        costs = replace(costs, **{
+            k: float(v) for k, v in cfg.get("transition_costs", {}).items() if k in names
+        })
+        if not cfg.get("drunc_persistent", False):
+            costs = replace(costs, reconf=0.0)  # every point boots: not a transition cost
+        return costs
+
+    def between(self, a: ScanPoint, b: ScanPoint) -> float:
+        cost = 0.0
+        db = abs(a.pulse_bias_percent_270nm - b.pulse_bias_percent_270nm)
+        if db or a.channel_mask != b.channel_mask:
+            cost += self.ssp + self.led_settle_per_unit * db
+        if a.correlation_threshold != b.correlation_threshold:
+            cost += self.seeds
+        if reconfigures(a, b):
+            cost += self.reconf
+        return cost
+
+    def reconfiguration(self, points: list[ScanPoint]) -> float:
+        """Re-configuration cost of running *points* in this order."""
+        return self.reconf * sum(reconfigures(a, b) for a, b in zip(points, points[1:]))
+
+
+def reconfigures(a: ScanPoint, b: ScanPoint) -> bool:
+    """True if going from *a* to *b* changes the OKS segment (SSP or seeds)."""
+    return (a.pulse_bias_percent_270nm != b.pulse_bias_percent_270nm
+            or a.channel_mask != b.channel_mask
+            or a.correlation_threshold != b.correlation_threshold)
+
+
+def measured_costs(trace_path: str | Path, *, policy: str = "reboot") -> dict[str, float]:
+    """Mean span durations (s) of a Chrome trace written by `--trace`."""
+    events = json.loads(Path(trace_path).expanduser().read_text())["traceEvents"]
+    durations: dict[str, list[float]] = {}
+    for ev in events:
+        if ev.get("ph") == "X":
+            durations.setdefault(ev["name"], []).append(ev["dur"] / 1e6)
+
+    def mean(names: tuple[str, ...]) -> Optional[float]:
+        values = [d for n in names for d in durations.get(n, ())]
+        return sum(values) / len(values) if values else None
+
+    out = {key: m for key, names in _TRACE_SPANS.items() if (m := mean(names)) is not None}
+    reconf = [mean((name,)) for name in _RECONF_SPANS[policy]]
+    if all(m is not None for m in reconf):
+        out["reconf"] = sum(reconf)
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Ordering
+# ──────────────────────────────────────────────────────────────────────────────
+def path_cost(points: list[ScanPoint], costs: TransitionCosts) -> float:
+    return sum(costs.between(a, b) for a, b in zip(points, points[1:]))
+
+
+def _nearest_neighbour(points: list[ScanPoint], costs: TransitionCosts) -> list[ScanPoint]:
+    tour = [points[0]]
+    left = points[1:]
+    while left:
+        here = tour[-1]
+        i = min(range(len(left)), key=lambda k: costs.between(here, left[k]))
+        tour.append(left.pop(i))
+    return tour
+
+
+def _two_opt(tour: list[ScanPoint], costs: TransitionCosts) -> list[ScanPoint]:
+    """Reverse sub-paths while that shortens the (open, fixed-start) path."""
+    c = costs.between
+    n = len(tour)
+    for _ in range(_TWO_OPT_MAX_PASSES):
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                before = c(tour[i - 1], tour[i])
+                after = c(tour[i - 1], tour[j])
+                if j + 1 < n:
+                    before += c(tour[j], tour[j + 1])
+                    after += c(tour[i], tour[j + 1])
+                if after < before - 1e-9:
+                    tour[i:j + 1] = reversed(tour[i:j + 1])
+                    improved = True
+        if not improved:
+            break
+    return tour
+
+
+def optimize_order(points: list[ScanPoint], costs: TransitionCosts) -> list[ScanPoint]:
+    """*points* reordered to minimise `path_cost`, starting from points[0]."""
+    if len(points) < 3:
+        return list(points)
+    tour = _nearest_neighbour(points, costs)
+    if len(tour) <= _TWO_OPT_MAX_POINTS:
+        tour = _two_opt(tour, costs)
+    return tour if path_cost(tour, costs) < path_cost(points, costs) else list(points)
+
+
+@dataclass(frozen=True, slots=True)
+class OrderReport:
+    naive: float
+    optimized: float
+    applied: bool
+
+    def format(self) -> str:
+        saved = self.naive - self.optimized
+        pct = 100 * saved / self.naive if self.naive else 0.0
+        state = "" if self.applied else " – set \"scan_order\": \"optimized\" to use it"
+        return (f"Predicted transition cost: naive order {self.naive:.0f} s, "
+                f"optimized {self.optimized:.0f} s (saves {saved:.0f} s, {pct:.0f} %){state}")
+
+
+def order_points(
+    cfg: dict[str, Any], points: list[ScanPoint]
+) -> tuple[list[ScanPoint], OrderReport]:
+    """Run order of *points* for *cfg* and the predicted cost of both orders."""
+    costs = TransitionCosts.from_config(cfg)
+    optimized = optimize_order(points, costs)
+    applied = cfg.get("scan_order", "naive") == "optimized"
+    report = OrderReport(path_cost(points, costs), path_cost(optimized, costs), applied)
+    return (optimized if applied else list(points)), report
+
+
+def log_order(report: OrderReport) -> None:
+    if report.naive > report.optimized:
+        logging.info("🧭  %s", report.format())
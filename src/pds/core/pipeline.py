@@ -0,0 +1,133 @@
+"""
+Stage the artifacts of upcoming scan points while the current one acquires.
+
+A scan's `stage(point)` builds what a point needs in a side workspace
+without touching the live files.  `StagingExecutor` runs it on a background
+thread for up to `prepare_ahead` points ahead; once the session is free the
+scan commits the staged files with `os.replace`, which is atomic per file.
+Only the threshold scan has files worth staging (patched seeds and the
+spliced OKS segment); the calibration scan stages just the point's
+`SSPConf` value and writes it in place on apply.
+
+A staged file records the hash of the content it was derived from.  With
+several points ahead that is the previous point's *staged* content, not
+the live file, so each commit leaves the live file exactly as the next
+staged point expects.  If the target changed otherwise (e.g. another tool
+edited the OKS segment), `StagedFiles.commit` refuses the swap, the scan
+applies the point in place, and everything staged after it is dropped
+(`StagingExecutor.drop_after`) and staged again from the live files.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+from pds.core.trace import span
+from pds.core.utils import file_hash
+
+
+@dataclass(slots=True)
+class StagedFiles:
+    """Files prepared for one scan point, swapped in on `commit`."""
+
+    moves: list[tuple[Path, Path]] = field(default_factory=list)  # (staged, live)
+    guards: dict[Path, Optional[str]] = field(default_factory=dict)  # live → base hash
+    payload: Any = None
+    stale: bool = False  # a guard failed on commit
+
+    def commit(self) -> bool:
+        """Swap every staged file in; False (and nothing moved) if a guard fails."""
+        for live, base in self.guards.items():
+            if file_hash(live) != base:
+                logging.warning("⚠️  %s changed since staging – applying in place.", live)
+                self.discard()
+                self.stale = True
+                return False
+        for staged, live in self.moves:
+            os.replace(staged, live)
+        self.moves.clear()
+        return True
+
+    def discard(self) -> None:
+        for staged, _ in self.moves:
+            try:
+                os.unlink(staged)
+            except FileNotFoundError:
+                pass
+        self.moves.clear()
+
+
+class StagingExecutor:
+    """
+    Run `stage(points[i])` on a worker thread, up to *ahead* points early.
+
+    With ahead=0 every point is staged just before it is applied, i.e. the
+    scan stays strictly serial.
+    """
+
+    def __init__(
+        self,
+        stage: Callable[[Any], Any],
+        points: Sequence[Any],
+        *,
+        ahead: int = 1,
+    ) -> None:
+        self.stage = stage
+        self.points = points
+        self.ahead = max(0, int(ahead))
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pds-stage")
+        self._futures: dict[int, Future] = {}
+
+    def __enter__(self) -> "StagingExecutor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        for fut in self._futures.values():
+            fut.cancel()
+        self._pool.shutdown(wait=True)
+        for fut in self._futures.values():
+            _discard(fut)
+        self._futures.clear()
+
+    # ------------------------------------------------------------------ #
+
+    def _submit(self, i: int) -> None:
+        if i < len(self.points) and i not in self._futures:
+            self._futures[i] = self._pool.submit(self._stage, self.points[i])
+
+    def _stage(self, point: Any) -> Any:
+        with span("stage", index=getattr(point, "index", None)):
+            return self.stage(point)
+
+    def take(self, i: int) -> Any:
+        """Staged artifacts of point *i* (staging it now if not done yet)."""
+        self._submit(i)
+        return self._futures.pop(i).result()
+
+    def prefetch(self, i: int) -> None:
+        """Start staging the *ahead* points following point *i*."""
+        for j in range(i + 1, i + 1 + self.ahead):
+            self._submit(j)
+
+    def drop_after(self, i: int) -> None:
+        """
+        Discard everything staged for the points after *i* (waiting for the
+        worker); they are staged again by the next `take` / `prefetch`.
+        """
+        for j in sorted(j for j in self._futures if j > i):
+            fut = self._futures.pop(j)
+            if not fut.cancel():
+                wait([fut])
+                _discard(fut)
+
+
+def _discard(fut: Future) -> None:
+    if fut.done() and not fut.cancelled() and fut.exception() is None:
+        staged = fut.result()
+        if isinstance(staged, StagedFiles):
+            staged.discard()
@@ -0,0 +1,205 @@
+"""
+Readiness probes used instead of a fixed sleep after each acquisition.
+
+A probe is a zero-argument callable returning True once the drunc session
+is really free.  `wait_until_ready` polls it and returns as soon as it
+passes, with `drunc_delay_s` kept as the upper bound.  Every wait is
+recorded in `WAITS` so the delay can be tuned from the run summary.
+
+conf.json example:
+
+    "readiness": [
+        {"type": "process", "pattern": "np02-session"},
+        {"type": "port", "port": 3333},
+        {"type": "file", "path": "/tmp/np02-session.lock"}
+    ],
+    "readiness_interval_s": 0.5
+
+All listed probes must pass.  Without a "readiness" key the historic fixed
+sleep of `drunc_delay_s` is kept.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import socket
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from pds.core.trace import TRACER, span
+
+Probe = Callable[[], bool]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Probes
+# ──────────────────────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class ProcessGone:
+    """Passes when no process command line matches *pattern*."""
+
+    pattern: str
+
+    def __call__(self) -> bool:
+        regex = re.compile(self.pattern)
+        proc = Path("/proc")
+        if not proc.is_dir():
+            # no procfs (e.g. macOS): pgrep exits 1 when nothing matches
+            res = TRACER.run_subprocess(["pgrep", "-f", self.pattern], capture_output=True)
+            return res.returncode == 1
+        me = os.getpid()
+        for entry in proc.iterdir():
+            if not entry.name.isdigit() or int(entry.name) == me:
+                continue
+            try:
+                cmdline = (entry / "cmdline").read_bytes()
+            except OSError:
+                continue  # process vanished or not ours to read
+            if cmdline and regex.search(cmdline.replace(b"\0", b" ").decode(errors="replace")):
+                return False
+        return True
+
+    def __str__(self) -> str:
+        return f"process /{self.pattern}/ gone"
+
+
+@dataclass(slots=True)
+class FileCleared:
+    """Passes when *path* (lock / status file) no longer exists."""
+
+    path: str
+
+    def __call__(self) -> bool:
+        return not Path(self.path).expanduser().exists()
+
+    def __str__(self) -> str:
+        return f"file {self.path} cleared"
+
+
+@dataclass(slots=True)
+class PortClosed:
+    """Passes when nothing accepts TCP connections on *host*:*port*."""
+
+    port: int
+    host: str = "127.0.0.1"
+
+    def __call__(self) -> bool:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.2)
+            return sock.connect_ex((self.host, int(self.port))) != 0
+
+    def __str__(self) -> str:
+        return f"port {self.host}:{self.port} closed"
+
+
+_PROBES: dict[str, Callable[..., Probe]] = {
+    "process": ProcessGone,
+    "file": FileCleared,
+    "port": PortClosed,
+}
+
+
+def build_probes(cfg: dict[str, Any]) -> list[Probe]:
+    """Instantiate the probes listed under `readiness` in *cfg*."""
+    specs = cfg.get("readiness", [])
+    if isinstance(specs, dict):
+        specs = [specs]
+    probes = []
+    for spec in specs:
+        spec = dict(spec)
+        kind = spec.pop("type", None)
+        if kind not in _PROBES:
+            raise ValueError(f"Unsupported readiness probe type: {kind}")
+        probes.append(_PROBES[kind](**spec))
+    return probes
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Waiting + bookkeeping
+# ──────────────────────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class WaitLog:
+    """
+    Durations (s) of every post-acquisition wait of this invocation;
+    `timeouts` counts probed waits that hit the upper bound, `sleeps` the
+    fixed sleeps taken without probes.
+    """
+
+    waits: list[float] = field(default_factory=list)
+    timeouts: int = 0
+    sleeps: int = 0
+
+    def record(self, elapsed: float, *, timed_out: bool = False, sleep: bool = False) -> None:
+        self.waits.append(elapsed)
+        self.timeouts += timed_out
+        self.sleeps += sleep
+
+    def summary(self) -> None:
+        if not self.waits:
+            return
+        logging.info(
+            "⏱  Post-run waits: n=%d  total=%.1f s  min=%.1f s  "
+            "mean=%.1f s  max=%.1f s  (hit upper bound %d×, fixed sleep %d×)",
+            len(self.waits),
+            sum(self.waits),
+            min(self.waits),
+            sum(self.waits) / len(self.waits),
+            max(self.waits),
+            self.timeouts,
+            self.sleeps,
+        )
+
+
+WAITS = WaitLog()
+
+
+def wait_until_ready(
+    probes: list[Probe],
+    *,
+    timeout_s: float,
+    interval_s: float = 0.5,
+) -> float:
+    """
+    Block until every probe passes or *timeout_s* elapsed; return the wait.
+
+    With no probes this is a plain `time.sleep(timeout_s)`.
+    """
+    start = time.monotonic()
+    if not probes:
+        time.sleep(timeout_s)
+        WAITS.record(timeout_s, sleep=True)
+        return timeout_s
+
+    pending = list(probes)
+    while True:
+        pending = [p for p in pending if not p()]
+        elapsed = time.monotonic() - start
+        if not pending:
+            logging.info("✅  Session free after %.1f s.", elapsed)
+            WAITS.record(elapsed, timed_out=False)
+            return elapsed
+        if elapsed >= timeout_s:
+            logging.warning(
+                "⚠️  Readiness not reached after %.1f s (%s) – continuing.",
+                elapsed,
+                ", ".join(str(p) for p in pending),
+            )
+            WAITS.record(elapsed, timed_out=True)
+            return elapsed
+        time.sleep(min(interval_s, timeout_s - elapsed))
+
+
+def wait_for_session(cfg: dict[str, Any], *, upper_s: Optional[float] = None) -> float:
+    """Wait for the drunc session described by *cfg* to be free."""
+    if upper_s is None:
+        upper_s = cfg.get("drunc_delay_s", 20)
+    with span("wait", upper_s=upper_s):
+        return wait_until_ready(
+            build_probes(cfg),
+            timeout_s=upper_s,
+            interval_s=cfg.get("readiness_interval_s", 0.5),
+        )
@@ -1,43 +1,55 @@
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
 import logging
-import subprocess
 import sys
 import time
-from dataclasses import asdict, dataclass
+from dataclasses import replace
+from functools import partial
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Any, Optional
 
-from pds.core.set_daphne_conf import main as run_daphne_config
+from pds.core.adaptive import (
+    BiasRefiner,
+    CoarseToFine,
+    build_metric,
+    coarse_points,
+    is_adaptive,
+    plan_note,
+)
+from pds.core.context import RunContext
+from pds.core.drunc import generate_drunc_command, open_session, run_drunc_command  # noqa: F401
+from pds.core.scan import (
+    ScanJournal,
+    ScanPoint,
+    expand_points,
+    format_plan,
+    journal_path,
+    log_skipped,
+    scan_signature,
+)
+from pds.core.oks import splice_daphne_confs, stage_text
+from pds.core.launcher import Step, run_steps
+from pds.core.ordering import log_order, order_points
+from pds.core.pipeline import StagedFiles, StagingExecutor
+from pds.core.readiness import WAITS
+from pds.core.seed import patch_xcorr
+from pds.core.set_daphne_conf import configure, update_xml
+from pds.core.state import AppliedState
+from pds.core.ssp import (  # noqa: F401
+    SSPConf,
+    SSPWriter,
+    run_set_ssp_conf,
+    ssp_command,
+    ssp_conf,
+)
+from pds.core.trace import TRACER, run_subprocess, span
+from pds.core.store import ArtifactStore, auto_gc
 from pds.core.utils import pretty_compact_json
-from pds.core.constants import CONFIGURATIONS
-
-
-# ──────────────────────────────────────────────────────────────────────────────
-# Typed container for set_ssp_conf options
-# ──────────────────────────────────────────────────────────────────────────────
-@dataclass(slots=True)
-class SSPConf:
-    object_name: str = "np02-ssp-on"
-    number_channels: int = 12
-    channel_mask: int = 1
-    pulse_mode: str = "single"
-    burst_count: int = 1
-    double_pulse_delay_ticks: int = 0
-    pulse1_width_ticks: int = 5
-    pulse2_width_ticks: int = 0
-    pulse_bias_percent_270nm: int = 4000
-    pulse_bias_percent_367nm: int = 0
-
-    @classmethod
-    def from_config(cls, cfg: dict[str, Any]) -> "SSPConf":
-        inst = cls()
-        for k, v in cfg.get("ssp_conf", {}).items():
-            if hasattr(inst, k):
-                setattr(inst, k, int(v) if isinstance(v, str) and v.isdigit() else v)
-        return inst
+from pds.core.validate import details_path, validate
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -51,7 +63,7 @@ class WebProxy:
             return
         cmd = ["bash", "-c", f"cd {cfg['drunc_working_dir']} && {cfg['web_proxy_cmd']}"]
         logging.info("📢  Sourcing web_proxy …")
-        subprocess.run(cmd, check=True)
+        run_subprocess(cmd, name="web_proxy", check=True)
         logging.info("✅  Web proxy sourced.")
 
 
@@ -61,11 +73,17 @@ class DTSButler:
 
     For modes “cosmics”, “thrscan” (aka “threshold”), we skip the alignment
     step entirely and only make sure any fake trigger left over from earlier
-    runs is cleared.
+    runs is cleared.  Other modes align on every run: there is no readback
+    of the hardware, so a local record of an earlier alignment says nothing
+    about a power cycle or a re-alignment from another host since.  With
+    `"dts_align_cache": true` an alignment an earlier run on this host
+    applied (*state*) is not repeated.  The fake trigger is cleared after
+    every run and so is always re-armed.
     """
 
-    def __init__(self, cfg: dict[str, Any]) -> None:
+    def __init__(self, cfg: dict[str, Any], *, state: Optional[AppliedState] = None) -> None:
         self.cfg = cfg
+        self.state = state if cfg.get("dts_align_cache", False) else None
         wd = cfg["drunc_working_dir"]
         self.mode = cfg.get("mode")
 
@@ -82,122 +100,182 @@ class DTSButler:
             self.clear()
             return
 
-        logging.info("📢  DTS alignment …")
-        subprocess.run(self.align_cmd, check=True)
+        if self.state and self.state.fresh("dts_align", self.align_cmd):
+            logging.info("ℹ️  DTS already aligned by an earlier run – skipping.")
+        else:
+            logging.info("📢  DTS alignment …")
+            run_subprocess(self.align_cmd, name="dts_align", check=True)
+            if self.state:
+                self.state.record("dts_align", self.align_cmd)
 
         cmd = self.fake_cmd_tpl.copy()
         cmd[-1] = cmd[-1].format(hztrigger=self.cfg["hztrigger"])
-        subprocess.run(cmd, check=True)
+        run_subprocess(cmd, name="dts_faketrig", check=True)
         logging.info("✅  DTS fake-trigger configured.")
 
     def clear(self) -> None:
         """Always safe to call; ignores errors."""
-        subprocess.run(self.clear_cmd, check=False)
+        run_subprocess(self.clear_cmd, name="dts_clear", check=False)
+
+def _seed_texts(seeds: dict[str, dict[str, Any]]) -> dict[str, str]:
+    return {name: pretty_compact_json(seed) for name, seed in seeds.items()}
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Helpers
+# Main scan / single-run controller
 # ──────────────────────────────────────────────────────────────────────────────
-def update_temp_details(details_in: Path, details_out: Path, mode: str) -> None:
-    data = json.loads(details_in.read_text())
-    for dev in data.get("devices", []):
-        xcorr = dev.setdefault("self_trigger", {}).setdefault("self_trigger_xcorr", {})
-        if mode == "cosmics":
-           pass
-           # xcorr.update(correlation_threshold=4000, discrimination_threshold=5000)
-        elif mode in ("noise", "calibration"):
-            xcorr.update(correlation_threshold=99999999, discrimination_threshold=10)
-    details_out.write_text(pretty_compact_json(data))
-    logging.info("✅  temp_details.json → %s", details_out)
-
-
-def generate_drunc_command(cfg: dict[str, Any]) -> str:
-    return (
-        "drunc-unified-shell ssh-standalone "
-        f"{cfg['oks_session']} {cfg['session_name']} np02-pds "
-        "boot conf start enable-triggers change-rate --trigger-rate "
-        f"{cfg['change_rate']} wait {cfg['wait_time']} "
-        "disable-triggers drain-dataflow stop-trigger-sources stop scrap terminate"
-    )
-
-
-def run_drunc_command(cfg: dict[str, Any], *, post_delay_s: int = 20) -> None:
-    subprocess.run(
-        generate_drunc_command(cfg),
-        shell=True,
-        cwd=cfg["drunc_working_dir"],
-        check=True,
-    )
-    time.sleep(post_delay_s)
-
-
-def run_set_ssp_conf(cfg: dict[str, Any], **overrides: Any) -> None:
-    conf = SSPConf.from_config(cfg)
-    for k, v in overrides.items():
-        if v is not None and hasattr(conf, k):
-            setattr(conf, k, v)
-
-    cmd = ["set_ssp_conf", f"{cfg['drunc_working_dir']}/{cfg['oks_file']}"]
-    for k, v in asdict(conf).items():
-        cmd += [f"--{k.replace('_', '-')}", str(v)]
-
-    subprocess.run(cmd, check=True, text=True)
-
-def _update_correlation_threshold(details_file: Path, value: int) -> None:
+class _PointScan:
     """
-    Over-write *details_file*, setting
-        devices[*].self_trigger.self_trigger_xcorr.correlation_threshold = value
+    Common driver: expand the scan into points, skip the ones the journal
+    already has, then configure + acquire each remaining point.
+
+    Subclasses may split `configure` into `stage` (build the point's
+    artifacts off to the side, run on a worker thread while the previous
+    point acquires; `prepare_ahead` points ahead, default 1) and `apply`
+    (swap them in once the session is free).  If a commit finds its base
+    changed, the later staged points are dropped and `reset_staging` is
+    called before they are staged again.
+
+    Adaptive scans (adaptive.py) choose their points as they go and call
+    `_measure` for each one instead.
     """
-    data = json.loads(details_file.read_text())
-    for dev in data.get("devices", []):
-        xcorr = dev.setdefault("self_trigger", {}).setdefault(
-            "self_trigger_xcorr", {}
-        )
-        xcorr["correlation_threshold"] = value
-    details_file.write_text(pretty_compact_json(data))
 
-# ──────────────────────────────────────────────────────────────────────────────
-# Main scan / single-run controller
-# ──────────────────────────────────────────────────────────────────────────────
-class ScanMaskIntensity:
-    def __init__(self, cfg: dict[str, Any]) -> None:
-        self.cfg       = cfg
-        self.masks     = cfg.get("mask_values", [1])
-        self.min_bias  = cfg.get("min_bias", 4000)
-        self.max_bias  = cfg.get("max_bias", 4000)
-        self.step      = cfg.get("step", 500)
-        self.delay_s   = cfg.get("drunc_delay_s", 20)
-        self.mode      = cfg.get("mode")
+    def __init__(
+        self,
+        cfg: dict[str, Any],
+        *,
+        journal: Optional[ScanJournal] = None,
+        points: Optional[list[ScanPoint]] = None,
+        state: Optional[AppliedState] = None,
+    ) -> None:
+        self.cfg     = cfg
+        self.mode    = cfg.get("mode")
+        self.delay_s = cfg.get("drunc_delay_s", 20)
+        self.journal = journal
+        self.points  = expand_points(cfg) if points is None else points  # run order
+        self.ahead   = cfg.get("prepare_ahead", 1)
+        self.ssp     = SSPWriter(cfg, state=state)
+        self._ssp_base = ssp_conf(cfg)  # every point's SSP settings: validate.py
+        self.metric  = build_metric(cfg) if is_adaptive(cfg) else None
+
+    def ssp_conf(self, point: ScanPoint) -> SSPConf:
+        return replace(self._ssp_base,
+                       channel_mask=point.channel_mask,
+                       pulse_bias_percent_270nm=point.pulse_bias_percent_270nm)
+
+    def configure(self, point: ScanPoint) -> None:
+        raise NotImplementedError
+
+    def stage(self, point: ScanPoint) -> Any:
+        """Build *point*'s artifacts without touching live files (thread-safe)."""
+        return None
+
+    def apply(self, point: ScanPoint, staged: Any) -> None:
+        """Make *point* live from its *staged* artifacts."""
+        self.configure(point)
+
+    def reset_staging(self) -> None:
+        """Forget state carried from one `stage` call to the next."""
 
+    def run(self) -> None:
+        todo = self.journal.pending(self.points) if self.journal else self.points
+        log_skipped(self.points, todo)
+        if self.journal:
+            self.journal.start(len(self.points))
+
+        with open_session(self.cfg) as drunc, \
+                StagingExecutor(self.stage, todo, ahead=self.ahead) as stager:
+            for i, point in enumerate(todo):
+                t0 = time.monotonic()
+                try:
+                    with span("point", "scan", key=point.key, index=point.index):
+                        staged = stager.take(i)
+                        with span("apply"):
+                            self.apply(point, staged)
+                        if isinstance(staged, StagedFiles) and staged.stale:
+                            stager.drop_after(i)  # derived from the replaced files
+                            self.reset_staging()
+                        stager.prefetch(i)  # stage the next point(s) during acquisition
+                        with span("acquire"):
+                            drunc.acquire()
+                except BaseException as err:
+                    if self.journal:
+                        self.journal.failed(point, err)
+                    raise
+                if self.journal:
+                    self.journal.done(point, time.monotonic() - t0)
+
+    def _measure(self, drunc: Any, point: ScanPoint) -> float:
+        """Configure + acquire *point* and read its metric (journalled value if resumed)."""
+        journal = self.journal
+        if journal and point.key in journal.metrics:
+            return journal.metrics[point.key]
+        t0 = time.monotonic()
+        try:
+            with span("point", "scan", key=point.key, index=point.index):
+                with span("apply"):
+                    self.configure(point)
+                with span("acquire"):
+                    drunc.acquire()
+                with span("metric"):
+                    value = self.metric(point)
+        except BaseException as err:
+            if journal:
+                journal.failed(point, err)
+            raise
+        logging.info("📈  %s → metric %g", point.key, value)
+        if journal:
+            journal.done(point, time.monotonic() - t0, metric=value)
+        return value
+
+
+class ScanMaskIntensity(_PointScan):
     def run(self) -> None:
         if self.mode == "calibration":
             logging.info("📢  Calibration: scanning masks × intensities …")
-            for mask in self.masks:
-                for bias in range(self.min_bias, self.max_bias + self.step, self.step):
-                    logging.info(f"📢mask= {mask} \t pulse bias percent 270nm = {bias}")
-                    run_set_ssp_conf(self.cfg,
-                                     channel_mask=mask,
-                                     pulse_bias_percent_270nm=bias)
-                    run_drunc_command(self.cfg, post_delay_s=self.delay_s)
-            return
-
-        # Noise & cosmics: single run, LED OFF
-        if self.mode in ("noise", "cosmics"):
+        elif self.mode in ("noise", "cosmics"):
+            # Noise & cosmics: single run, LED OFF
             logging.info("📢  %s run – single acquisition, LED OFF.", self.mode)
-            run_set_ssp_conf(self.cfg,
-                             channel_mask=self.masks[0],
-                             pulse_bias_percent_270nm=0)
-            run_drunc_command(self.cfg, post_delay_s=self.delay_s)
-            return
-
-        # Fallback for any other mode
-        logging.info("📢  %s run – single acquisition, default LED ON.", self.mode)
-        run_set_ssp_conf(self.cfg,
-                         channel_mask=self.masks[0],
-                         pulse_bias_percent_270nm=self.min_bias)
-        run_drunc_command(self.cfg, post_delay_s=self.delay_s)
+        else:
+            # Fallback for any other mode
+            logging.info("📢  %s run – single acquisition, default LED ON.", self.mode)
+        if self.metric:
+            self._run_adaptive()
+        else:
+            super().run()
+
+    def _run_adaptive(self) -> None:
+        """Per mask: coarse bias grid up to the target, then refine steep intervals."""
+        masks = self.cfg.get("mask_values", [1])
+        searches = {mask: BiasRefiner.from_config(self.cfg) for mask in masks}
+        if self.journal:
+            self.journal.start(sum(len(s.coarse) for s in searches.values()))
+        logging.info("📢  Adaptive calibration: %d mask(s), metric %s", len(masks), self.metric)
+
+        index = 0
+        with open_session(self.cfg) as drunc:
+            for mask, search in searches.items():
+                while (bias := search.next()) is not None:
+                    search.record(bias, self._measure(drunc, ScanPoint(index, mask, bias)))
+                    index += 1
+                logging.info("✅  mask %s: %s.", mask, search.summary())
+                if self.journal:
+                    self.journal.summary(mask=mask, points=sorted(search.values),
+                                         reached=search.reached)
+
+    def configure(self, point: ScanPoint) -> None:
+        self.apply(point, self.stage(point))
+
+    def stage(self, point: ScanPoint) -> SSPConf:
+        return self.ssp_conf(point)
+
+    def apply(self, point: ScanPoint, staged: SSPConf) -> None:
+        if self.mode == "calibration":
+            logging.info(f"📢mask= {point.channel_mask} \t "
+                         f"pulse bias percent 270nm = {point.pulse_bias_percent_270nm}")
+        self.ssp.apply(staged)
 
 
-class ScanXCorrThreshold:
+class ScanXCorrThreshold(_PointScan):
     """
     Iterate over correlation-threshold (xcorr) values and take one run per value.
 
@@ -205,6 +283,20 @@ class ScanXCorrThreshold:
       min_corr   (default 4000)
       max_corr   (default 8000)
       corr_step  (default 500)
+      thrscan_fast_path (default true)
+      thrscan_strategy  ("grid" or "adaptive", see adaptive.py)
+
+    With the fast path the full details → seeds → XML pipeline and
+    set_ssp_conf run once; each point then only patches the packed
+    `self_trigger_xcorr` word in the in-memory seeds and DaphneConf objects.
+    The next points' seeds and spliced OKS text are staged while the
+    current one acquires.  Each staged OKS text is spliced from the one
+    staged before it (the live file for the first), which is what the live
+    file holds once the previous point is committed; if the file changed
+    otherwise, the point is re-spliced in place.
+
+    Details and seeds live in the `RunContext`; seed files are only written
+    for the add_daphne_conf backend.
     """
 
     # ------------------------------------------------------------------ #
@@ -213,57 +305,150 @@ class ScanXCorrThreshold:
         self,
         cfg: dict[str, Any],
         *,
-        conf_file: Path,
-        details_file: Path,
+        ctx: RunContext,
+        journal: Optional[ScanJournal] = None,
+        points: Optional[list[ScanPoint]] = None,
     ) -> None:
-        self.cfg          = cfg
-        self.conf_file    = conf_file     # …/conf_temp.json
-        self.details_file = details_file  # …/temp_details.json
+        super().__init__(cfg, journal=journal, points=points, state=ctx.state)
+        self.ctx = ctx
 
         self.min_corr = cfg.get("min_corr", 4000)
         self.max_corr = cfg.get("max_corr", 8000)
         self.step     = cfg.get("corr_step", 500)
-        self.delay_s  = cfg.get("drunc_delay_s", 20)
+        self.fast     = cfg.get("thrscan_fast_path", True)
+        self.search   = CoarseToFine.from_config(cfg) if self.metric else None
 
-        # Keep an untouched copy so we can re-create the JSON each loop
-        self._baseline = json.loads(details_file.read_text())
+        # Untouched copy of the details the seeds are patched against
+        self._baseline = copy.deepcopy(ctx.details)
+        self._seeds: dict[str, dict[str, Any]] = {}
+        self._tail: Optional[str] = None  # OKS text of the last staged point
 
     # ------------------------------------------------------------------ #
 
     def run(self) -> None:
         logging.info("📢  Threshold scan: %s → %s (step %s)",
                      self.min_corr, self.max_corr, self.step)
+        if self.fast:
+            if not self._seeds:
+                self.prepare()
+            self.ssp.apply(ssp_conf(
+                self.cfg,
+                channel_mask=self.cfg.get("mask_values", [1])[0],
+                pulse_bias_percent_270nm=0,
+            ))
+        if self.search:
+            self._run_adaptive()
+        else:
+            super().run()
+
+    def _run_adaptive(self) -> None:
+        """Coarse pass, then bisect the transition; each point reads the metric."""
+        search, journal = self.search, self.journal
+        mask = self.cfg.get("mask_values", [1])[0]
+        if journal:
+            journal.start(len(search.coarse) + search.max_refinements())
+        logging.info("📢  Adaptive scan: %d coarse point(s), resolution %s, metric %s",
+                     len(search.coarse), search.resolution, self.metric)
+
+        index = 0
+        with open_session(self.cfg) as drunc:
+            while (corr := search.next()) is not None:
+                search.record(corr, self._measure(drunc, ScanPoint(index, mask, 0, corr)))
+                index += 1
+        logging.info("✅  Adaptive scan: %s.", search.summary())
+        if journal:
+            journal.summary(bracket=search.bracket, points=sorted(search.values))
+
+    def configure(self, point: ScanPoint) -> None:
+        corr = point.correlation_threshold
+        logging.info("📢  correlation_threshold = %s", corr)
+        if self.fast:
+            self._configure_delta(self._patched_seeds(corr))
+            return
 
-        for corr in range(self.min_corr,
-                          self.max_corr + self.step,
-                          self.step):
+        # 1) patch the in-memory details, 2) regenerate seeds + XML
+        self.ctx.set_correlation_threshold(corr)
+        with span("daphne_config"):
+            configure(self.ctx)
 
-            logging.info("📢  correlation_threshold = %s", corr)
+        # 3) configure SSP *with LED OFF* (bias = 0) like cosmics
+        self.ssp.apply(self.ssp_conf(point))
 
-            # 1) make sure temp_details.json exists, then patch it
-            if not self.details_file.exists():
-                self.details_file.write_text(pretty_compact_json(self._baseline))
-            _update_correlation_threshold(self.details_file, corr)
+    # ------------------------------------------------------------------ #
 
-            # 2) regenerate seeds + XML for the new threshold
-            run_daphne_config(conf_path=self.conf_file, mode=self.cfg["mode"])
+    def prepare(self) -> None:
+        """
+        Fast path: full details → seeds → XML pipeline once (no hardware
+        involved, so it may run alongside the DTS / proxy setup); later
+        points only patch the xcorr word.
+        """
+        if not self.fast:
+            return
+        configure(self.ctx)
+        self._seeds = copy.deepcopy(self.ctx.seeds)
 
-            # 3) configure SSP *with LED OFF* (bias = 0) like cosmics
-            run_set_ssp_conf(
-                self.cfg,
-                channel_mask=self.cfg.get("mask_values", [1])[0],
-                pulse_bias_percent_270nm=0,
-            )
+    def _patched_seeds(self, corr: int) -> dict[str, dict[str, Any]]:
+        seeds = copy.deepcopy(self._seeds)
+        patch_xcorr(seeds, self._baseline, corr)
+        return seeds
 
-            # 4) run drunc acquisition
-            run_drunc_command(self.cfg, post_delay_s=self.delay_s)
+    def _configure_delta(self, seeds: dict[str, dict[str, Any]]) -> None:
+        if self.ctx.oks_backend == "add_daphne_conf":
+            self.ctx.write_seed_files(_seed_texts(seeds))
+        update_xml(self.cfg, self.ctx.xml_path, self.ctx.seed_paths(), seeds)
 
+    # ------------------------------------------------------------------ #
+    # Pipelined fast path: seeds + spliced OKS text are staged off to the side
+
+    def stage(self, point: ScanPoint) -> Optional[StagedFiles]:
+        if not self.fast:
+            return None
+        seeds = self._patched_seeds(point.correlation_threshold)
+        staged = StagedFiles(payload=seeds)
+        if self.ctx.oks_backend == "add_daphne_conf":
+            workspace = self.ctx.workspace / f"stage-{point.index}"
+            self.ctx.write_seed_files(_seed_texts(seeds), workspace)
+            for live in self.ctx.seed_paths().values():
+                staged.moves.append((workspace / live.name, live))
+        else:
+            xml_path = self.ctx.xml_path
+            base = self._tail
+            if base is None:
+                base = xml_path.read_bytes().decode("utf-8")
+            spliced, changed = splice_daphne_confs(base, seeds)
+            staged.guards[xml_path] = hashlib.sha256(base.encode("utf-8")).hexdigest()
+            if changed:
+                staged.moves.append((stage_text(xml_path, spliced), xml_path))
+            self._tail = spliced
+        return staged
+
+    def reset_staging(self) -> None:
+        self._tail = None
+
+    def apply(self, point: ScanPoint, staged: Optional[StagedFiles]) -> None:
+        if staged is None:
+            self.configure(point)
+            return
+        logging.info("📢  correlation_threshold = %s", point.correlation_threshold)
+        if not staged.commit():
+            self._configure_delta(staged.payload)
+        elif self.ctx.oks_backend == "add_daphne_conf":
+            update_xml(self.cfg, self.ctx.xml_path, self.ctx.seed_paths())
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # main()
 # ──────────────────────────────────────────────────────────────────────────────
-def main(mode: Optional[str] = None, conf_path: str | Path | None = None) -> None:
+def main(
+    mode: Optional[str] = None,
+    conf_path: str | Path | None = None,
+    *,
+    persistent: bool = False,
+    resume: bool = False,
+    plan: bool = False,
+    trace: str | Path | None = None,
+    reapply: bool = False,
+) -> None:
     if conf_path is None:
         raise ValueError("Configuration path is required.")
     conf_path = Path(conf_path).expanduser()
@@ -273,46 +458,76 @@ def main(mode: Optional[str] = None, conf_path: str | Path | None = None) -> Non
     cfg = json.loads(conf_path.read_text())
     if mode:
         cfg["mode"] = mode
-
-    # Use a temp workspace so we never litter the repo tree
+    signature = scan_signature(cfg)  # the same scan with or without CLI-only flags
+    if persistent:
+        cfg["drunc_persistent"] = True
+
+    # everything checkable offline, before DTS / drunc are touched
+    validate(cfg, conf_path, check_paths=not plan)
+
+    # --- scan points & journal -----------------------------------------------------
+    adaptive = is_adaptive(cfg)
+    report = None
+    if adaptive:
+        points = coarse_points(cfg)
+    else:
+        points, report = order_points(cfg, expand_points(cfg))
+    journal = ScanJournal(journal_path(conf_path, cfg), signature, resume=resume)
+    if plan:
+        print(format_plan(cfg, points, completed=journal.completed))
+        if adaptive:
+            print(plan_note(cfg))
+        elif report.naive > report.optimized:
+            print(report.format())
+        return
+    if not adaptive and not journal.pending(points):
+        logging.info("✅  All %d point(s) already done – nothing to resume.", len(points))
+        return
+
+    # Temp workspace for the files external tools need (add_daphne_conf seeds)
+    TRACER.reset()
+    if report:
+        log_order(report)
     with TemporaryDirectory(prefix="pds-run-") as tmp:
-        tmp_dir = Path(tmp)
-        temp_conf   = tmp_dir / "conf_temp.json"
-        temp_detail = tmp_dir / "temp_details.json"
-
-        # --- prepare details & conf ------------------------------------------------
-        details_json = conf_path.parent / Path(cfg["daphne_details"]).name
-        update_temp_details(details_json, temp_detail, cfg["mode"])
-
-        drunc_dir = Path(cfg["drunc_working_dir"]).resolve()
-        try:
-            cfg["daphne_details"] = str(temp_detail.relative_to(drunc_dir))
-        except ValueError:
-            cfg["daphne_details"] = str(temp_detail)  # fall back: absolute path
-
-        temp_conf.write_text(json.dumps(cfg, indent=2))
-        logging.info("✅  temp conf → %s", temp_conf)
+        # --- effective details, kept in memory for every stage ---------------------
+        with span("load_context"):
+            ctx = RunContext.load(cfg, details_path(conf_path, cfg), Path(tmp),
+                                  state=AppliedState(cfg, reapply=reapply),
+                                  store=ArtifactStore.for_config(cfg))
+
+        # --- select the proper scan type -------------------------------------------
+        scan: _PointScan
+        if cfg["mode"] in ("thrscan", "threshold"):
+            # new x-corr threshold scan
+            scan = ScanXCorrThreshold(cfg, ctx=ctx, journal=journal, points=points)
+            prepare = scan.prepare
+        else:
+            # existing mask/intensity scan
+            scan = ScanMaskIntensity(cfg, journal=journal, points=points, state=ctx.state)
+            prepare = partial(configure, ctx)
 
         # --- run sequence ----------------------------------------------------------
-        dts = DTSButler(cfg)
+        # DTS, web proxy and the local seeds/XML do not depend on each other;
+        # all must be done before the first set_ssp_conf.
+        dts = DTSButler(cfg, state=ctx.state)
         try:
-            dts.run()
-            WebProxy.setup(cfg)
-
-            # ── select the proper scan type ──────────────────────────────
-            if cfg["mode"] in ("thrscan", "threshold"):
-                # new x-corr threshold scan
-                ScanXCorrThreshold(
-                    cfg,
-                    conf_file=temp_conf,
-                    details_file=temp_detail,
-                ).run()
-            else:
-                # existing mask/intensity scan
-                run_daphne_config(conf_path=temp_conf, mode=mode)
-                ScanMaskIntensity(cfg).run()
+            run_steps(
+                [
+                    Step("dts", dts.run),
+                    Step("web_proxy", partial(WebProxy.setup, cfg)),
+                    Step("daphne_config", prepare),
+                ],
+                max_workers=None if cfg.get("setup_parallel", True) else 1,
+            )
+            with span("scan", mode=cfg["mode"]):
+                scan.run()
+            auto_gc(ctx.store, cfg)
         finally:
             dts.clear()  # always attempt to clear fake trigger
+            WAITS.summary()
+            TRACER.summary()
+            if trace:
+                TRACER.write_chrome(trace)
 
 
 if __name__ == "__main__":  # pragma: no cover
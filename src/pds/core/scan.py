@@ -0,0 +1,205 @@
+"""
+Explicit scan points, the append-only scan journal and scan planning.
+
+Every run is first expanded into a list of `ScanPoint`s.  Finished points
+are appended to a JSON-Lines journal next to the conf file, so that
+`pds-run run --resume` can skip them after a failure, and
+`pds-run run --plan` can print the points and an estimated wall time
+without touching any hardware.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from pds.core.utils import json_key
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Scan points
+# ──────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True, slots=True)
+class ScanPoint:
+    index: int
+    channel_mask: int
+    pulse_bias_percent_270nm: int
+    correlation_threshold: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used by the journal (independent of *index*)."""
+        key = f"mask={self.channel_mask},bias={self.pulse_bias_percent_270nm}"
+        if self.correlation_threshold is not None:
+            key += f",corr={self.correlation_threshold}"
+        return key
+
+
+def expand_points(cfg: dict[str, Any]) -> list[ScanPoint]:
+    """Expand the scan described by *cfg* into its explicit list of points."""
+    mode = cfg.get("mode")
+    masks = cfg.get("mask_values", [1])
+
+    if mode in ("thrscan", "threshold"):
+        step = cfg.get("corr_step", 500)
+        corrs = range(cfg.get("min_corr", 4000), cfg.get("max_corr", 8000) + step, step)
+        return [
+            ScanPoint(i, masks[0], 0, corr) for i, corr in enumerate(corrs)
+        ]
+
+    min_bias = cfg.get("min_bias", 4000)
+    if mode == "calibration":
+        step = cfg.get("step", 500)
+        biases = range(min_bias, cfg.get("max_bias", 4000) + step, step)
+        pairs = [(mask, bias) for mask in masks for bias in biases]
+        return [ScanPoint(i, m, b) for i, (m, b) in enumerate(pairs)]
+
+    # noise & cosmics: LED OFF; any other mode: default LED ON
+    bias = 0 if mode in ("noise", "cosmics") else min_bias
+    return [ScanPoint(0, masks[0], bias)]
+
+
+def scan_signature(cfg: dict[str, Any]) -> str:
+    """
+    Hash of the conf as loaded (plus the run mode), taken before CLI-only
+    flags such as `--persistent-session` are applied; a journal only
+    resumes the same scan.
+    """
+    return json_key(cfg)[:16]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Journal
+# ──────────────────────────────────────────────────────────────────────────────
+def journal_path(conf_path: Path, cfg: dict[str, Any]) -> Path:
+    if "journal_file" in cfg:
+        return Path(cfg["journal_file"]).expanduser()
+    return conf_path.parent / f"{conf_path.stem}.journal.jsonl"
+
+
+class ScanJournal:
+    """
+    Append-only JSON-Lines record of a scan.
+
+    Events: `start` (one per invocation), `done` and `failed` (one per point),
+    `summary` (points chosen by an adaptive scan).
+    With *resume*, the points completed since the last non-resumed `start`
+    of the same scan signature are reported in `completed`, and the metric
+    values recorded with them (adaptive threshold scan) in `metrics`.
+    """
+
+    def __init__(self, path: Path, signature: str, *, resume: bool = False) -> None:
+        self.path = path
+        self.signature = signature
+        self.resume = resume
+        self.metrics: dict[str, float] = {}
+        self.completed: set[str] = self._load_completed() if resume else set()
+
+    # ------------------------------------------------------------------ #
+
+    def _load_completed(self) -> set[str]:
+        if not self.path.exists():
+            return set()
+        segment: set[str] = set()
+        for line in self.path.read_text().splitlines():
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line after a crash
+            if rec.get("scan") != self.signature:
+                continue
+            if rec.get("event") == "start" and not rec.get("resume"):
+                segment = set()
+                self.metrics.clear()
+            elif rec.get("event") == "done":
+                segment.add(rec["key"])
+                if "metric" in rec:
+                    self.metrics[rec["key"]] = rec["metric"]
+        return segment
+
+    def _append(self, **rec: Any) -> None:
+        rec = {"time": time.time(), "scan": self.signature, **rec}
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(rec) + "\n")
+            fh.flush()
+
+    # ------------------------------------------------------------------ #
+
+    def pending(self, points: Iterable[ScanPoint]) -> list[ScanPoint]:
+        return [p for p in points if p.key not in self.completed]
+
+    def start(self, n_points: int) -> None:
+        self._append(event="start", resume=self.resume, points=n_points)
+
+    def done(self, point: ScanPoint, elapsed_s: float, **extra: Any) -> None:
+        self.completed.add(point.key)
+        self._append(event="done", key=point.key, point=asdict(point),
+                     elapsed_s=round(elapsed_s, 3), **extra)
+
+    def summary(self, **info: Any) -> None:
+        self._append(event="summary", **info)
+
+    def failed(self, point: ScanPoint, error: BaseException) -> None:
+        self._append(event="failed", key=point.key, point=asdict(point),
+                     error=repr(error))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Planning
+# ──────────────────────────────────────────────────────────────────────────────
+# Rough per-step costs (s); override with "plan_costs" in conf.json
+DEFAULT_PLAN_COSTS: dict[str, float] = {
+    "setup": 30.0,      # DTS alignment, web proxy, first seeds/XML
+    "boot": 45.0,       # drunc boot + conf + scrap + terminate
+    "configure": 5.0,   # set_ssp_conf / seeds / XML per point
+}
+
+
+def estimate_wall_time(cfg: dict[str, Any], points: list[ScanPoint]) -> float:
+    """
+    One-shot runs boot per point.  A persistent session boots once and is
+    re-configured whenever a point changes the OKS segment, costed like
+    the point ordering does (`ordering.TransitionCosts`).
+    """
+    from pds.core.ordering import TransitionCosts  # ordering imports this module
+
+    costs = {**DEFAULT_PLAN_COSTS, **cfg.get("plan_costs", {})}
+    n = len(points)
+    if n == 0:
+        return 0.0
+    per_point = float(cfg.get("wait_time", 0)) + costs["configure"]
+    delay = float(cfg.get("drunc_delay_s", 20))
+    if not cfg.get("drunc_persistent", False):
+        return costs["setup"] + n * (costs["boot"] + delay + per_point)
+    reconf = TransitionCosts.from_config(cfg).reconfiguration(points)
+    return costs["setup"] + costs["boot"] + delay + reconf + n * per_point
+
+
+def format_plan(
+    cfg: dict[str, Any],
+    points: list[ScanPoint],
+    *,
+    completed: Optional[set[str]] = None,
+) -> str:
+    completed = completed or set()
+    todo = [p for p in points if p.key not in completed]
+    lines = [f"Scan plan for mode '{cfg.get('mode')}': {len(points)} point(s)"]
+    for p in points:
+        mark = "done" if p.key in completed else "todo"
+        lines.append(f"  {p.index + 1:4d}  [{mark}]  {p.key}")
+    est = estimate_wall_time(cfg, todo)
+    lines.append(
+        f"{len(todo)} point(s) to run – estimated wall time "
+        f"{est / 60:.1f} min ({est:.0f} s)"
+    )
+    return "\n".join(lines)
+
+
+def log_skipped(points: list[ScanPoint], todo: list[ScanPoint]) -> None:
+    skipped = len(points) - len(todo)
+    if skipped:
+        logging.info("⏭  Resuming: %d of %d point(s) already done.", skipped, len(points))
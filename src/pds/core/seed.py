@@ -6,20 +6,34 @@ Generate the four NP02-DAPHNE configuration JSONs (“seeds”).
 Changes vs. the original
 ------------------------
 * Re-uses shared helpers in `constants.py` & `utils.py`
-* Generates the four JSON files **in parallel** (ProcessPoolExecutor)
+* Renders the four JSON files inline for small inputs and on a persistent
+  ProcessPoolExecutor (one device chunk per worker) for large ones
 * Drops duplicated pretty-printer / bitmask code
 * Adds type hints and small micro-optimisations
+* Compiles each device once into an immutable `CompiledDevice`; the four
+  configurations are cheap overlays (threshold, bias, full-stream channels)
+* Content-addressed cache: a seed is only regenerated when the canonical
+  hash of (details, configuration name) differs from the one recorded in
+  `.seed_manifest.json`, or when its file on disk was modified
 """
 
-import copy
+import atexit
+import hashlib
 import json
 import logging
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Sequence
 
-from .constants import CHANNELS_PER_AFE, CONFIGURATIONS
-from .utils import bitmask, pretty_compact_json
+from .channels import ChannelBatch, DeviceChannels
+from .constants import CHANNELS_PER_AFE, CONFIGURATIONS, SEED_INLINE_MAX_CHANNELS
+from .trace import span
+from .utils import bitmask, file_hash, json_key, pretty_compact_json
 
 
 # -----------------------------------------------------------------------------#
@@ -61,12 +75,9 @@ def get_channel_analog_conf(
 ) -> dict[str, Any]:
     gains = [common_conf["offset_gain"]] * len(channel_ids)
     offsets = device["channels"].get("offsets", [])
-    trims = [
-        device["channels"].get("trim", [0] * len(channel_ids))[idx]
-        if idx < len(device["channels"].get("trim", []))
-        else 0
-        for idx in channel_ids
-    ]
+    trim = device["channels"].get("trim", [])
+    n_trim = len(trim)
+    trims = [trim[idx] if idx < n_trim else 0 for idx in channel_ids]
     return {
         "ids": channel_ids,
         "gains": gains,
@@ -127,131 +138,449 @@ def populate_afes(
         configuration["afes"]["lnas"]["gain"].append(common_conf["lna_gain"])
 
 
+def pack_xcorr(correlation_threshold: int, discrimination_threshold: int) -> int:
+    """Pack the self_trigger_xcorr register word."""
+    return ((discrimination_threshold & 0x3FFF) << 28) | (correlation_threshold & 0x0FFFFFFF)
+
+
+def patch_xcorr(
+    seeds: dict[str, dict[str, Any]],
+    data: dict[str, Any],
+    correlation_threshold: int,
+) -> None:
+    """
+    Delta update: set the packed xcorr word of every device in the in-memory
+    *seeds* for a new correlation threshold, leaving all other fields alone.
+    The discrimination threshold is taken from the details blob *data*.
+    """
+    for device in data["devices"]:
+        xcorr_conf = device.get("self_trigger", {}).get("self_trigger_xcorr", {})
+        word = pack_xcorr(correlation_threshold, xcorr_conf.get("discrimination_threshold", 0))
+        for seed in seeds.values():
+            if device["ip"] in seed:
+                seed[device["ip"]]["self_trigger_xcorr"] = word
+
+
 # -----------------------------------------------------------------------------#
-# Core generation                                                              #
+# Compiled device model                                                        #
 # -----------------------------------------------------------------------------#
 
 
-def generate_configuration(
-    data: dict[str, Any], config_name: str
-) -> dict[str, Any]:
-    """Generate one of the four official NP02 configuration blobs."""
-    data = copy.deepcopy(data)
-    data["metadata"]["configuration"] = config_name
+@dataclass(frozen=True, slots=True)
+class CompiledDevice:
+    """
+    Everything about one device that is the same in all four configurations:
+    channel tables, AFE tables and the packed trigger registers.
+    """
 
-    configurations: Dict[str, Any] = {}
+    ip: str
+    slot: int
+    bias_ctrl: int
+    threshold: int
+    bias: tuple[int, ...]
+    channel_ids: tuple[int, ...]
+    gains: tuple[int, ...]
+    offsets: tuple[int, ...]
+    trims: tuple[int, ...]
+    afe_ids: tuple[int, ...]
+    afe_attenuators: tuple[int, ...]
+    afe_common: tuple[Any, ...]  # see _AFE_COMMON_KEYS
+    self_trigger_xcorr: int
+    tp_conf: int
+    compensator: int
+    inverter: int
+
+
+# common_conf keys repeated once per populated AFE, in output order
+_AFE_COMMON_KEYS = (
+    "resolution", "output_format", "SB_first",
+    "lpf_cut_frequency", "pga_integrator_disable", "pga_gain",
+    "clamp", "lna_integrator_disable", "lna_gain",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _Overlay:
+    full_stream: bool
+    zero_threshold: bool
+    bias_off: bool
+    require_threshold: bool = False
+
+
+# What each configuration overrides on top of the compiled device
+OVERLAYS: dict[str, _Overlay] = {
+    "np02_daphne_full_mode": _Overlay(True, True, False),
+    "np02_daphne_full_mode_bias_off": _Overlay(True, True, True),
+    "np02_daphne_selftrigger": _Overlay(False, False, False),
+    "np02_daphne_selftrigger_bias_off": _Overlay(False, False, True, require_threshold=True),
+}
+
+
+def _missing_afe(afe_id: int, ip: str) -> ValueError:
+    return ValueError(f"AFE {afe_id} has missing attenuators/biases in device {ip}")
+
+
+def compile_device(
+    device: dict[str, Any],
+    common_conf: dict[str, Any],
+    tables: DeviceChannels,
+) -> CompiledDevice:
+    if tables.missing_afe is not None:
+        raise _missing_afe(tables.missing_afe, device["ip"])
+
+    trigger = device.get("self_trigger", {})
+    xcorr_conf = trigger.get("self_trigger_xcorr", {})
+    return CompiledDevice(
+        ip=device["ip"],
+        slot=device["slot_id"],
+        bias_ctrl=common_conf["bias_ctrl"],
+        threshold=trigger.get("threshold", 0),
+        bias=tuple(device["channels"].get("bias", [])),
+        channel_ids=tuple(tables.channel_ids),
+        gains=(common_conf["offset_gain"],) * len(tables.channel_ids),
+        offsets=tuple(device["channels"].get("offsets", [])),
+        trims=tuple(tables.trims),
+        afe_ids=tuple(tables.afe_ids),
+        afe_attenuators=tuple(tables.afe_attenuators),
+        afe_common=tuple(common_conf[k] for k in _AFE_COMMON_KEYS),
+        self_trigger_xcorr=pack_xcorr(
+            xcorr_conf.get("correlation_threshold", 0),
+            xcorr_conf.get("discrimination_threshold", 0),
+        ),
+        tp_conf=assemble_tp_conf(trigger),
+        compensator=bitmask(trigger.get("enable_compensator", [])),
+        inverter=bitmask(trigger.get("enable_inverter", [])),
+    )
+
+
+def compile_devices(data: dict[str, Any]) -> tuple[CompiledDevice, ...]:
+    """
+    One-time compile step shared by all four configurations; the channel
+    and AFE tables of all devices are built in one batch (`ChannelBatch`).
+    """
     common_conf = data["common_conf"]
+    devices = data["devices"]
+    batch = ChannelBatch(
+        [get_channel_ids(device) for device in devices],
+        [device["channels"].get("trim", []) for device in devices],
+        [device["channels"].get("attenuators", []) for device in devices],
+    )
+    return tuple(
+        compile_device(device, common_conf, batch.row(i))
+        for i, device in enumerate(devices)
+    )
 
-    for device in data["devices"]:
-        logging.info("Generating %s for device %s", config_name, device["ip"])
-        device = copy.deepcopy(device)
 
-        channel_ids = get_channel_ids(device)
-        full_stream_channels = (
-            channel_ids if config_name.startswith("np02_daphne_full_mode") else []
+def render_device(dev: CompiledDevice, config_name: str) -> dict[str, Any]:
+    """Apply the *config_name* overlay to a compiled device (fresh containers)."""
+    overlay = OVERLAYS.get(config_name)
+    if overlay is None:
+        raise ValueError(f"Unsupported configuration: {config_name}")
+
+    threshold = 0 if overlay.zero_threshold else dev.threshold
+    if overlay.require_threshold and threshold == 0:
+        raise ValueError(
+            f"Threshold must be non-zero in 'selftrigger_bias_off' "
+            f"for device {dev.ip}"
         )
 
-        trigger = device.get("self_trigger", {})
-        threshold = trigger.get("threshold", 0)
-        bias = device["channels"].get("bias", [])
-
-        if config_name == "np02_daphne_full_mode":
-            threshold = 0
-        elif config_name == "np02_daphne_full_mode_bias_off":
-            threshold = 0
-            bias = [0] * 5
-        elif config_name == "np02_daphne_selftrigger":
-            pass  # keep JSON values
-        elif config_name == "np02_daphne_selftrigger_bias_off":
-            bias = [0] * 5
-            if threshold == 0:
-                raise ValueError(
-                    f"Threshold must be non-zero in 'selftrigger_bias_off' "
-                    f"for device {device['ip']}"
-                )
-        else:
-            raise ValueError(f"Unsupported configuration: {config_name}")
-
-        device["channels"]["bias"] = bias
-
-        xcorr_conf = trigger.get("self_trigger_xcorr", {})
-        corr = xcorr_conf.get("correlation_threshold", 0)
-        disc = xcorr_conf.get("discrimination_threshold", 0)
-        self_trigger_xcorr = ((disc & 0x3FFF) << 28) | (corr & 0x0FFFFFFF)
-
-        tp_conf = assemble_tp_conf(trigger)
-
-        comp_list = trigger.get("enable_compensator", [])
-        inv_list = trigger.get("enable_inverter", [])
-        compensator = bitmask(comp_list)
-        inverter = bitmask(inv_list)
-
-        channel_analog_conf = get_channel_analog_conf(channel_ids, common_conf, device)
-
-        configuration = {
-            "slot": device["slot_id"],
-            "bias_ctrl": common_conf["bias_ctrl"],
-            "self_trigger_threshold": threshold,
-            "full_stream_channels": full_stream_channels,
-            "channel_analog_conf": channel_analog_conf,
-            "afes": {
-                "ids": [],
-                "attenuators": [],
-                "v_biases": [],
-                "adcs": {"resolution": [], "output_format": [], "SB_first": []},
-                "pgas": {
-                    "lpf_cut_frequency": [],
-                    "integrator_disable": [],
-                    "gain": [],
-                },
-                "lnas": {"clamp": [], "integrator_disable": [], "gain": []},
+    n_afes = len(dev.afe_ids)
+    if overlay.bias_off:
+        v_biases = [0] * n_afes
+    else:
+        for afe_id in dev.afe_ids:
+            if afe_id >= len(dev.bias):
+                raise _missing_afe(afe_id, dev.ip)
+        v_biases = [dev.bias[afe] for afe in dev.afe_ids]
+
+    (resolution, output_format, sb_first, lpf, pga_int, pga_gain,
+     clamp, lna_int, lna_gain) = dev.afe_common
+    channel_ids = list(dev.channel_ids)
+
+    return {
+        "slot": dev.slot,
+        "bias_ctrl": dev.bias_ctrl,
+        "self_trigger_threshold": threshold,
+        "full_stream_channels": channel_ids if overlay.full_stream else [],
+        "channel_analog_conf": {
+            "ids": channel_ids,
+            "gains": list(dev.gains),
+            "offsets": list(dev.offsets),
+            "trims": list(dev.trims),
+        },
+        "afes": {
+            "ids": list(dev.afe_ids),
+            "attenuators": list(dev.afe_attenuators),
+            "v_biases": v_biases,
+            "adcs": {
+                "resolution": [resolution] * n_afes,
+                "output_format": [output_format] * n_afes,
+                "SB_first": [sb_first] * n_afes,
+            },
+            "pgas": {
+                "lpf_cut_frequency": [lpf] * n_afes,
+                "integrator_disable": [pga_int] * n_afes,
+                "gain": [pga_gain] * n_afes,
             },
-            "self_trigger_xcorr": self_trigger_xcorr,
-            "tp_conf": tp_conf,
-            "compensator": compensator,
-            "inverter": inverter,
-        }
+            "lnas": {
+                "clamp": [clamp] * n_afes,
+                "integrator_disable": [lna_int] * n_afes,
+                "gain": [lna_gain] * n_afes,
+            },
+        },
+        "self_trigger_xcorr": dev.self_trigger_xcorr,
+        "tp_conf": dev.tp_conf,
+        "compensator": dev.compensator,
+        "inverter": dev.inverter,
+    }
 
-        afe_channels = map_channels_to_afes(channel_ids)
-        populate_afes(afe_channels, device, common_conf, configuration)
-        configurations[device["ip"]] = configuration
 
+def render_configuration(
+    devices: tuple[CompiledDevice, ...], config_name: str
+) -> dict[str, Any]:
+    configurations: Dict[str, Any] = {}
+    for dev in devices:
+        logging.info("Generating %s for device %s", config_name, dev.ip)
+        configurations[dev.ip] = render_device(dev, config_name)
     return configurations
 
 
+# -----------------------------------------------------------------------------#
+# Core generation                                                              #
+# -----------------------------------------------------------------------------#
+
+
+def generate_configuration(
+    data: dict[str, Any], config_name: str
+) -> dict[str, Any]:
+    """Generate one of the four official NP02 configuration blobs."""
+    return render_configuration(compile_devices(data), config_name)
+
+
 # -----------------------------------------------------------------------------#
 # Public API                                                                   #
 # -----------------------------------------------------------------------------#
 
 
-def _worker(base_data: dict[str, Any], cfg: str, out_dir: Path) -> None:
-    """Sub-process entry point (pickle-able)."""
-    result = generate_configuration(base_data, cfg)
-    (out_dir / f"{cfg}.json").write_text(pretty_compact_json(result))
-    logging.info("Wrote %s.json", cfg)
+# Bump when generate_configuration() output changes for identical input
+SEED_FORMAT_VERSION = 1
+
+MANIFEST_NAME = ".seed_manifest.json"
+
+
+def seed_key(data: dict[str, Any], config_name: str) -> str:
+    """Canonical hash of the details blob + configuration name."""
+    return json_key([data, config_name, SEED_FORMAT_VERSION])
+
+
+def _load_manifest(out_dir: Path) -> dict[str, Any]:
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
 
 
-def generate_seeds(details_path: str | Path) -> None:
+def _render_chunk(
+    devices: tuple[CompiledDevice, ...], cfgs: tuple[str, ...]
+) -> dict[str, str]:
     """
-    Generate all four configuration files
-    (`np02_daphne_*`) **in parallel** for speed.
+    Sub-process entry point (pickle-able).
+
+    Render every configuration in *cfgs* for a chunk of devices and return,
+    per configuration, the compact JSON members (`"ip":{...},…`) so that
+    the parent only has to join strings.
     """
+    return {
+        cfg: pretty_compact_json(render_configuration(devices, cfg))[1:-1]
+        for cfg in cfgs
+    }
+
+
+def _join_members(fragments: list[str]) -> str:
+    return "{" + ",".join(f for f in fragments if f) + "}"
+
+
+class SeedExecutor:
+    """
+    Policy-driven renderer for the seeds.
+
+    * below `inline_max_channels` channels (all devices together) the seeds
+      are rendered in-process – pool start-up and pickling would dominate;
+    * above it a worker pool, created on first use and kept for the rest of
+      the invocation, renders the devices in one chunk per worker, so every
+      device is pickled once rather than once per configuration.
+
+    The workers are spawned, not forked: the pool may be created from a
+    setup thread while others hold locks (logging, tracing) that a forked
+    child would inherit locked.
+
+    Wall time per strategy is kept in `timings` and logged per call.
+    """
+
+    def __init__(
+        self,
+        *,
+        inline_max_channels: int = SEED_INLINE_MAX_CHANNELS,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.inline_max_channels = inline_max_channels
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.timings: dict[str, list[float]] = {"inline": [], "pool": []}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._atexit = False
+
+    # ------------------------------------------------------------------ #
+
+    def strategy(self, devices: tuple[CompiledDevice, ...]) -> str:
+        n_channels = sum(len(dev.channel_ids) for dev in devices)
+        if (
+            n_channels < self.inline_max_channels
+            or len(devices) < 2
+            or self.max_workers < 2
+        ):
+            return "inline"
+        return "pool"
+
+    def render(
+        self,
+        devices: tuple[CompiledDevice, ...],
+        cfgs: list[str],
+        *,
+        strategy: Optional[str] = None,
+    ) -> dict[str, str]:
+        """Compact JSON text of every configuration in *cfgs*."""
+        strategy = strategy or self.strategy(devices)
+        t0 = time.perf_counter()
+        if strategy == "inline":
+            texts = {
+                cfg: _join_members([frag])
+                for cfg, frag in _render_chunk(devices, tuple(cfgs)).items()
+            }
+        else:
+            texts = self._render_pool(devices, tuple(cfgs))
+        elapsed = time.perf_counter() - t0
+        self.timings[strategy].append(elapsed)
+        logging.info(
+            "⏱  Rendered %d seed(s) for %d device(s) %s in %.1f ms.",
+            len(cfgs), len(devices), strategy, elapsed * 1e3,
+        )
+        return texts
+
+    def _render_pool(
+        self, devices: tuple[CompiledDevice, ...], cfgs: tuple[str, ...]
+    ) -> dict[str, str]:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                if not self._atexit:
+                    atexit.register(self.shutdown)
+                    self._atexit = True
+        n = min(self.max_workers, len(devices))
+        size = -(-len(devices) // n)
+        chunks = [devices[i:i + size] for i in range(0, len(devices), size)]
+        # map() keeps chunk order, hence device order in the output
+        parts = list(self._pool.map(_render_chunk, chunks, [cfgs] * len(chunks)))
+        return {cfg: _join_members([part[cfg] for part in parts]) for cfg in cfgs}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+SEED_EXECUTOR = SeedExecutor()
+
+
+def _write_seed(out_dir: Path, cfg: str, text: str) -> tuple[str, bool]:
+    """
+    Write one seed unless the file already holds exactly *text*;
+    return (output hash, whether the file was rewritten).
+    """
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    path = out_dir / f"{cfg}.json"
+    if file_hash(path) == digest:
+        logging.info("%s.json already up to date", cfg)
+        return digest, False
+    path.write_text(text)
+    logging.info("Wrote %s.json", cfg)
+    return digest, True
+
+
+def write_seeds(out_dir: Path, texts: dict[str, str]) -> dict[str, bool]:
+    """Write `<cfg>.json` for every rendered seed in *texts*; {cfg: rewritten?}."""
+    return {cfg: _write_seed(out_dir, cfg, text)[1] for cfg, text in texts.items()}
+
+
+def render_seeds(
+    data: dict[str, Any],
+    cfgs: Sequence[str] = CONFIGURATIONS,
+    *,
+    executor: Optional[SeedExecutor] = None,
+) -> dict[str, str]:
+    """Compact JSON text of the seeds *cfgs* for the details blob *data*."""
+    with span("compile_devices"):
+        devices = compile_devices(data)
+    executor = executor or SEED_EXECUTOR
+    strategy = executor.strategy(devices)
+    with span("render_seeds", strategy=strategy, seeds=len(cfgs)):
+        return executor.render(devices, list(cfgs), strategy=strategy)
+
+
+def generate_seeds(
+    details_path: str | Path,
+    *,
+    force: bool = False,
+    executor: Optional[SeedExecutor] = None,
+) -> dict[str, bool]:
+    """
+    Generate all four configuration files (`np02_daphne_*`), inline or on
+    a persistent worker pool depending on the input size (`SeedExecutor`).
+
+    Seeds whose cache key and on-disk hash match the manifest are reused;
+    *force* bypasses the cache.  Returns {configuration: rewritten?}.
+    """
+    changed: dict[str, bool] = {}
     try:
         logging.info("Reading input JSON: %s", details_path)
         with open(details_path, "r", encoding="utf-8") as fh:
             base_data = json.load(fh)
 
         out_dir = Path(details_path).parent
-
-        with ProcessPoolExecutor() as ex:
-            futs = {
-                ex.submit(_worker, base_data, cfg, out_dir): cfg
-                for cfg in CONFIGURATIONS
-            }
-            for fut in as_completed(futs):
-                fut.result()  # propagate any exceptions
-
-        logging.info("✅ All configuration files generated (parallel).")
+        manifest = {} if force else _load_manifest(out_dir)
+
+        keys = {cfg: seed_key(base_data, cfg) for cfg in CONFIGURATIONS}
+        todo = []
+        for cfg, key in keys.items():
+            entry = manifest.get(cfg, {})
+            if (
+                entry.get("input") == key
+                and entry.get("output") == file_hash(out_dir / f"{cfg}.json")
+            ):
+                changed[cfg] = False
+            else:
+                todo.append(cfg)
+
+        if not todo:
+            logging.info("✅ All configuration files up to date (cache hit).")
+            return changed
+
+        texts = render_seeds(base_data, todo, executor=executor)
+        with span("write_seeds"):
+            for cfg in todo:
+                digest, written = _write_seed(out_dir, cfg, texts[cfg])
+                manifest[cfg] = {"input": keys[cfg], "output": digest}
+                changed[cfg] = written
+
+        (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        logging.info(
+            "✅ All configuration files generated (%d of %d rebuilt).",
+            len(todo), len(CONFIGURATIONS),
+        )
 
     except FileNotFoundError:
         logging.error("Error: File %s not found.", details_path)
@@ -261,3 +590,4 @@ def generate_seeds(details_path: str | Path) -> None:
         logging.error("Configuration error: %s", err)
     except Exception as exc:  # noqa: BLE001
         logging.exception("Unexpected error generating seeds: %s", exc)
+    return changed
@@ -1,9 +1,15 @@
 import logging
-import os
 import json
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from pds.core.seed import generate_seeds
+from tempfile import TemporaryDirectory
+from pds.core.context import RunContext
+from pds.core.devices import apply_channel_settings
+from pds.core.oks import update_daphne_confs
+from pds.core.state import AppliedState
+from pds.core.store import ArtifactStore, auto_gc
+from pds.core.trace import span, system
+from pds.core.utils import file_hash, pretty_compact_json
 
 CONFIGURATIONS = [
     "np02_daphne_full_mode",
@@ -12,23 +18,77 @@ CONFIGURATIONS = [
     "np02_daphne_selftrigger_bias_off"
 ]
 
-def pretty_compact_json(obj, indent=2):
-    def _dump(obj, level):
-        spacing = ' ' * (level * indent)
-        if isinstance(obj, dict):
-            items = []
-            for k, v in obj.items():
-                dumped = _dump(v, level + 1)
-                items.append(f'{spacing}{" " * indent}"{k}": {dumped}')
-            return '{\n' + ',\n'.join(items) + f'\n{spacing}}}'
-        elif isinstance(obj, list):
-            items = [_dump(v, level + 1) for v in obj]
-            return '[\n' + ',\n'.join(f'{" " * ((level + 1) * indent)}{item}' for item in items) + f'\n{spacing}]'
+def log_daphne_conf(config_name, json_file):
+    for subkey in json_file.keys():
+        logging.info(f"ℹ️ {config_name}: for key={subkey}, json={json_file[subkey]}")
+
+def update_xml_native(xml_path, seed_paths, seeds=None):
+    """Parse the segment once, splice all DaphneConf objects, write once."""
+    if seeds is None:
+        seeds = {}
+        for config_name, output_path in seed_paths.items():
+            with open(output_path, "r") as file:
+                seeds[config_name] = json.load(file)
+    update_daphne_confs(xml_path, seeds)
+    for config_name, seed in seeds.items():
+        log_daphne_conf(config_name, seed)
+
+def update_xml_add_daphne_conf(xml_path, seed_paths):
+    """Compatibility backend: one add_daphne_conf call per configuration."""
+    for config_name, output_path in seed_paths.items():
+        command = f'add_daphne_conf {xml_path} {output_path} -n {config_name}'
+        logging.info(f"📢 Running XML update command: {command}")
+        system(command, name="add_daphne_conf")
+
+        root = ET.parse(xml_path)
+        daphne_conf = root.find(f".//obj[@class='DaphneConf'][@id='{config_name}']")
+
+        if daphne_conf is not None:
+            attributes = {}
+            for attr in daphne_conf.findall("attr"):
+                attr_name = attr.get("name")
+                attr_type = attr.get("type")
+                attr_val = attr.get("val")
+                attributes[attr_name] = {"type": attr_type, "value": attr_val}
+
+            for key, value in attributes.items():
+                if key == 'json_file':
+                    log_daphne_conf(config_name, json.loads(value['value']))
+
+def update_xml(config, xml_path, seed_paths, seeds=None):
+    """Dispatch to the OKS backend selected by `oks_backend` in conf.json."""
+    if config.get("oks_backend", "native") == "add_daphne_conf":
+        update_xml_add_daphne_conf(xml_path, seed_paths)
+    else:
+        update_xml_native(xml_path, seed_paths, seeds)
+
+def configure(ctx):
+    """
+    In-memory counterpart of main() for a `RunContext`: render its seeds and
+    splice them into the OKS segment.  Seed files are only written for the
+    add_daphne_conf backend, which reads them.  Seeds an earlier
+    invocation already spliced (`ctx.state`) are left alone.
+    """
+    with span("generate_seeds"):
+        ctx.render_seeds()
+    applied = {"backend": ctx.oks_backend, "seeds": ctx.seed_texts}
+    if ctx.state and ctx.state.fresh("daphne_conf", applied):
+        logging.info("ℹ️ DaphneConf objects already applied by an earlier run – skipping.")
+        return
+    before = file_hash(ctx.xml_path)
+    with span("update_xml", backend=ctx.oks_backend):
+        if ctx.oks_backend == "add_daphne_conf":
+            ctx.write_seed_files()
+            update_xml_add_daphne_conf(ctx.xml_path, ctx.seed_paths())
         else:
-            return json.dumps(obj)
-    return _dump(obj, 0)
-
-def main(mode=None, conf_path=None):
+            update_daphne_confs(ctx.xml_path, ctx.seed_texts)
+            for config_name, seed in ctx.seeds.items():
+                log_daphne_conf(config_name, seed)
+    if ctx.state:
+        ctx.state.record("daphne_conf", applied, before=before)
+    logging.info("✅ Updated DAPHNE configuration successfully.")
+
+def main(mode=None, conf_path=None, reapply=False):
     if conf_path is None:
         logging.error("Configuration path must be provided.")
         raise ValueError("Configuration path is required.")
@@ -39,100 +99,45 @@ def main(mode=None, conf_path=None):
         raise FileNotFoundError(f"conf.json does not exist at {conf_path}")
 
     with open(conf_path, "r") as file:
-        original_config = json.load(file)
-
-    config = original_config.copy()
-
-    temp_details_path = None
+        config = json.load(file)
 
     if mode is not None:
         config["mode"] = mode
 
-    temp_conf_path = None
-    if mode is not None:
-        temp_conf_path = conf_path.parent / "conf_temp.json"
-        temp_details_path = conf_path.parent / "temp_details.json"
-        with open(temp_conf_path, "w") as f:
-            json.dump(config, f, indent=2)
-        working_conf_path = temp_conf_path
-    else:
-        working_conf_path = conf_path
-
-    try:
-        with open(working_conf_path, "r") as file:
-            config = json.load(file)
-
-        drunc_dir = Path(config["drunc_working_dir"])
-        mode = config["mode"]
-
-        daphne_details_path = drunc_dir / config["daphne_details"]
-        xml_path = drunc_dir / config["oks_file"]
-
-        if not daphne_details_path.exists():
-            raise FileNotFoundError(f"Daphne details file does not exist at {daphne_details_path}")
-        if not xml_path.exists():
-            raise FileNotFoundError(f"XML file does not exist at {xml_path}")
-
-        # Load the DAPHNE-specific configuration
-        with open(daphne_details_path, "r") as file:
-            daphne_json_data = json.load(file)
-
-        if mode == "noise":
-            bias = [0 for _ in range(5)]
-        else:
-            bias = [int(x) for x in config["bias"].split(",")]
-
-        attenuators = [int(x) for x in config["attenuators"].split(",")]
-
-        if len(bias) != 5 or len(attenuators) != 5:
-            raise ValueError("Bias and attenuator lists must each have exactly 5 values.")
-
-        daphne_json_data["devices"][0]["channels"]["bias"] = bias
-        daphne_json_data["devices"][0]["channels"]["attenuators"] = attenuators
-
-        daphne_json = pretty_compact_json(daphne_json_data)
-
-        # Write updated daphne_config.json
-        daphne_config_path = daphne_details_path.parent / "daphne_config.json"
-        with open(daphne_config_path, "w") as f:
-            f.write(daphne_json)
-
-        logging.info(f"✅ Updated DAPHNE config: {daphne_config_path}")
+    drunc_dir = Path(config["drunc_working_dir"])
+    mode = config["mode"]
 
-        # Run seed script to generate configurations
-        logging.info(f"📢 Generating seeds from {daphne_config_path}")
-        generate_seeds(daphne_config_path)
+    daphne_details_path = drunc_dir / config["daphne_details"]
+    xml_path = drunc_dir / config["oks_file"]
 
-        # Update XML file using add_daphne_conf
-        for config_name in CONFIGURATIONS:
-            output_path = daphne_details_path.parent / (config_name + '.json')
-            command = f'add_daphne_conf {xml_path} {output_path} -n {config_name}'
-            logging.info(f"📢 Running XML update command: {command}")
-            os.system(command)
+    if not daphne_details_path.exists():
+        raise FileNotFoundError(f"Daphne details file does not exist at {daphne_details_path}")
+    if not xml_path.exists():
+        raise FileNotFoundError(f"XML file does not exist at {xml_path}")
 
-            root = ET.parse(xml_path)
-            daphne_conf = root.find(f".//obj[@class='DaphneConf'][@id='{config_name}']")
+    # Load the DAPHNE-specific configuration
+    with open(daphne_details_path, "r") as file:
+        daphne_json_data = json.load(file)
 
-            if daphne_conf is not None:
-                attributes = {}
-                for attr in daphne_conf.findall("attr"):
-                    attr_name = attr.get("name")
-                    attr_type = attr.get("type")
-                    attr_val = attr.get("val")
-                    attributes[attr_name] = {"type": attr_type, "value": attr_val}
+    # Bias / attenuators of every selected board, validated before any write
+    boards = apply_channel_settings(daphne_json_data, config, mode)
+    logging.info(f"ℹ️ Bias / attenuators applied to {len(boards)} board(s): {', '.join(boards)}")
 
-                for key, value in attributes.items():
-                    if key == 'json_file':
-                        json_file = json.loads(value['value'])
-                        for subkey in json_file.keys():
-                            logging.info(f"ℹ️ For key={subkey}, json={json_file[subkey]}")
+    # Generated files go to the artifact store, not next to the details, so
+    # concurrent invocations cannot overwrite each other's
+    store = ArtifactStore.for_config(config)
+    digest = store.put(pretty_compact_json(daphne_json_data, multiline=True, ensure_ascii=True))
+    logging.info(f"✅ Updated DAPHNE config: {store.path(digest)}")
 
-        logging.info("✅ Updated DAPHNE configuration successfully.")
+    with TemporaryDirectory(prefix="pds-set-") as workspace:
+        ctx = RunContext(config, daphne_json_data, Path(workspace),
+                         AppliedState(config, reapply=reapply), store)
+        logging.info(f"📢 Generating seeds from {daphne_details_path}")
+        configure(ctx)
 
-    finally:
-        if temp_details_path and temp_details_path.exists():
-            logging.info(f"🧹 Cleaning up temporary details file: {temp_details_path}")
-            os.remove(temp_details_path)
+    for config_name, text in ctx.seed_texts.items():
+        logging.info(f"ℹ️ {config_name}: {store.path(store.put(text))}")
+    auto_gc(store, config)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,160 @@
+"""
+SSP (LED pulser) settings of a run.
+
+Every scan point spawns `set_ssp_conf`, which rewrites the `SSPConf`
+object in the OKS segment from a full argv.  `SSPWriter` skips a point
+whose settings are already applied (the segment unchanged since it wrote
+them; with an `AppliedState`, also settings an earlier invocation left in
+the segment).
+
+`"ssp_backend": "native"` (opt-in) sets the attributes in process instead
+(`oks.update_attrs`, one atomic write and none at all if the object already
+holds the values): the field names of `SSPConf` become the attribute names
+and the values are written verbatim, which assumes `set_ssp_conf` does no
+conversion of its own.  When the segment still holds the previous point's
+settings, only the attributes that differ from them are spliced.  If the
+segment does not carry the object or one of its attributes, the writer
+falls back to `set_ssp_conf` for the rest of the run.
+
+The `SSPConf` of every scan point is checked (`SSPConf.problems`) by
+`validate` before the scan starts, so a bad mask / bias aborts before any
+hardware is touched.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Optional
+
+from pds.core.oks import update_attrs
+from pds.core.state import AppliedState
+from pds.core.trace import run_subprocess, span
+from pds.core.utils import file_hash
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Typed container for set_ssp_conf options
+# ──────────────────────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class SSPConf:
+    object_name: str = "np02-ssp-on"
+    number_channels: int = 12
+    channel_mask: int = 1
+    pulse_mode: str = "single"
+    burst_count: int = 1
+    double_pulse_delay_ticks: int = 0
+    pulse1_width_ticks: int = 5
+    pulse2_width_ticks: int = 0
+    pulse_bias_percent_270nm: int = 4000
+    pulse_bias_percent_367nm: int = 0
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any]) -> "SSPConf":
+        inst = cls()
+        for k, v in cfg.get("ssp_conf", {}).items():
+            if hasattr(inst, k):
+                setattr(inst, k, int(v) if isinstance(v, str) and v.isdigit() else v)
+        return inst
+
+    def attrs(self) -> dict[str, Any]:
+        """OKS attributes of the `SSPConf` object (everything but its id)."""
+        out = asdict(self)
+        del out["object_name"]
+        return out
+
+    def problems(self) -> list[str]:
+        out = []
+        for f in fields(self):
+            v = getattr(self, f.name)
+            if f.type == "int" and (not isinstance(v, int) or isinstance(v, bool) or v < 0):
+                out.append(f"{f.name}={v!r} is not a non-negative integer")
+        if not out and self.channel_mask >> self.number_channels:
+            out.append(
+                f"channel_mask={self.channel_mask} exceeds {self.number_channels} channels"
+            )
+        return out
+
+
+def ssp_conf(cfg: dict[str, Any], **overrides: Any) -> SSPConf:
+    """`SSPConf` of *cfg* with the non-None *overrides* applied."""
+    conf = SSPConf.from_config(cfg)
+    return replace(conf, **{
+        k: v for k, v in overrides.items() if v is not None and hasattr(conf, k)
+    })
+
+
+def ssp_command(cfg: dict[str, Any], **overrides: Any) -> list[str]:
+    """argv of the set_ssp_conf call for *cfg* with *overrides* applied."""
+    return _command(cfg, ssp_conf(cfg, **overrides))
+
+
+def _command(cfg: dict[str, Any], conf: SSPConf) -> list[str]:
+    cmd = ["set_ssp_conf", f"{cfg['drunc_working_dir']}/{cfg['oks_file']}"]
+    for k, v in asdict(conf).items():
+        cmd += [f"--{k.replace('_', '-')}", str(v)]
+    return cmd
+
+
+def run_set_ssp_conf(cfg: dict[str, Any], **overrides: Any) -> None:
+    run_subprocess(ssp_command(cfg, **overrides), check=True, text=True)
+
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Writer
+# ──────────────────────────────────────────────────────────────────────────────
+class SSPWriter:
+    """Apply `SSPConf`s to the OKS segment of *cfg*, skipping no-op updates."""
+
+    def __init__(self, cfg: dict[str, Any], *, state: Optional[AppliedState] = None) -> None:
+        self.cfg = cfg
+        self.state = state
+        self.xml_path = Path(cfg["drunc_working_dir"]) / cfg["oks_file"]
+        self.backend = cfg.get("ssp_backend", "set_ssp_conf")
+        if self.backend not in ("native", "set_ssp_conf"):
+            raise ValueError(f"Unsupported ssp_backend: {self.backend}")
+        self._applied: Optional[tuple[SSPConf, Optional[str]]] = None  # (conf, OKS hash)
+        self.skipped = 0
+
+    def apply(self, conf: SSPConf) -> bool:
+        """Make *conf* live; False if it already was."""
+        live = file_hash(self.xml_path)
+        if self._applied == (conf, live):
+            self.skipped += 1
+            logging.info("ℹ️  SSP settings unchanged – skipping update.")
+            return False
+        if self.state and self.state.fresh("ssp", asdict(conf)):
+            self._applied = (conf, live)
+            self.skipped += 1
+            logging.info("ℹ️  SSP %s already applied by an earlier run – skipping.",
+                         conf.object_name)
+            return False
+
+        attrs = conf.attrs()
+        if self._applied and self._applied[1] == live \
+                and self._applied[0].object_name == conf.object_name:
+            previous = self._applied[0].attrs()
+            attrs = {k: v for k, v in attrs.items() if previous[k] != v}
+
+        changed = True
+        if self.backend == "native":
+            with span("ssp_native", object=conf.object_name, attrs=len(attrs)) as s:
+                try:
+                    changed = bool(update_attrs(
+                        self.xml_path, "SSPConf", conf.object_name, attrs
+                    ))
+                    s.args["changed"] = changed
+                except (KeyError, OSError) as err:
+                    logging.warning("⚠️  %s – falling back to set_ssp_conf.", err)
+                    self.backend = "set_ssp_conf"
+        if self.backend == "set_ssp_conf":
+            run_subprocess(_command(self.cfg, conf), check=True, text=True)
+
+        self._applied = (conf, file_hash(self.xml_path))
+        if self.state:
+            self.state.record("ssp", asdict(conf), before=live)
+        if changed:
+            logging.info("✅  SSP %s updated.", conf.object_name)
+        return changed
@@ -0,0 +1,126 @@
+"""
+Applied-state cache shared by successive `pds-run` invocations.
+
+Each invocation used to re-apply the DaphneConf objects, the SSP settings
+and the DTS alignment even when the previous one, a minute earlier, had
+applied exactly the same values.  `AppliedState` records a fingerprint of
+every component it applied in `~/.pds/state/<segment>.json` (one file per
+OKS segment; `"state_dir"` or $PDS_STATE_DIR move it):
+
+    daphne_conf   the rendered seeds spliced into the segment
+    ssp           the `SSPConf` attributes
+    dts_align     the DTS alignment command (only with "dts_align_cache")
+
+The OKS-bound components are only trusted while the segment is the one
+this tool last wrote: the state keeps its sha256 (and mtime / size, so an
+untouched file is not re-hashed).  A write by anything else - an editor,
+another tool, a threshold-scan point - invalidates them.  Entries older
+than `"state_max_age_s"` (default one day) are ignored, as hardware may
+have been power-cycled since.  `--reapply` ignores the cache but still
+records what it applied.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .utils import file_hash, json_key, write_json
+
+STATE_VERSION = 1
+DEFAULT_STATE_DIR = Path("~/.pds/state")
+DEFAULT_MAX_AGE_S = 24 * 3600
+
+# Components stored in the OKS segment
+OKS_COMPONENTS = frozenset({"daphne_conf", "ssp"})
+
+
+def state_dir(cfg: dict[str, Any]) -> Path:
+    return Path(cfg.get("state_dir") or os.environ.get("PDS_STATE_DIR")
+                or DEFAULT_STATE_DIR).expanduser()
+
+
+class AppliedState:
+    """What earlier invocations applied to the segment of *cfg* (thread-safe)."""
+
+    def __init__(self, cfg: dict[str, Any], *, reapply: bool = False) -> None:
+        self.xml_path = (Path(cfg["drunc_working_dir"]) / cfg["oks_file"]).resolve()
+        self.path = state_dir(cfg) / f"{json_key(str(self.xml_path))[:16]}.json"
+        self.reapply = reapply
+        self.max_age_s = cfg.get("state_max_age_s", DEFAULT_MAX_AGE_S)
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"version": STATE_VERSION, "components": {}}
+        if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+            return {"version": STATE_VERSION, "components": {}}
+        return data
+
+    def _save(self) -> None:
+        self._data["xml"] = str(self.xml_path)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(self.path, self._data, multiline=True)
+        except OSError as err:
+            logging.warning("⚠️  Cannot write applied state %s: %s", self.path, err)
+
+    # ------------------------------------------------------------------ #
+
+    def oks_hash(self) -> Optional[str]:
+        """sha256 of the segment; not re-read if its mtime / size are unchanged."""
+        try:
+            st = self.xml_path.stat()
+        except OSError:
+            return None
+        stat = [st.st_mtime_ns, st.st_size]
+        oks = self._data.get("oks") or {}
+        if oks.get("stat") == stat and oks.get("sha256"):
+            return oks["sha256"]
+        return file_hash(self.xml_path)
+
+    def fresh(self, name: str, value: Any) -> bool:
+        """True if *name* was applied with *value* and still is."""
+        if self.reapply:
+            return False
+        with self._lock:
+            entry = self._data["components"].get(name)
+            if not entry or entry.get("fingerprint") != json_key(value):
+                return False
+            if time.time() - entry.get("time", 0) > self.max_age_s:
+                return False
+            if name in OKS_COMPONENTS:
+                return self.oks_hash() == (self._data.get("oks") or {}).get("sha256")
+        return True
+
+    def record(self, name: str, value: Any, *, before: Optional[str] = None) -> None:
+        """
+        Note that *name* now holds *value*.  For an OKS component pass the
+        segment hash from *before* the write: if it is not the one this state
+        last saw, the segment was changed behind our back and the other OKS
+        components are dropped.
+        """
+        with self._lock:
+            components = self._data["components"]
+            if name in OKS_COMPONENTS:
+                if before != (self._data.get("oks") or {}).get("sha256"):
+                    for other in OKS_COMPONENTS - {name}:
+                        components.pop(other, None)
+                st = self.xml_path.stat()
+                self._data["oks"] = {"sha256": file_hash(self.xml_path),
+                                     "stat": [st.st_mtime_ns, st.st_size]}
+            components[name] = {"fingerprint": json_key(value), "time": time.time()}
+            self._save()
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            if self._data["components"].pop(name, None) is not None:
+                self._save()
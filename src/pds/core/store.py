@@ -0,0 +1,176 @@
+"""
+Content-addressed store for generated configuration artifacts.
+
+`pds-run set` used to write `daphne_config.json` and the four seed JSONs
+next to the details file, so two concurrent invocations (or a scan and a
+manual `set`) overwrote each other's files.  Generated artifacts now go to
+
+    ~/.pds/store/objects/<sha256[:2]>/<sha256>.json
+
+(`"artifact_store"` or $PDS_STORE_DIR move it).  An object is written to a
+private temp file and renamed into place, so readers never see a partial
+file, and identical artifacts from different runs are stored once.  Each
+invocation's workspace references the objects by symlink (copy where
+symlinks are not available) under the usual file names, which is what
+`add_daphne_conf` reads.
+
+`gc` removes the least recently used objects until the store fits a size
+limit (`pds-run store-gc --max-size 200M`, or `"artifact_store_max_bytes"`
+after every run).  Objects used in the last `min_age_s` seconds are kept,
+as a concurrent invocation may be about to read them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+DEFAULT_STORE_DIR = Path("~/.pds/store")
+DEFAULT_GC_MIN_AGE_S = 600.0
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kKmMgG]?)i?[bB]?\s*$")
+_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+
+
+def parse_size(text: str | int) -> int:
+    """Bytes in "500M", "2G", "4096" …"""
+    if isinstance(text, int):
+        return text
+    m = _SIZE.match(text)
+    if not m:
+        raise ValueError(f"Not a size: {text!r}")
+    return int(float(m.group(1)) * _UNITS[m.group(2).lower()])
+
+
+class ArtifactStore:
+    """Objects keyed by the sha256 of their content (safe across processes)."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root).expanduser()
+        self.objects = self.root / "objects"
+        self.tmp = self.root / "tmp"
+
+    @classmethod
+    def for_config(cls, cfg: dict[str, Any]) -> "ArtifactStore":
+        return cls(cfg.get("artifact_store") or os.environ.get("PDS_STORE_DIR")
+                   or DEFAULT_STORE_DIR)
+
+    def path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.json"
+
+    def _temp(self, name: str) -> Path:
+        return Path(f"{name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, text: str) -> str:
+        """Store *text*; returns its digest.  Existing objects are only touched."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.path(digest)
+        try:
+            os.utime(target)  # already stored: mark as recently used
+            return digest
+        except FileNotFoundError:
+            pass
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp.mkdir(parents=True, exist_ok=True)
+        tmp = self.tmp / self._temp(digest)
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return digest
+
+    def link(self, digest: str, dest: Path) -> bool:
+        """
+        Make *dest* reference object *digest* (atomic replace); False if it
+        already did.
+        """
+        target = self.path(digest)
+        dest = Path(dest)
+        try:
+            if dest.is_symlink() and Path(os.readlink(dest)) == target:
+                os.utime(target)
+                return False
+        except OSError:
+            pass
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{self._temp(dest.name)}")
+        try:
+            try:
+                os.symlink(target, tmp)
+            except OSError:  # e.g. no symlink permission: fall back to a copy
+                shutil.copyfile(target, tmp)
+            os.replace(tmp, dest)
+        finally:
+            if tmp.is_symlink() or tmp.exists():
+                tmp.unlink()
+        return True
+
+    def store(self, text: str, dest: Path) -> bool:
+        """`put` + `link`: *dest* now holds *text*; False if it already did."""
+        return self.link(self.put(text), dest)
+
+    # ------------------------------------------------------------------ #
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.objects.glob("*/*.json"))
+
+    def gc(self, max_bytes: int, *, min_age_s: float = DEFAULT_GC_MIN_AGE_S) -> tuple[int, int]:
+        """
+        Remove least recently used objects until the store holds at most
+        *max_bytes*; returns (objects removed, bytes freed).
+        """
+        now = time.time()
+        for tmp in self.tmp.glob("*.tmp"):  # left behind by a killed writer
+            try:
+                if now - tmp.stat().st_mtime > min_age_s:
+                    tmp.unlink()
+            except OSError:
+                pass
+
+        entries = []
+        for path in self.objects.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # removed by a concurrent gc
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = freed = 0
+        for mtime, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if now - mtime < min_age_s:
+                break  # everything from here on is recent
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+            freed += size
+        if removed:
+            logging.info("🧹 Artifact store %s: removed %d object(s), %d bytes.",
+                         self.root, removed, freed)
+        if total > max_bytes:
+            logging.warning("⚠️  Artifact store %s still holds %d bytes (recently used).",
+                            self.root, total)
+        return removed, freed
+
+
+def auto_gc(store: ArtifactStore, cfg: dict[str, Any]) -> Optional[tuple[int, int]]:
+    """`gc` to `"artifact_store_max_bytes"` if the conf sets a limit."""
+    limit = cfg.get("artifact_store_max_bytes")
+    if limit is None:
+        return None
+    return store.gc(parse_size(limit))
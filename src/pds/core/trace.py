@@ -0,0 +1,180 @@
+"""
+Lightweight per-phase tracing for pds-run.
+
+Phases are wrapped in named spans (`with span("seeds"): …`); external
+tools are started through `run_subprocess` / `system`, which record the
+command line and exit code on their span.  At the end of a run
+`TRACER.summary()` logs one line per span name (count, total, mean, max)
+and `TRACER.write_chrome(path)` dumps every span in the Chrome trace-event
+format, which chrome://tracing and https://ui.perfetto.dev open directly.
+
+Spans are cheap (two perf_counter calls and a list append) and safe to
+open from worker threads; nesting follows from the timestamps.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    cat: str
+    start: float                     # perf_counter() seconds
+    end: Optional[float] = None
+    tid: int = 0
+    args: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class Tracer:
+    """Collects the spans of one invocation."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._threads: dict[int, str] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self._threads.clear()
+            self._origin = time.perf_counter()
+
+    # ------------------------------------------------------------------ #
+    # Recording
+    # ------------------------------------------------------------------ #
+    def begin(self, name: str, cat: str = "phase", **args: Any) -> Span:
+        """Open a span that outlives a `with` block; close it with `end`."""
+        tid = threading.get_native_id()
+        s = Span(name, cat, time.perf_counter(), tid=tid, args=args)
+        with self._lock:
+            self._threads.setdefault(tid, threading.current_thread().name)
+            self.spans.append(s)
+        return s
+
+    @staticmethod
+    def end(s: Span, **args: Any) -> None:
+        s.args.update(args)
+        s.end = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, cat: str = "phase", **args: Any) -> Iterator[Span]:
+        """Time the enclosed block; *args* (and whatever the block adds) are kept."""
+        s = self.begin(name, cat, **args)
+        try:
+            yield s
+        except BaseException as err:
+            s.args.setdefault("error", repr(err))
+            raise
+        finally:
+            self.end(s)
+
+    def run_subprocess(
+        self,
+        cmd: str | Sequence[str],
+        *,
+        name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> subprocess.CompletedProcess:
+        """
+        `subprocess.run` recorded as a "subprocess" span (named *name*, or
+        after the executable) with its command line and exit code.
+        """
+        command = cmd if isinstance(cmd, str) else " ".join(map(str, cmd))
+        name = name or os.path.basename(command.split()[0])
+        with self.span(name, "subprocess", command=command) as s:
+            try:
+                res = subprocess.run(cmd, **kwargs)
+            except subprocess.CalledProcessError as err:
+                s.args["exit_code"] = err.returncode
+                raise
+            s.args["exit_code"] = res.returncode
+            return res
+
+    def system(self, command: str, *, name: Optional[str] = None) -> int:
+        """`os.system` recorded as a "subprocess" span with its exit code."""
+        with self.span(name or command.split()[0], "subprocess", command=command) as s:
+            status = os.system(command)
+            s.args["exit_code"] = os.waitstatus_to_exitcode(status)
+            return status
+
+    # ------------------------------------------------------------------ #
+    # Reporting
+    # ------------------------------------------------------------------ #
+    def totals(self) -> dict[str, dict[str, float]]:
+        """Per span name: n, total, mean and max duration (s), first seen first."""
+        out: dict[str, dict[str, float]] = {}
+        for s in list(self.spans):
+            d = s.duration
+            t = out.setdefault(s.name, {"n": 0, "total": 0.0, "max": 0.0})
+            t["n"] += 1
+            t["total"] += d
+            t["max"] = max(t["max"], d)
+        for t in out.values():
+            t["mean"] = t["total"] / t["n"]
+        return out
+
+    def format_summary(self) -> str:
+        totals = self.totals()
+        width = max(map(len, totals), default=4)
+        lines = [f"{'span':<{width}}  {'n':>4}  {'total s':>9}  {'mean s':>9}  {'max s':>9}"]
+        for name, t in totals.items():
+            lines.append(
+                f"{name:<{width}}  {t['n']:>4}  {t['total']:>9.2f}  "
+                f"{t['mean']:>9.2f}  {t['max']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def summary(self) -> None:
+        if self.spans:
+            logging.info("⏱  Run timing:\n%s", self.format_summary())
+
+    def chrome_events(self) -> list[dict[str, Any]]:
+        pid = os.getpid()
+        events: list[dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+             "args": {"name": name}}
+            for tid, name in self._threads.items()
+        ]
+        for s in list(self.spans):
+            events.append({
+                "name": s.name,
+                "cat": s.cat,
+                "ph": "X",
+                "ts": round((s.start - self._origin) * 1e6, 1),
+                "dur": round(s.duration * 1e6, 1),
+                "pid": pid,
+                "tid": s.tid,
+                "args": {k: v if isinstance(v, (int, float, bool, str)) or v is None else str(v)
+                         for k, v in s.args.items()},
+            })
+        return events
+
+    def write_chrome(self, path: str | Path) -> None:
+        path = Path(path).expanduser()
+        path.write_text(
+            json.dumps({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}),
+            encoding="utf-8",
+        )
+        logging.info("✅  Trace written to %s (open in ui.perfetto.dev).", path)
+
+
+TRACER = Tracer()
+span = TRACER.span
+run_subprocess = TRACER.run_subprocess
+system = TRACER.system
@@ -5,52 +5,145 @@ Lightweight helper functions that several modules share.
 
 from __future__ import annotations
 
+import hashlib
 import json
-from typing import Any
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterator, Optional
 
 from .constants import JSON_INDENT
 
+_WRITE_BUFFER = 1 << 20  # bytes per write() syscall when streaming JSON
+
+def _scalar(o: Any, ensure_ascii: bool) -> str:
+    if type(o) is int:
+        return int.__repr__(o)
+    return json.dumps(o, ensure_ascii=ensure_ascii)
+
+
+def _is_scalar(o: Any) -> bool:
+    return not isinstance(o, (dict, list))
+
+
+def iter_json(
+    obj: Any,
+    *,
+    multiline: bool = False,
+    indent: int = JSON_INDENT,
+    ensure_ascii: bool = False,
+    inline_arrays: bool = False,
+) -> Iterator[str]:
+    """
+    Serialise *obj* as a stream of string chunks (see `pretty_compact_json`
+    for the layouts).  With *inline_arrays* the multiline layout keeps lists
+    of scalars (trims, offsets, …) on a single line.
+    """
+    if not multiline:
+        # single-line: remove the blank after ',' and ':'
+        encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=ensure_ascii)
+        yield from encoder.iterencode(obj)
+        return
+
+    def _dump(o: Any, level: int) -> Iterator[str]:
+        if not isinstance(o, (dict, list)):
+            yield _scalar(o, ensure_ascii)
+            return
+        pad = " " * ((level + 1) * indent)
+        close = "\n" + " " * (level * indent) + ("}" if isinstance(o, dict) else "]")
+        if not o:
+            yield ("{" if isinstance(o, dict) else "[") + "\n" + close
+            return
+        if isinstance(o, list) and all(map(_is_scalar, o)):
+            # leaf array: one chunk instead of one recursion per element
+            items = [_scalar(v, ensure_ascii) for v in o]
+            if inline_arrays:
+                yield "[" + ", ".join(items) + "]"
+            else:
+                yield "[\n" + pad + (",\n" + pad).join(items) + close
+            return
+
+        yield "{\n" if isinstance(o, dict) else "[\n"
+        items = o.items() if isinstance(o, dict) else enumerate(o)
+        for i, (k, v) in enumerate(items):
+            if i:
+                yield ",\n"
+            yield f'{pad}"{k}": ' if isinstance(o, dict) else pad
+            yield from _dump(v, level + 1)
+        yield close
+
+    yield from _dump(obj, 0)
+
+
 def pretty_compact_json(
     obj: Any,
     *,
     multiline: bool = False,
     indent: int = 2,
+    ensure_ascii: bool = False,
 ) -> str:
     """
     Convert *obj* to JSON.
 
     Parameters
     ----------
-    obj        : any serialisable Python object
-    multiline  : True  → formatted with new-lines & indentation
-                 False → single line, minimal whitespace
-    indent     : number of spaces per indent level when multiline=True
+    obj          : any serialisable Python object
+    multiline    : True  → formatted with new-lines & indentation
+                   False → single line, minimal whitespace
+    indent       : number of spaces per indent level when multiline=True
+    ensure_ascii : escape non-ASCII characters
     """
-    if not multiline:
-        # single-line: remove the blank after ',' and ':'
-        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
-
-    # ---------- pretty version (what you had before) ----------
-    def _dump(o: Any, level: int) -> str:
-        spacing = " " * (level * indent)
-        if isinstance(o, dict):
-            parts = [
-                f'{spacing}{" " * indent}"{k}": {_dump(v, level + 1)}'
-                for k, v in o.items()
-            ]
-            return "{\n" + ",\n".join(parts) + f"\n{spacing}}}"
-        if isinstance(o, list):
-            parts = [_dump(v, level + 1) for v in o]
-            return (
-                "[\n"
-                + ",\n".join(
-                    f'{" " * ((level + 1) * indent)}{p}' for p in parts
-                )
-                + f"\n{spacing}]"
-            )
-        return json.dumps(o, ensure_ascii=False)
-
-    return _dump(obj, 0)
+    return "".join(
+        iter_json(obj, multiline=multiline, indent=indent, ensure_ascii=ensure_ascii)
+    )
+
+
+def write_json(
+    path: str | Path,
+    obj: Any,
+    *,
+    multiline: bool = False,
+    indent: int = JSON_INDENT,
+    ensure_ascii: bool = False,
+    inline_arrays: bool = False,
+) -> None:
+    """
+    Stream *obj* as JSON straight into *path*, without building the whole
+    document in memory.  Written to a temp file in the same directory and
+    renamed over *path*, so readers never see a half-written file.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "x", encoding="utf-8", buffering=_WRITE_BUFFER) as fh:
+            for chunk in iter_json(
+                obj,
+                multiline=multiline,
+                indent=indent,
+                ensure_ascii=ensure_ascii,
+                inline_arrays=inline_arrays,
+            ):
+                fh.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+
+
+def file_hash(path: str | Path) -> Optional[str]:
+    """sha256 of the bytes of *path*, or None if it cannot be read."""
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def json_key(value: Any) -> str:
+    """sha256 of the canonical JSON of *value* (sorted keys, compact)."""
+    blob = json.dumps(value, sort_keys=True, separators=(",", ":"),
+                      ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
 
 
 def bitmask(channels: list[int], *, width: int = 40) -> int:
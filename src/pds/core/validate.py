@@ -0,0 +1,376 @@
+"""
+Fail-fast validation of conf.json + details.json before any hardware step.
+
+The field schemas below are compiled once, at import, into a flat list of
+check functions.  `validate` then checks the conf, the details file, the
+effective details of the run (mode-specific xcorr thresholds and the conf
+bias / attenuators applied, every device compiled and rendered in all four
+configurations) and every scan point (`SSPConf`, correlation threshold),
+and reports all problems together in one `ValidationError`.
+
+It runs at the start of `run.main` and as `pds-run validate`.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from .adaptive import BiasRefiner, CoarseToFine, build_metric, is_adaptive
+from .channels import ChannelBatch
+from .constants import CONFIGURATIONS
+from .devices import apply_channel_settings, apply_mode_xcorr, device_vectors
+from .scan import ScanPoint, expand_points
+from .seed import compile_device, get_channel_ids, render_device
+from .ssp import ssp_conf
+from .store import parse_size
+
+MODES = ("cosmics", "noise", "calibration", "thrscan", "threshold")
+
+# Modes that skip DTS alignment (see run.DTSButler)
+_NO_ALIGN_MODES = ("cosmics", "thrscan", "threshold")
+
+# Bit widths of the packed self_trigger_xcorr word (seed.pack_xcorr)
+_MAX_CORRELATION = 0x0FFFFFFF
+_MAX_DISCRIMINATION = 0x3FFF
+
+
+class ValidationError(ValueError):
+    """All problems found in one validation pass."""
+
+    def __init__(self, problems: list[str]) -> None:
+        self.problems = problems
+        super().__init__(
+            f"{len(problems)} problem(s) in the run configuration:\n  - "
+            + "\n  - ".join(problems)
+        )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Schemas
+# ──────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True, slots=True)
+class Field:
+    path: str                       # dotted path inside the document
+    types: tuple[type, ...]
+    required: bool = True
+    choices: tuple[Any, ...] = ()
+    minimum: Optional[float] = None
+
+
+_NUM = (int, float)
+
+CONF_SCHEMA: tuple[Field, ...] = (
+    Field("mode", (str,), choices=MODES),
+    Field("drunc_working_dir", (str,)),
+    Field("oks_file", (str,)),
+    Field("oks_session", (str,)),
+    Field("session_name", (str,)),
+    Field("daphne_details", (str,)),
+    Field("wait_time", _NUM, minimum=0),
+    Field("change_rate", _NUM, minimum=0),
+    Field("dts_align_cmd", (str,)),
+    Field("dts_faketrig_cmd_template", (str,)),
+    Field("dts_clear_fktrig_cmd", (str,)),
+    Field("hztrigger", _NUM, required=False, minimum=0),
+    Field("web_proxy_cmd", (str,), required=False),
+    Field("skip_proxy", (bool,), required=False),
+    Field("mask_values", (list,), required=False),
+    Field("min_bias", (int,), required=False, minimum=0),
+    Field("max_bias", (int,), required=False, minimum=0),
+    Field("step", (int,), required=False, minimum=1),
+    Field("min_corr", (int,), required=False, minimum=0),
+    Field("max_corr", (int,), required=False, minimum=0),
+    Field("corr_step", (int,), required=False, minimum=1),
+    Field("ssp_conf", (dict,), required=False),
+    Field("drunc_delay_s", _NUM, required=False, minimum=0),
+    Field("drunc_persistent", (bool,), required=False),
+    Field("drunc_reconf_policy", (str,), required=False, choices=("auto", "reboot", "scrap")),
+    Field("oks_backend", (str,), required=False, choices=("native", "add_daphne_conf")),
+    Field("ssp_backend", (str,), required=False, choices=("native", "set_ssp_conf")),
+    Field("prepare_ahead", (int,), required=False, minimum=0),
+    Field("setup_parallel", (bool,), required=False),
+    Field("thrscan_fast_path", (bool,), required=False),
+    Field("thrscan_strategy", (str,), required=False, choices=("grid", "adaptive")),
+    Field("thrscan_metric", (dict,), required=False),
+    Field("thrscan_target", _NUM, required=False),
+    Field("corr_coarse_points", (int,), required=False, minimum=2),
+    Field("corr_resolution", (int,), required=False, minimum=1),
+    Field("calibration_strategy", (str,), required=False, choices=("grid", "adaptive")),
+    Field("calibration_metric", (dict,), required=False),
+    Field("calibration_target", _NUM, required=False),
+    Field("calibration_max_delta", _NUM, required=False, minimum=0),
+    Field("bias_coarse_step", (int,), required=False, minimum=1),
+    Field("bias_resolution", (int,), required=False, minimum=1),
+    Field("scan_order", (str,), required=False, choices=("naive", "optimized")),
+    Field("transition_costs", (dict,), required=False),
+    Field("transition_costs_trace", (str,), required=False),
+    Field("state_dir", (str,), required=False),
+    Field("state_max_age_s", _NUM, required=False, minimum=0),
+    Field("dts_align_cache", (bool,), required=False),
+    Field("artifact_store", (str,), required=False),
+    Field("artifact_store_max_bytes", (int, str), required=False),
+    Field("readiness", (list, dict), required=False),
+)
+
+DETAILS_SCHEMA: tuple[Field, ...] = (
+    Field("common_conf", (dict,)),
+    Field("common_conf.offset_gain", _NUM),
+    Field("common_conf.bias_ctrl", (int,), minimum=0),
+    *(Field(f"common_conf.{key}", (int,)) for key in (
+        "resolution", "output_format", "SB_first", "lpf_cut_frequency",
+        "pga_integrator_disable", "pga_gain", "clamp",
+        "lna_integrator_disable", "lna_gain",
+    )),
+    Field("devices", (list,)),
+)
+
+DEVICE_SCHEMA: tuple[Field, ...] = (
+    Field("ip", (str,)),
+    Field("slot_id", (int,), minimum=0),
+    Field("channels", (dict,)),
+    Field("channels.attenuators", (list,), required=False),
+    Field("channels.bias", (list,), required=False),
+    Field("channels.offsets", (list,), required=False),
+    Field("channels.trim", (list,), required=False),
+    Field("self_trigger", (dict,), required=False),
+    Field("self_trigger.threshold", (int,), required=False, minimum=0),
+    Field("self_trigger.self_trigger_xcorr.discrimination_threshold", (int,),
+          required=False, minimum=0),
+)
+
+Check = Callable[[dict[str, Any]], Optional[str]]
+_MISSING = object()
+
+
+def _get(doc: Any, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+def _compile_field(f: Field) -> Check:
+    names = "/".join(t.__name__ for t in f.types)
+
+    def check(doc: dict[str, Any]) -> Optional[str]:
+        value = _get(doc, f.path)
+        if value is _MISSING:
+            return f"missing '{f.path}'" if f.required else None
+        if not isinstance(value, f.types) or (isinstance(value, bool) and bool not in f.types):
+            return f"'{f.path}' must be {names}, got {value!r}"
+        if f.choices and value not in f.choices:
+            return f"'{f.path}' must be one of {', '.join(map(str, f.choices))}, got {value!r}"
+        if f.minimum is not None and value < f.minimum:
+            return f"'{f.path}' must be >= {f.minimum}, got {value!r}"
+        return None
+
+    return check
+
+
+def compile_schema(schema: tuple[Field, ...]) -> list[Check]:
+    return [_compile_field(f) for f in schema]
+
+
+CONF_CHECKS = compile_schema(CONF_SCHEMA)
+DETAILS_CHECKS = compile_schema(DETAILS_SCHEMA)
+DEVICE_CHECKS = compile_schema(DEVICE_SCHEMA)
+
+
+def _run(checks: list[Check], doc: dict[str, Any], where: str) -> Iterator[str]:
+    for check in checks:
+        problem = check(doc)
+        if problem:
+            yield f"{where}: {problem}"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Checks
+# ──────────────────────────────────────────────────────────────────────────────
+def _check_conf(cfg: dict[str, Any]) -> Iterator[str]:
+    yield from _run(CONF_CHECKS, cfg, "conf")
+    mode = cfg.get("mode")
+    if mode not in _NO_ALIGN_MODES and "hztrigger" not in cfg:
+        yield f"conf: mode '{mode}' runs the DTS fake trigger and needs 'hztrigger'"
+    if not cfg.get("skip_proxy", False) and "web_proxy_cmd" not in cfg:
+        yield "conf: missing 'web_proxy_cmd' (or set \"skip_proxy\": true)"
+    masks = cfg.get("mask_values", [1])
+    if isinstance(masks, list) and (not masks or not all(
+        isinstance(m, int) and not isinstance(m, bool) for m in masks
+    )):
+        yield f"conf: 'mask_values' must be a non-empty list of integers, got {masks!r}"
+    if "artifact_store_max_bytes" in cfg:
+        try:
+            parse_size(cfg["artifact_store_max_bytes"])
+        except (TypeError, ValueError) as err:
+            yield f"conf: artifact_store_max_bytes: {err}"
+    if is_adaptive(cfg):
+        search = BiasRefiner if mode == "calibration" else CoarseToFine
+        try:
+            search.from_config(cfg)
+            build_metric(cfg)
+        except (TypeError, ValueError) as err:
+            yield f"conf: adaptive {mode}: {err}"
+
+
+def _check_points(cfg: dict[str, Any], points: list[ScanPoint]) -> Iterator[str]:
+    """
+    Every point's `SSPConf` and correlation threshold.  Points only vary in
+    mask, LED bias and threshold, so each distinct value is checked once.
+    """
+    if not points:
+        yield "scan: the conf expands to no scan point"
+        return
+    base = ssp_conf(cfg, channel_mask=points[0].channel_mask,
+                    pulse_bias_percent_270nm=points[0].pulse_bias_percent_270nm)
+    base_problems = base.problems()
+    for problem in base_problems:
+        yield f"ssp_conf: {problem}"
+
+    seen: dict[str, list[str]] = {}
+    by_value: dict[tuple[str, Any], list[str]] = {}
+    for p in points:
+        by_value.setdefault(("channel_mask", p.channel_mask), []).append(p.key)
+        by_value.setdefault(("pulse_bias_percent_270nm", p.pulse_bias_percent_270nm), []).append(p.key)
+        corr = p.correlation_threshold
+        if corr is not None and not 0 <= corr <= _MAX_CORRELATION:
+            seen.setdefault(
+                f"correlation_threshold {corr} outside 0..{_MAX_CORRELATION}", []
+            ).append(p.key)
+    for (name, value), keys in by_value.items():
+        for problem in replace(base, **{name: value}).problems():
+            if problem not in base_problems:
+                seen.setdefault(problem, []).extend(keys)
+    for problem, keys in seen.items():
+        more = f" (+{len(keys) - 1} more point(s))" if len(keys) > 1 else ""
+        yield f"scan point {keys[0]}{more}: {problem}"
+
+
+def _check_details(cfg: dict[str, Any], data: dict[str, Any]) -> Iterator[str]:
+    problems = list(_run(DETAILS_CHECKS, data, "details"))
+    devices = data.get("devices")
+    if not isinstance(devices, list):
+        yield from problems
+        return
+    if not devices:
+        problems.append("details: no devices")
+    for i, dev in enumerate(devices):
+        where = f"details device {dev.get('ip', i) if isinstance(dev, dict) else i}"
+        if not isinstance(dev, dict):
+            problems.append(f"{where}: must be an object")
+            continue
+        problems.extend(_run(DEVICE_CHECKS, dev, where))
+    if problems:  # the structure is wrong; compiling would only repeat it
+        yield from problems
+        return
+
+    # effective details of this run, as set_daphne_conf will build them
+    data = copy.deepcopy(data)
+    mode = cfg.get("mode")
+    apply_mode_xcorr(data, mode)
+    vector_problems = []
+    for key in ("bias", "attenuators"):
+        if key == "bias" and mode == "noise" and key not in cfg:
+            continue  # bias is forced to 0 anyway
+        if key not in cfg:
+            vector_problems.append(f"conf: missing '{key}'")
+            continue
+        try:
+            device_vectors(devices, cfg[key], what=key)
+        except ValueError as err:
+            vector_problems.append(f"conf: {err}")
+    if vector_problems:
+        yield from vector_problems
+        return
+    apply_channel_settings(data, cfg, mode)
+
+    devices = data["devices"]
+    try:
+        batch = ChannelBatch(
+            [get_channel_ids(dev) for dev in devices],
+            [dev["channels"].get("trim", []) for dev in devices],
+            [dev["channels"].get("attenuators", []) for dev in devices],
+        )
+    except (TypeError, ValueError) as err:
+        yield f"details: channel tables: {err}"
+        return
+    for i, dev in enumerate(devices):
+        where = f"details device {dev['ip']}"
+        try:
+            compiled = compile_device(dev, data["common_conf"], batch.row(i))
+        except KeyError as err:
+            yield f"{where}: channel in AFE {err.args[0]}, outside the board"
+            continue
+        except ValueError as err:
+            yield f"{where}: {err}"
+            continue
+        for name in CONFIGURATIONS:
+            try:
+                render_device(compiled, name)
+            except ValueError as err:
+                yield f"{where}, {name}: {err}"
+
+        disc = _get(dev, "self_trigger.self_trigger_xcorr.discrimination_threshold")
+        if disc is not _MISSING and disc > _MAX_DISCRIMINATION:
+            yield f"{where}: discrimination_threshold {disc} exceeds {_MAX_DISCRIMINATION}"
+
+
+def details_path(conf_path: Path, cfg: dict[str, Any]) -> Path:
+    """Where run.main reads the details file from (next to the conf)."""
+    return conf_path.parent / Path(cfg["daphne_details"]).name
+
+
+def collect_problems(
+    cfg: dict[str, Any],
+    conf_path: Path,
+    *,
+    check_paths: bool = True,
+) -> list[str]:
+    """Every problem with *cfg*, its details file and its expanded scan."""
+    problems = list(_check_conf(cfg))
+    if cfg.get("mode") not in MODES:
+        return problems  # everything below depends on the mode
+
+    try:
+        points = expand_points(cfg)
+    except (TypeError, ValueError) as err:
+        return problems + [f"scan: cannot expand the scan points: {err}"]
+    problems.extend(_check_points(cfg, points))
+
+    if check_paths and isinstance(cfg.get("drunc_working_dir"), str):
+        wd = Path(cfg["drunc_working_dir"])
+        if not wd.is_dir():
+            problems.append(f"conf: drunc_working_dir {wd} does not exist")
+        elif isinstance(cfg.get("oks_file"), str) and not (wd / cfg["oks_file"]).is_file():
+            problems.append(f"conf: oks_file {wd / cfg['oks_file']} does not exist")
+
+    if not isinstance(cfg.get("daphne_details"), str):
+        return problems
+    details = details_path(conf_path, cfg)
+    try:
+        data = json.loads(details.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        if check_paths:
+            problems.append(f"details: {details} does not exist")
+        return problems
+    except (OSError, ValueError) as err:
+        return problems + [f"details: cannot read {details}: {err}"]
+    if not isinstance(data, dict):
+        return problems + [f"details: {details} is not a JSON object"]
+    problems.extend(_check_details(cfg, data))
+    return problems
+
+
+def validate(cfg: dict[str, Any], conf_path: Path, *, check_paths: bool = True) -> None:
+    """Raise ValidationError listing every problem; log the check time otherwise."""
+    t0 = time.perf_counter()
+    problems = collect_problems(cfg, conf_path, check_paths=check_paths)
+    if problems:
+        raise ValidationError(problems)
+    logging.info("✅  conf + details valid (%.1f ms).", (time.perf_counter() - t0) * 1e3)
@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+import pytest
+
+NP02 = Path(__file__).resolve().parent.parent / "configs" / "np02"
+
+SEGMENT = """<?xml version="1.0" encoding="ASCII"?>
+
+<!-- oks-data version 2.2 -->
+
+
+<!DOCTYPE oks-data [
+  <!ELEMENT oks-data (info, (include)?, (comments)?, (obj)+)>
+]>
+
+<oks-data>
+
+<info name="" type="" num-of-items="2" oks-format="data" oks-version="862"/>
+
+<obj class="DaphneConf" id="np02_daphne_selftrigger">
+ <attr name="json_file" type="string" val="{&quot;old&quot;:1}"/>
+ <attr name="keep_me" type="u32" val="7"/>
+</obj>
+
+<obj class="SSPConf" id="np02-ssp-on">
+ <attr name="channel_mask" type="u32" val="4"/>
+</obj>
+
+</oks-data>
+"""
+
+
+@pytest.fixture
+def segment():
+    """A small OKS segment: one DaphneConf and an SSPConf with one attribute."""
+    return SEGMENT
+
+
+@pytest.fixture
+def ssp_segment(segment):
+    """`segment` with every attribute of `SSPConf` present (all 0)."""
+    from pds.core.ssp import SSPConf
+
+    return segment.replace(
+        '<attr name="channel_mask" type="u32" val="4"/>',
+        "\n ".join(f'<attr name="{k}" type="u32" val="0"/>' for k in SSPConf().attrs()),
+    )
+
+
+@pytest.fixture
+def make_context(tmp_path, segment):
+    """Build (cfg, RunContext) on the NP02 conf / details and `segment`."""
+    from pds.core.context import RunContext
+
+    def _context(**overrides):
+        cfg = json.loads((NP02 / "conf.json").read_text())
+        cfg.update(drunc_working_dir=str(tmp_path), oks_file="segment.data.xml",
+                   mode="cosmics")
+        cfg.update(overrides)
+        (tmp_path / "segment.data.xml").write_text(segment)
+        workspace = tmp_path / "ws"
+        workspace.mkdir()
+        return cfg, RunContext.load(cfg, NP02 / "details.json", workspace)
+
+    return _context
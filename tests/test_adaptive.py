@@ -0,0 +1,64 @@
+from pds.core.adaptive import (
+    BiasRefiner,
+    CoarseToFine,
+    FileMetric,
+    SyntheticCharge,
+    SyntheticRate,
+    build_metric,
+)
+from pds.core.scan import ScanJournal, ScanPoint, expand_points
+
+
+def _search(search, metric, mask=1):
+    while (x := search.next()) is not None:
+        point = (ScanPoint(0, mask, x) if isinstance(search, BiasRefiner)
+                 else ScanPoint(0, mask, 0, x))
+        search.record(x, metric(point))
+    return search
+
+
+def test_coarse_to_fine_finds_knee_in_few_points():
+    cfg = {"mode": "thrscan", "min_corr": 300, "max_corr": 100000, "corr_step": 5000,
+           "corr_resolution": 500}
+    search = _search(CoarseToFine.from_config(cfg), SyntheticRate(knee=42000, width=1500))
+    a, b = search.bracket
+    assert b - a <= 500 and a - 1500 <= 42000 <= b + 1500
+    assert len(search.values) <= len(search.coarse) + search.max_refinements()
+    # a grid at the same resolution takes ~200 points, the 5000-step one 21
+    assert len(search.values) <= 11 < len(expand_points(cfg))
+
+    # target crossing instead of the steepest change
+    rate = SyntheticRate(knee=42000, width=8000)
+    search = _search(CoarseToFine(300, 100000, resolution=100, target=100.0), rate)
+    a, b = search.bracket
+    assert search.values[a] >= 100.0 >= search.values[b] and b - a <= 100
+
+
+def test_bias_refiner_dense_only_on_the_slope():
+    cfg = {"mode": "calibration", "min_bias": 3000, "max_bias": 4095, "step": 5,
+           "bias_coarse_step": 100, "calibration_max_delta": 50.0}
+    charge = SyntheticCharge(knee=3500, width=20)
+    search = _search(BiasRefiner.from_config(cfg), charge)
+    biases = sorted(search.values)
+    steps = {b - a for a, b in zip(biases, biases[1:])}
+    assert min(steps) <= 5 and max(steps) >= 95  # fine on the slope, coarse elsewhere
+    assert len(biases) < len(range(3000, 4096, 5)) / 4
+    dense = [a for a, b in zip(biases, biases[1:]) if b - a <= 25]
+    assert all(3350 < b < 3650 for b in dense)
+
+    # target: the grid above the first bias over 900 is not taken
+    search = _search(BiasRefiner.from_config({**cfg, "calibration_target": 900.0}), charge)
+    assert 3500 < search.reached < 3700 and max(search.values) <= 3700
+
+
+def test_metric_sources_and_resume(tmp_path):
+    (tmp_path / "rate_5000.txt").write_text("rate=12.5 Hz\nrate=17.25 Hz\n")
+    metric = build_metric({"mode": "thrscan", "thrscan_metric": {
+        "type": "file", "path": str(tmp_path / "rate_{corr}.txt"), "pattern": r"rate=([\d.]+)"}})
+    assert isinstance(metric, FileMetric) and metric(ScanPoint(0, 8, 0, 5000)) == 17.25
+
+    path = tmp_path / "journal.jsonl"
+    journal = ScanJournal(path, "sig")
+    journal.start(3)
+    journal.done(ScanPoint(0, 8, 0, 5000), 1.0, metric=17.25)
+    assert ScanJournal(path, "sig", resume=True).metrics == {"mask=8,bias=0,corr=5000": 17.25}
@@ -0,0 +1,13 @@
+import pytest
+
+run = pytest.importorskip("benchmarks.run")
+
+
+def test_suite_smoke_and_regression_check():
+    results = run.run_suite(["1-board"], repeat=1)
+    assert "1-board/oks_update" in results["results"]
+    assert run.compare(results, results, threshold=0.25, min_delta_s=0) == []
+
+    slower = {"results": {k: {"median_s": v["median_s"] / 2} for k, v in results["results"].items()}}
+    regressed = run.compare(results, slower, threshold=0.25, min_delta_s=0)
+    assert len(regressed) == len(results["results"])
@@ -1,22 +1,44 @@
 import subprocess
-import os
 import json
 
+import pytest
+
 # Setup: create example conf file for testing
-def setup_module(module):
-    os.makedirs("tests", exist_ok=True)
+@pytest.fixture(scope="module")
+def example_conf(tmp_path_factory):
+    path = tmp_path_factory.mktemp("cli") / "example_conf.json"
     example_conf = {
         "example_key": "example_value"
     }
-    with open("tests/example_conf.json", "w") as f:
+    with open(path, "w") as f:
         json.dump(example_conf, f)
+    return path
 
 def test_pds_run_help():
     result = subprocess.run(["pds-run", "--help"], capture_output=True, text=True)
     assert result.returncode == 0
     assert "Usage:" in result.stdout
 
-def test_pds_run_verbose():
-    result = subprocess.run(["pds-run", "run", "--mode", "cosmics", "--conf", "tests/example_conf.json", "--verbose"], capture_output=True, text=True)
+def test_pds_run_verbose(example_conf):
+    result = subprocess.run(["pds-run", "run", "--mode", "cosmics", "--conf", str(example_conf), "--verbose"], capture_output=True, text=True)
     assert result.returncode == 0
     assert "DEBUG" in result.stdout
+
+# `pds-run --help` / completion budget: Typer plus the CLI module itself
+CLI_IMPORT_BUDGET_S = 0.5
+HEAVY_MODULES = ("pds.core.run", "pds.core.seed", "pds.core.set_daphne_conf",
+                 "numpy", "xml.etree", "concurrent.futures", "tempfile")
+
+def test_cli_import_is_lazy_and_within_budget():
+    import sys
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import pds.cli"],
+                            capture_output=True, text=True, check=True)
+    imported = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                imported[name.strip()] = int(cumulative) / 1e6
+    assert not [m for m in imported if m.startswith(HEAVY_MODULES)]
+    assert imported["pds.cli"] < CLI_IMPORT_BUDGET_S
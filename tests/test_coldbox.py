@@ -0,0 +1,42 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pds.core.coldbox import convert_coldbox, import_coldbox
+from pds.core.constants import CONFIGURATIONS
+from pds.core.seed import generate_seeds
+
+SOURCE = Path(__file__).resolve().parent.parent / "configs" / "vd_coldbox" / "Configuration_CB_20241209.json"
+
+
+def test_import_coldbox_feeds_seeds_and_is_cached(tmp_path):
+    src = tmp_path / SOURCE.name
+    shutil.copy(SOURCE, src)
+
+    details, converted = import_coldbox(src)
+    assert converted and details == tmp_path / "Configuration_CB_20241209.details.json"
+    data = json.loads(details.read_text())
+    dev = data["devices"][0]
+    assert (dev["ip"], dev["slot_id"]) == ("10.73.137.106", 6)
+    assert dev["channels"]["indices"][:4] == [0, 1, 2, 3]
+    assert dev["channels"]["offsets"] == [2250] * 16
+    assert dev["channels"]["attenuators"] == [2000] * 5
+    assert data["common_conf"]["lpf_cut_frequency"] == 0
+
+    assert generate_seeds(details) == {cfg: True for cfg in CONFIGURATIONS}
+    for cfg in CONFIGURATIONS:
+        seed = tmp_path / f"{cfg}.json"
+        assert seed.is_file() and seed.stat().st_size > 0
+
+    mtime = details.stat().st_mtime_ns
+    assert import_coldbox(src) == (details, False)
+    assert details.stat().st_mtime_ns == mtime
+
+
+def test_conflicting_afe_settings_are_rejected():
+    source = json.loads(SOURCE.read_text())
+    source["10.73.137.106"]["afe"]["lnas"][2]["gain"] = 1
+    with pytest.raises(ValueError, match="'lna_gain' differs"):
+        convert_coldbox(source)
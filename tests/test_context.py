@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from pds.core.constants import CONFIGURATIONS
+from pds.core.devices import apply_channel_settings, apply_mode_xcorr
+from pds.core.seed import generate_configuration
+from pds.core.set_daphne_conf import configure
+
+NP02 = Path(__file__).resolve().parent.parent / "configs" / "np02"
+
+
+def test_configure_in_memory(tmp_path, make_context):
+    cfg, ctx = make_context()
+    xml = tmp_path / "segment.data.xml"
+
+    configure(ctx)
+    expected = json.loads((NP02 / "details.json").read_text())
+    apply_mode_xcorr(expected, "cosmics")
+    apply_channel_settings(expected, cfg, "cosmics")
+    assert ctx.seeds == {name: generate_configuration(expected, name)
+                         for name in CONFIGURATIONS}
+    assert list(ctx.workspace.iterdir()) == []  # native backend: nothing on disk
+    assert "np02_daphne_full_mode" in xml.read_text()
+
+    # unchanged details: no re-render, no rewrite of the segment
+    mtime = xml.stat().st_mtime_ns
+    assert not ctx.render_seeds()
+    configure(ctx)
+    assert xml.stat().st_mtime_ns == mtime
+
+    ctx.set_correlation_threshold(6000)
+    assert ctx.render_seeds()
+
+
+def test_configure_add_daphne_conf_writes_seeds(monkeypatch, make_context):
+    _, ctx = make_context(oks_backend="add_daphne_conf")
+    calls = []
+    monkeypatch.setattr("pds.core.set_daphne_conf.update_xml_add_daphne_conf",
+                        lambda xml, paths: calls.append(paths))
+
+    configure(ctx)
+    assert calls == [ctx.seed_paths()]
+    for name, path in ctx.seed_paths().items():
+        assert path.read_text() == ctx.seed_texts[name]
@@ -0,0 +1,38 @@
+import pytest
+
+from pds.core.devices import apply_channel_settings
+
+
+def _data():
+    return {"devices": [
+        {"ip": f"10.73.137.{100 + i}", "slot_id": i, "channels": {"bias": [1] * 5, "attenuators": [2] * 5}}
+        for i in range(3)
+    ]}
+
+
+def test_per_device_vectors_by_ip_slot_and_default():
+    data = _data()
+    conf = {"bias": {"10.73.137.100": "800,800,1200,1200,1200", "2": [5, 5, 5, 5, 5]},
+            "attenuators": {"*": "1996,1996,1996,1996,1996"}}
+    assert apply_channel_settings(data, conf, "calibration") == [d["ip"] for d in data["devices"]]
+    biases = [d["channels"]["bias"] for d in data["devices"]]
+    assert biases == [[800, 800, 1200, 1200, 1200], [1] * 5, [5] * 5]
+    assert all(d["channels"]["attenuators"] == [1996] * 5 for d in data["devices"])
+
+    # historic single vector → first device only; noise zeroes its bias
+    data = _data()
+    apply_channel_settings(data, {"bias": "9,9,9,9,9", "attenuators": "3,3,3,3,3"}, "noise")
+    assert data["devices"][0]["channels"] == {"bias": [0] * 5, "attenuators": [3] * 5}
+    assert data["devices"][1]["channels"]["bias"] == [1] * 5
+
+
+@pytest.mark.parametrize("conf, message", [
+    ({"bias": {"10.0.0.1": "1,2,3,4,5"}, "attenuators": "1,2,3,4,5"}, "no device"),
+    ({"bias": {"0": "1,2,3,4,5"}, "attenuators": "1,2,3,4"}, "exactly 5"),
+    ({"bias": {"0": "1,2,x,4,5"}, "attenuators": "1,2,3,4,5"}, "not a list of integers"),
+])
+def test_invalid_vectors_change_nothing(conf, message):
+    data = _data()
+    with pytest.raises(ValueError, match=message):
+        apply_channel_settings(data, conf, "calibration")
+    assert data == _data()
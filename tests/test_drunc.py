@@ -0,0 +1,119 @@
+import os
+import stat
+import sys
+
+from pds.core.drunc import DruncSession, generate_drunc_command
+
+FAKE_SHELL = """#!{python}
+import sys
+log = open({log!r}, "a")
+while True:
+    sys.stdout.write("drunc-unified-shell > ")
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line or line.strip() == "exit":
+        break
+    log.write(line)
+    log.flush()
+"""
+
+
+def _cfg(tmp_path):
+    oks = tmp_path / "segment.data.xml"
+    oks.write_text("<oks-data/>")
+    return {
+        "oks_session": "session.data.xml",
+        "session_name": "np02-session",
+        "oks_file": oks.name,
+        "drunc_working_dir": str(tmp_path),
+        "change_rate": 20.0,
+        "wait_time": 1,
+        "drunc_delay_s": 0,
+    }
+
+
+def test_one_shot_command_unchanged(tmp_path):
+    cmd = generate_drunc_command(_cfg(tmp_path))
+    assert cmd.endswith(
+        "np02-pds boot conf start enable-triggers change-rate --trigger-rate 20.0 "
+        "wait 1 disable-triggers drain-dataflow stop-trigger-sources stop scrap terminate"
+    )
+
+
+def test_persistent_session_boots_once(tmp_path, monkeypatch):
+    log = tmp_path / "commands.log"
+    shell = tmp_path / "drunc-unified-shell"
+    shell.write_text(FAKE_SHELL.format(python=sys.executable, log=str(log)))
+    shell.chmod(shell.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    cfg = _cfg(tmp_path)
+    with DruncSession(cfg) as session:
+        session.acquire()
+        session.acquire()
+        (tmp_path / cfg["oks_file"]).write_text("<oks-data><obj/></oks-data>")
+        cfg["drunc_reconf_policy"] = "scrap"
+        session.policy = "scrap"
+        session.acquire()
+
+    commands = [line.strip() for line in log.read_text().splitlines()]
+    assert commands.count("boot") == 1
+    assert commands.count("start") == 3
+    assert commands.count("conf") == 2
+    assert commands[-2:] == ["scrap", "terminate"]
+    assert session.reconfs == 1
+
+
+def test_calibration_scan_reconfigures_without_rebooting(tmp_path, monkeypatch, ssp_segment):
+    from pds.core import run
+
+    log = tmp_path / "commands.log"
+    shell = tmp_path / "drunc-unified-shell"
+    shell.write_text(FAKE_SHELL.format(python=sys.executable, log=str(log)))
+    shell.chmod(shell.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    cfg = _cfg(tmp_path)
+    xml = tmp_path / cfg["oks_file"]
+    xml.write_text(ssp_segment)
+    cfg.update(mode="calibration", drunc_persistent=True, ssp_backend="native",
+               mask_values=[1, 2], min_bias=3700, max_bias=3800, step=50)
+    sessions = []
+
+    def open_session(cfg):
+        sessions.append(DruncSession(cfg))
+        return sessions[-1]
+
+    monkeypatch.setattr(run, "open_session", open_session)
+    scan = run.ScanMaskIntensity(cfg)
+    scan.run()
+    commands = [line.strip() for line in log.read_text().splitlines()]
+    assert len(scan.points) == 6 and commands.count("start") == 6
+    assert sessions[0].boots == 1 < len(scan.points)  # only SSPConf changed: scrap + conf
+    assert sessions[0].reconfs == commands.count("scrap") - 1 == 5
+
+    # any other edit of the segment reboots the session
+    with DruncSession(cfg) as session:
+        session.acquire()
+        xml.write_text(xml.read_text().replace('oks-version="862"', 'oks-version="863"'))
+        session.acquire()
+    assert session.boots == 2
+
+
+def test_readiness_returns_early(tmp_path):
+    from pds.core.readiness import FileCleared, PortClosed, WAITS, wait_until_ready
+
+    lock = tmp_path / "session.lock"
+    elapsed = wait_until_ready([FileCleared(str(lock)), PortClosed(1)], timeout_s=5)
+    assert elapsed < 1
+    assert WAITS.waits[-1] == elapsed
+
+    lock.write_text("busy")
+    elapsed = wait_until_ready([FileCleared(str(lock))], timeout_s=0.2, interval_s=0.05)
+    assert elapsed >= 0.2
+    assert WAITS.timeouts >= 1
+
+    # a plain sleep (no probes) is not a probe hitting the upper bound
+    timeouts, sleeps = WAITS.timeouts, WAITS.sleeps
+    wait_until_ready([], timeout_s=0.01)
+    assert (WAITS.timeouts, WAITS.sleeps) == (timeouts, sleeps + 1)
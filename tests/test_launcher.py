@@ -0,0 +1,46 @@
+import threading
+import time
+
+import pytest
+
+from pds.core.launcher import Step, run_steps
+from pds.core.trace import TRACER
+
+
+def test_independent_steps_overlap_and_dependencies_wait():
+    barrier = threading.Barrier(2, timeout=5)  # deadlocks unless a and b overlap
+    order = []
+
+    def mark(name):
+        def fn():
+            if name in "ab":
+                barrier.wait()
+            order.append(name)
+            return name
+        return fn
+
+    TRACER.reset()
+    results = run_steps([Step("a", mark("a")), Step("b", mark("b")),
+                         Step("c", mark("c"), after=("a", "b"))])
+    assert results == {"a": "a", "b": "b", "c": "c"}
+    assert order[-1] == "c"
+    assert sorted(s.name for s in TRACER.spans) == ["setup:a", "setup:b", "setup:c"]
+
+
+def test_failure_stops_dependents_and_reraises():
+    ran = []
+
+    def boom():
+        raise RuntimeError("dts down")
+
+    def slow():
+        time.sleep(0.05)
+        ran.append("proxy")
+
+    with pytest.raises(RuntimeError, match="dts down"):
+        run_steps([Step("dts", boom), Step("proxy", slow),
+                   Step("ssp", lambda: ran.append("ssp"), after=("dts", "proxy"))])
+    assert "ssp" not in ran  # dependent of the failed step never started
+
+    with pytest.raises(ValueError, match="Cycle"):
+        run_steps([Step("x", print, after=("y",)), Step("y", print, after=("x",))])
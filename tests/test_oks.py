@@ -0,0 +1,58 @@
+import json
+import xml.etree.ElementTree as ET
+
+from pds.core.oks import update_daphne_confs
+
+
+def test_update_daphne_confs_single_pass(tmp_path, segment):
+    xml = tmp_path / "np02-pds.data.xml"
+    xml.write_text(segment)
+    seeds = {
+        "np02_daphne_selftrigger": {"10.73.137.107": {"slot": 7, "name": "a \"q\" <b>"}},
+        "np02_daphne_full_mode": {"10.73.137.107": {"slot": 7, "full_stream_channels": [0, 7]}},
+    }
+
+    changed = update_daphne_confs(xml, seeds)
+    assert sorted(changed) == sorted(seeds)
+
+    text = xml.read_text()
+    assert text.startswith(segment[: segment.index("<oks-data>")])
+    assert 'num-of-items="3"' in text
+    assert '<attr name="keep_me" type="u32" val="7"/>' in text
+
+    root = ET.fromstring(text.split("]>", 1)[1])
+    for name, seed in seeds.items():
+        obj = root.find(f".//obj[@class='DaphneConf'][@id='{name}']")
+        attr = obj.find("attr[@name='json_file']")
+        assert json.loads(attr.get("val")) == seed
+
+    mtime = xml.stat().st_mtime_ns
+    assert update_daphne_confs(xml, seeds) == []
+    assert xml.stat().st_mtime_ns == mtime
+
+
+def test_ssp_writer_native_skip_and_fallback(tmp_path, monkeypatch, ssp_segment):
+    from pds.core.ssp import SSPConf, SSPWriter
+
+    xml = tmp_path / "np02-pds.data.xml"
+    xml.write_text(ssp_segment)
+    cfg = {"drunc_working_dir": str(tmp_path), "oks_file": xml.name}
+    calls = []
+    monkeypatch.setattr("pds.core.ssp.run_subprocess", lambda cmd, **kw: calls.append(cmd))
+
+    # the tool by default; skipped while the segment is the one it left
+    writer = SSPWriter(cfg)
+    conf = SSPConf(channel_mask=8, pulse_bias_percent_270nm=3700)
+    assert writer.apply(conf) and not writer.apply(conf)
+    assert len(calls) == 1 and calls[0][:2] == ["set_ssp_conf", str(xml)]
+    assert calls[0][calls[0].index("--channel-mask") + 1] == "8"
+    calls.clear()
+
+    writer = SSPWriter({**cfg, "ssp_backend": "native"})
+    assert writer.apply(conf)
+    assert '<attr name="pulse_bias_percent_270nm" type="u32" val="3700"/>' in xml.read_text()
+    assert not writer.apply(conf) and writer.skipped == 1 and calls == []
+
+    # object missing from the segment → set_ssp_conf for the rest of the run
+    assert writer.apply(SSPConf(object_name="other", channel_mask=8))
+    assert writer.backend == "set_ssp_conf" and calls[0][0] == "set_ssp_conf"
@@ -0,0 +1,53 @@
+import json
+
+from pds.core.ordering import TransitionCosts, order_points, path_cost
+from pds.core.scan import estimate_wall_time, expand_points
+
+CFG = {"mode": "calibration", "mask_values": [1, 2, 4], "min_bias": 3700,
+       "max_bias": 4060, "step": 50, "drunc_persistent": True}
+
+
+def test_optimized_order_visits_every_point_and_saves():
+    points = expand_points(CFG)
+    ordered, report = order_points({**CFG, "scan_order": "optimized"}, points)
+    assert sorted(ordered, key=lambda p: p.index) == points
+    assert ordered[0] == points[0]
+    assert report.applied and report.optimized < report.naive
+    assert "saves" in report.format()
+
+    # LED settling dominates: no long bias jump back to min_bias between masks
+    costs = TransitionCosts.from_config({**CFG, "transition_costs": {"led_settle_per_unit": 1}})
+    ordered, _ = order_points({**CFG, "scan_order": "optimized",
+                               "transition_costs": {"led_settle_per_unit": 1}}, points)
+    jumps = [abs(a.pulse_bias_percent_270nm - b.pulse_bias_percent_270nm)
+             for a, b in zip(ordered, ordered[1:])]
+    assert max(jumps) <= 50 and path_cost(ordered, costs) < path_cost(points, costs)
+
+    # naive order is kept unless asked for
+    assert order_points(CFG, points)[0] == points
+
+
+def test_costs_from_trace(tmp_path):
+    trace = tmp_path / "trace.json"
+    events = [{"name": n, "ph": "X", "ts": 0, "dur": d * 1e6} for n, d in (
+        ("ssp_native", 0.5), ("ssp_native", 1.5), ("update_xml", 0.2),
+        ("drunc terminate", 3), ("drunc boot", 20), ("drunc conf", 10),
+    )]
+    trace.write_text(json.dumps({"traceEvents": events}))
+    costs = TransitionCosts.from_config({**CFG, "transition_costs_trace": str(trace),
+                                         "drunc_reconf_policy": "reboot",
+                                         "transition_costs": {"seeds": 7}})
+    assert (costs.ssp, costs.seeds, costs.reconf) == (1.0, 7.0, 33.0)
+    assert TransitionCosts.from_config({"drunc_persistent": False}).reconf == 0.0
+
+
+def test_plan_estimate_counts_reconfigures():
+    points = expand_points(CFG)
+    costs = TransitionCosts.from_config(CFG)
+    once = estimate_wall_time(CFG, points[:1])
+    same = estimate_wall_time(CFG, points[:1] * 2) - once  # repeat: no reconf
+    # every calibration point changes the segment: one reconf per transition
+    assert estimate_wall_time(CFG, points) - once == (len(points) - 1) * (same + costs.reconf)
+    assert costs.reconfiguration(points) == (len(points) - 1) * costs.reconf
+    assert estimate_wall_time(CFG, points) < estimate_wall_time(
+        {**CFG, "drunc_persistent": False}, points)
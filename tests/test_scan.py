@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+
+from pds.core import run
+from pds.core.scan import ScanJournal, expand_points, format_plan, scan_signature
+
+CONF = Path(__file__).resolve().parent.parent / "configs" / "np02" / "conf.json"
+
+
+def test_expand_points_matches_nested_loops():
+    cfg = {"mode": "calibration", "mask_values": [1, 8],
+           "min_bias": 3700, "max_bias": 4060, "step": 50}
+    points = expand_points(cfg)
+    expected = [(m, b) for m in (1, 8) for b in range(3700, 4060 + 50, 50)]
+    assert [(p.channel_mask, p.pulse_bias_percent_270nm) for p in points] == expected
+    assert [p.index for p in points] == list(range(len(expected)))
+
+    cfg = {"mode": "thrscan", "min_corr": 300, "max_corr": 100000, "corr_step": 5000}
+    assert [p.correlation_threshold for p in expand_points(cfg)] == list(
+        range(300, 100000 + 5000, 5000)
+    )
+    assert expand_points({"mode": "cosmics"})[0].pulse_bias_percent_270nm == 0
+
+
+def test_journal_resume(tmp_path):
+    cfg = {"mode": "calibration", "mask_values": [1], "min_bias": 0, "max_bias": 100, "step": 50}
+    points = expand_points(cfg)
+    path = tmp_path / "conf.journal.jsonl"
+    sig = scan_signature(cfg)
+
+    journal = ScanJournal(path, sig)
+    journal.start(len(points))
+    journal.done(points[0], 1.0)
+    journal.failed(points[1], RuntimeError("boom"))
+
+    resumed = ScanJournal(path, sig, resume=True)
+    assert resumed.pending(points) == points[1:]
+    assert ScanJournal(path, "other-scan", resume=True).pending(points) == points
+
+    # a fresh (non-resumed) start forgets earlier progress
+    ScanJournal(path, sig).start(len(points))
+    assert ScanJournal(path, sig, resume=True).pending(points) == points
+
+
+def test_plan_touches_no_hardware(tmp_path, capsys):
+    cfg = json.loads(CONF.read_text())
+    cfg["journal_file"] = str(tmp_path / "journal.jsonl")
+    conf = tmp_path / "conf.json"
+    conf.write_text(json.dumps(cfg))
+
+    run.main("calibration", conf, plan=True)
+    out = capsys.readouterr().out
+    assert "9 point(s)" in out
+    assert "estimated wall time" in out
+    assert not (tmp_path / "journal.jsonl").exists()
+    assert "estimated wall time" in format_plan(cfg, [])
+
+    # resuming with --persistent-session is still the same scan
+    calibration = {**cfg, "mode": "calibration"}
+    journal = ScanJournal(tmp_path / "journal.jsonl", scan_signature(calibration))
+    journal.start(9)
+    journal.done(expand_points(calibration)[0], 1.0)
+    run.main("calibration", conf, persistent=True, resume=True, plan=True)
+    assert "8 point(s) to run" in capsys.readouterr().out
+
+
+def test_staged_files_commit_and_guard(tmp_path):
+    import threading
+
+    from pds.core.pipeline import StagedFiles, StagingExecutor
+    from pds.core.utils import file_hash
+
+    live = tmp_path / "live.json"
+    live.write_text("old")
+    staged_threads = []
+
+    def stage(n):
+        staged_threads.append(threading.current_thread().name)
+        path = tmp_path / f"staged-{n}"
+        path.write_text(f"point {n}")
+        return StagedFiles(moves=[(path, live)], guards={live: file_hash(live)})
+
+    with StagingExecutor(stage, [0, 1, 2], ahead=1) as stager:
+        assert stager.take(0).commit()
+        assert live.read_text() == "point 0"
+        stager.prefetch(0)
+        staged = stager.take(1)
+        assert staged.commit()
+        assert live.read_text() == "point 1"
+        stager.prefetch(1)
+
+        staged = stager.take(2)
+        live.write_text("edited elsewhere")
+        assert not staged.commit()
+        assert live.read_text() == "edited elsewhere"
+        assert not (tmp_path / "staged-2").exists()
+
+    assert all(name.startswith("pds-stage") for name in staged_threads)
+
+
+
+def test_threshold_scan_commits_staged_points_ahead(monkeypatch, make_context):
+    from contextlib import contextmanager
+
+    from pds.core.pipeline import StagedFiles
+
+    cfg, ctx = make_context(mode="thrscan", min_corr=4000, max_corr=6000,
+                        corr_step=500, prepare_ahead=2)
+    xml = ctx.xml_path
+    commits, acquired, edit_at = [], [], []
+    commit = StagedFiles.commit
+
+    def record_commit(self):
+        commits.append(commit(self))
+        return commits[-1]
+
+    class Session:
+        def acquire(self):
+            acquired.append(xml.read_text())
+            if len(acquired) in edit_at:
+                xml.write_text(acquired[-1] + "<!-- edited -->")
+
+    @contextmanager
+    def session(cfg):
+        yield Session()
+
+    monkeypatch.setattr(StagedFiles, "commit", record_commit)
+    monkeypatch.setattr(run.SSPWriter, "apply", lambda self, conf: True)
+    monkeypatch.setattr(run, "open_session", session)
+
+    scan = run.ScanXCorrThreshold(cfg, ctx=ctx)
+    scan.run()
+    assert commits == [True] * 5  # two points ahead, none re-spliced in place
+    for text, corr in zip(acquired, range(4000, 6500, 500)):
+        ctx.set_correlation_threshold(corr)
+        ctx.render_seeds()
+        assert run.splice_daphne_confs(text, ctx.seeds)[1] == []
+
+    # edited behind the scan's back: that point is re-spliced, the later ones
+    # are staged again from the live file and commit
+    commits.clear()
+    acquired.clear()
+    edit_at.append(2)
+    scan.run()
+    assert commits == [True, True, False, True, True]
+    assert all(text.endswith("<!-- edited -->") for text in acquired[2:])
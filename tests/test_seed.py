@@ -1,2 +1,221 @@
-from pds.core.seed import generate_seeds  
-generate_seeds("../configs/np02/details.json")
+import copy
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pds.core import channels
+from pds.core.constants import CONFIGURATIONS
+from pds.core.seed import (
+    SeedExecutor,
+    assemble_tp_conf,
+    compile_devices,
+    generate_configuration,
+    generate_seeds,
+    get_channel_analog_conf,
+    get_channel_ids,
+    map_channels_to_afes,
+    pack_xcorr,
+    patch_xcorr,
+    populate_afes,
+)
+from pds.core.utils import bitmask
+
+ROOT = Path(__file__).resolve().parent
+DETAILS = ROOT.parent / "configs" / "np02" / "details.json"
+
+
+def test_seeds_match_reference_and_cache(tmp_path):
+    details = tmp_path / "details.json"
+    shutil.copy(DETAILS, details)
+
+    assert generate_seeds(details) == {cfg: True for cfg in CONFIGURATIONS}
+    for cfg in CONFIGURATIONS:
+        expected = (ROOT / "data" / f"{cfg}.json").read_text()
+        assert (tmp_path / f"{cfg}.json").read_text() == expected
+
+    # unchanged input → every seed reused
+    assert generate_seeds(details) == {cfg: False for cfg in CONFIGURATIONS}
+
+    # a seed edited on disk is rebuilt, the others are not
+    (tmp_path / f"{CONFIGURATIONS[0]}.json").write_text("{}")
+    changed = generate_seeds(details)
+    assert changed[CONFIGURATIONS[0]] and not any(
+        changed[cfg] for cfg in CONFIGURATIONS[1:]
+    )
+
+    # --force regenerates, but identical bytes are not rewritten
+    assert generate_seeds(details, force=True) == {cfg: False for cfg in CONFIGURATIONS}
+
+
+def test_patch_xcorr_matches_full_regeneration():
+    data = json.loads(DETAILS.read_text())
+    seeds = {cfg: generate_configuration(data, cfg) for cfg in CONFIGURATIONS}
+    patch_xcorr(seeds, data, 12345)
+
+    scanned = copy.deepcopy(data)
+    for dev in scanned["devices"]:
+        dev["self_trigger"]["self_trigger_xcorr"]["correlation_threshold"] = 12345
+    assert seeds == {cfg: generate_configuration(scanned, cfg) for cfg in CONFIGURATIONS}
+
+
+def test_executor_strategies_agree(monkeypatch):
+    exits = []
+    monkeypatch.setattr("pds.core.seed.atexit.register", exits.append)
+    data = json.loads(DETAILS.read_text())
+    device = data["devices"][0]
+    data["devices"] = [dict(device, ip=f"10.0.0.{i}", slot_id=i) for i in range(5)]
+    devices = compile_devices(data)
+
+    executor = SeedExecutor(inline_max_channels=0, max_workers=2)
+    try:
+        assert executor.strategy(devices) == "pool"
+        pooled = executor.render(devices, CONFIGURATIONS)
+        assert executor._pool._mp_context.get_start_method() == "spawn"
+        executor.shutdown()
+        assert executor.render(devices, CONFIGURATIONS) == pooled  # new pool
+        inline = executor.render(devices, CONFIGURATIONS, strategy="inline")
+    finally:
+        executor.shutdown()
+    assert pooled == inline and exits == [executor.shutdown]
+    assert list(json.loads(pooled[CONFIGURATIONS[0]])) == [f"10.0.0.{i}" for i in range(5)]
+    assert len(executor.timings["pool"]) == 2 and len(executor.timings["inline"]) == 1
+
+
+def test_channel_batch_matches_scalar_helpers(monkeypatch):
+    ids = [[0, 7, 8, 39], list(range(10, 20)), [], [3, 41]]
+    trims = [[5] * 16, list(range(40)), [], [1, 2, 3, 4]]
+    atts = [[1995] * 5, [1, 2], [], [9] * 5]
+
+    for numpy in (channels.np, None):
+        monkeypatch.setattr(channels, "np", numpy)
+        batch = channels.ChannelBatch(ids, trims, atts)
+        for i in range(3):
+            row = batch.row(i)
+            device = {"channels": {"trim": trims[i]}}
+            conf = get_channel_analog_conf(ids[i], {"offset_gain": 1}, device)
+            afes = [a for a, chans in map_channels_to_afes(ids[i]).items() if chans]
+            assert row.channel_ids == ids[i]
+            assert row.trims == conf["trims"]
+            assert row.afe_ids == afes
+            assert row.afe_attenuators == [atts[i][a] for a in afes if a < len(atts[i])]
+        assert batch.row(1).missing_afe == 2
+        with pytest.raises(KeyError):
+            batch.row(3)
+
+
+def _deepcopy_generate_configuration(data, config_name):
+    """generate_configuration as it was before the overlay renderer."""
+    data = copy.deepcopy(data)
+    common_conf = data["common_conf"]
+    configurations = {}
+    for device in data["devices"]:
+        device = copy.deepcopy(device)
+        channel_ids = get_channel_ids(device)
+        trigger = device.get("self_trigger", {})
+        threshold = trigger.get("threshold", 0)
+        bias = device["channels"].get("bias", [])
+        if config_name == "np02_daphne_full_mode":
+            threshold = 0
+        elif config_name == "np02_daphne_full_mode_bias_off":
+            threshold = 0
+            bias = [0] * 5
+        elif config_name == "np02_daphne_selftrigger_bias_off":
+            bias = [0] * 5
+            if threshold == 0:
+                raise ValueError(f"Threshold must be non-zero in 'selftrigger_bias_off' "
+                                 f"for device {device['ip']}")
+        elif config_name != "np02_daphne_selftrigger":
+            raise ValueError(f"Unsupported configuration: {config_name}")
+        device["channels"]["bias"] = bias
+        xcorr = trigger.get("self_trigger_xcorr", {})
+        configuration = {
+            "slot": device["slot_id"],
+            "bias_ctrl": common_conf["bias_ctrl"],
+            "self_trigger_threshold": threshold,
+            "full_stream_channels": (
+                channel_ids if config_name.startswith("np02_daphne_full_mode") else []
+            ),
+            "channel_analog_conf": get_channel_analog_conf(channel_ids, common_conf, device),
+            "afes": {
+                "ids": [], "attenuators": [], "v_biases": [],
+                "adcs": {"resolution": [], "output_format": [], "SB_first": []},
+                "pgas": {"lpf_cut_frequency": [], "integrator_disable": [], "gain": []},
+                "lnas": {"clamp": [], "integrator_disable": [], "gain": []},
+            },
+            "self_trigger_xcorr": pack_xcorr(xcorr.get("correlation_threshold", 0),
+                                             xcorr.get("discrimination_threshold", 0)),
+            "tp_conf": assemble_tp_conf(trigger),
+            "compensator": bitmask(trigger.get("enable_compensator", [])),
+            "inverter": bitmask(trigger.get("enable_inverter", [])),
+        }
+        populate_afes(map_channels_to_afes(channel_ids), device, common_conf, configuration)
+        configurations[device["ip"]] = configuration
+    return configurations
+
+
+def _boards(**edits):
+    """NP02 details with three boards; *edits* maps board index → channel / trigger changes."""
+    data = json.loads(DETAILS.read_text())
+    base = data["devices"][0]
+    data["devices"] = []
+    for i in range(3):
+        dev = copy.deepcopy(base)
+        dev.update(ip=f"10.0.0.{i}", slot_id=i)
+        for key, value in edits.get(f"b{i}", {}).items():
+            block, _, field = key.partition(".")
+            target = dev[block] if field else dev
+            if value is None:
+                del target[field or block]
+            else:
+                target[field] = value
+        data["devices"].append(dev)
+    return data
+
+
+_SEED_CASES = {
+    "np02": lambda: json.loads(DETAILS.read_text()),
+    "boards": lambda: _boards(
+        b1={"channels.indices": None, "channels.range": [8, 23],
+            "channels.trim": list(range(40)), "self_trigger.threshold": 300},
+        b2={"channels.indices": [1, 2, 30], "self_trigger.enable_inverter": []},
+    ),
+    "optional_blocks_missing": lambda: _boards(
+        b0={"self_trigger": None},
+        b1={"channels.trim": None, "channels.offsets": None},
+        b2={"self_trigger.self_trigger_xcorr": None, "self_trigger.enable_compensator": None},
+    ),
+    "short_trim_and_no_channels": lambda: _boards(
+        b0={"channels.trim": [3, 4]}, b1={"channels.indices": []},
+    ),
+    "bias_missing": lambda: _boards(b1={"channels.bias": [800, 800]}),
+    "attenuators_missing": lambda: _boards(b2={"channels.attenuators": [1]}),
+    "channel_out_of_range": lambda: _boards(b0={"channels.indices": [3, 41]}),
+}
+
+
+def _outcome(generate, data, cfg):
+    try:
+        return generate(data, cfg)
+    except (KeyError, ValueError) as err:
+        return type(err), str(err)
+
+
+@pytest.mark.parametrize("case", sorted(_SEED_CASES))
+@pytest.mark.parametrize("cfg", CONFIGURATIONS)
+def test_overlay_renderer_matches_deepcopy_generation(case, cfg):
+    data = _SEED_CASES[case]()
+    expected = _outcome(_deepcopy_generate_configuration, data, cfg)
+    assert _outcome(generate_configuration, data, cfg) == expected
+
+
+def test_bias_off_configurations_zero_every_populated_afe():
+    data = _boards(b1={"channels.bias": []}, b2={"channels.indices": [1, 30]})
+    for cfg in ("np02_daphne_full_mode_bias_off", "np02_daphne_selftrigger_bias_off"):
+        seeds = generate_configuration(data, cfg)
+        for afes in (seed["afes"] for seed in seeds.values()):
+            assert afes["v_biases"] == [0] * len(afes["ids"])
+        assert seeds["10.0.0.2"]["afes"]["ids"] == [0, 3]
+    with pytest.raises(ValueError, match="missing attenuators/biases in device 10.0.0.1"):
+        generate_configuration(data, "np02_daphne_selftrigger")
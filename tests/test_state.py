@@ -0,0 +1,70 @@
+from dataclasses import asdict
+
+from pds.core.ssp import SSPConf, SSPWriter
+from pds.core.state import AppliedState
+
+
+def _setup(tmp_path, ssp_segment):
+    xml = tmp_path / "np02-pds.data.xml"
+    xml.write_text(ssp_segment)
+    cfg = {"drunc_working_dir": str(tmp_path), "oks_file": xml.name,
+           "ssp_backend": "native", "state_dir": str(tmp_path / "state")}
+    return xml, cfg
+
+
+def test_applied_state_skips_across_invocations(tmp_path, ssp_segment):
+    xml, cfg = _setup(tmp_path, ssp_segment)
+    conf = SSPConf(channel_mask=8, pulse_bias_percent_270nm=3700)
+    assert SSPWriter(cfg, state=AppliedState(cfg)).apply(conf)
+
+    state = AppliedState(cfg)  # next invocation
+    state.record("dts_align", ["dtsbutler", "align"])
+    writer = SSPWriter(cfg, state=state)
+    assert not writer.apply(conf) and writer.skipped == 1
+    assert writer.apply(SSPConf(channel_mask=4))  # different settings
+
+    assert SSPWriter(cfg, state=AppliedState(cfg, reapply=True)).apply(SSPConf(channel_mask=8))
+
+    # the segment edited outside the tool: OKS components are stale, DTS is not
+    xml.write_text(xml.read_text().replace('val="7"', 'val="9"'))
+    state = AppliedState(cfg)
+    assert not state.fresh("ssp", {"object_name": "np02-ssp-on"})
+    writer = SSPWriter(cfg, state=state)
+    writer.apply(SSPConf(channel_mask=8))
+    assert writer.skipped == 0
+    assert state.fresh("dts_align", ["dtsbutler", "align"])
+    assert not AppliedState({**cfg, "state_max_age_s": -1}).fresh("dts_align", ["dtsbutler", "align"])
+
+
+def test_untracked_write_drops_other_components(tmp_path, ssp_segment):
+    xml, cfg = _setup(tmp_path, ssp_segment)
+    state = AppliedState(cfg)
+    state.record("daphne_conf", {"seeds": 1}, before=None)
+    assert state.fresh("daphne_conf", {"seeds": 1})
+
+    before = xml.read_text()
+    xml.write_text(before + "<!-- threshold-scan point -->")  # not recorded
+    SSPWriter(cfg, state=state).apply(SSPConf(channel_mask=2))
+    later = AppliedState(cfg)
+    assert later.fresh("ssp", asdict(SSPConf(channel_mask=2)))
+    assert not later.fresh("daphne_conf", {"seeds": 1})
+
+
+def test_dts_alignment_cache_is_opt_in(tmp_path, monkeypatch, ssp_segment):
+    from pds.core import run
+
+    _, cfg = _setup(tmp_path, ssp_segment)
+    cfg.update(mode="calibration", hztrigger=10, dts_align_cmd="align",
+               dts_faketrig_cmd_template="fake {hztrigger}", dts_clear_fktrig_cmd="clear")
+    calls = []
+    monkeypatch.setattr(run, "run_subprocess", lambda cmd, name, **kw: calls.append(name))
+
+    for _ in range(2):
+        run.DTSButler(cfg, state=AppliedState(cfg)).run()
+    assert calls.count("dts_align") == 2  # no hardware readback: always aligned
+
+    calls.clear()
+    cfg["dts_align_cache"] = True
+    for _ in range(2):
+        run.DTSButler(cfg, state=AppliedState(cfg)).run()
+    assert calls == ["dts_align", "dts_faketrig", "dts_faketrig"]
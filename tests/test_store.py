@@ -0,0 +1,32 @@
+import os
+import threading
+
+from pds.core.store import ArtifactStore, parse_size
+
+
+def test_put_link_dedup_and_gc(tmp_path):
+    store = ArtifactStore(tmp_path / "store")
+    digest = store.put('{"a":1}')
+    assert store.put('{"a":1}') == digest and store.path(digest).read_text() == '{"a":1}'
+
+    ws = tmp_path / "ws"
+    assert store.store('{"a":1}', ws / "seed.json")
+    assert not store.link(digest, ws / "seed.json")  # already referenced
+    assert os.path.islink(ws / "seed.json") and (ws / "seed.json").read_text() == '{"a":1}'
+
+    # concurrent writers of the same and of different artifacts
+    texts = [f'{{"n":{i % 4}}}' for i in range(32)]
+    threads = [threading.Thread(target=store.put, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(list(store.objects.glob("*/*.json"))) == 5
+    assert not list(store.tmp.iterdir())
+
+    old = store.path(digest)
+    os.utime(old, (1, 1))
+    assert store.gc(0) == (1, len('{"a":1}'))
+    assert not old.exists() and store.size() > 0  # recent objects are kept
+    assert store.gc(0, min_age_s=0)[0] == 4 and store.size() == 0
+    assert parse_size("200M") == 200 << 20 and parse_size("1.5k") == 1536
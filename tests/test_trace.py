@@ -0,0 +1,29 @@
+import json
+import sys
+
+import pytest
+
+from pds.core.trace import Tracer
+
+
+def test_spans_subprocesses_and_chrome_export(tmp_path):
+    tracer = Tracer()
+    with tracer.span("seeds"):
+        tracer.run_subprocess([sys.executable, "-c", "pass"], name="tool")
+    with pytest.raises(Exception):
+        tracer.run_subprocess([sys.executable, "-c", "raise SystemExit(3)"], check=True)
+
+    totals = tracer.totals()
+    assert totals["seeds"]["n"] == 1
+    assert totals[tracer.spans[-1].name]["n"] == 1
+    assert tracer.spans[1].args["exit_code"] == 0
+    assert tracer.spans[-1].args["exit_code"] == 3
+    assert "seeds" in tracer.format_summary()
+
+    out = tmp_path / "trace.json"
+    tracer.write_chrome(out)
+    events = json.loads(out.read_text())["traceEvents"]
+    complete = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in complete][:2] == ["seeds", "tool"]
+    assert complete[1]["cat"] == "subprocess" and "-c pass" in complete[1]["args"]["command"]
+    assert complete[0]["dur"] >= complete[1]["dur"]
@@ -0,0 +1,22 @@
+import json
+
+from pds.core.utils import iter_json, pretty_compact_json, write_json
+
+
+DOC = {"a": [1, 2, 3], "b": {"c": "é", "d": []}, "e": {}, "f": [{"g": True}]}
+
+
+def test_pretty_compact_json_layouts():
+    assert pretty_compact_json(DOC) == json.dumps(DOC, separators=(",", ":"), ensure_ascii=False)
+    multi = pretty_compact_json(DOC, multiline=True)
+    assert json.loads(multi) == DOC
+    assert "".join(iter_json(DOC, multiline=True)) == multi
+    assert '"\\u00e9"' in pretty_compact_json(DOC, multiline=True, ensure_ascii=True)
+
+
+def test_write_json_is_atomic(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_text("old")
+    write_json(path, DOC, multiline=True)
+    assert path.read_text(encoding="utf-8") == pretty_compact_json(DOC, multiline=True)
+    assert [p.name for p in tmp_path.iterdir()] == ["out.json"]
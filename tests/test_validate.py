@@ -0,0 +1,55 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pds.core.validate import ValidationError, collect_problems, validate
+
+NP02 = Path(__file__).resolve().parent.parent / "configs" / "np02"
+
+
+def _setup(tmp_path, **overrides):
+    shutil.copy(NP02 / "details.json", tmp_path / "details.json")
+    (tmp_path / "segment.data.xml").write_text("<oks-data/>")
+    cfg = json.loads((NP02 / "conf.json").read_text())
+    cfg.update(drunc_working_dir=str(tmp_path), oks_file="segment.data.xml", **overrides)
+    conf = tmp_path / "conf.json"
+    conf.write_text(json.dumps(cfg))
+    return cfg, conf
+
+
+def test_np02_conf_is_valid(tmp_path):
+    for mode in ("cosmics", "noise", "calibration", "thrscan"):
+        cfg, conf = _setup(tmp_path, mode=mode)
+        validate(cfg, conf)
+
+
+def test_all_problems_reported_together(tmp_path):
+    cfg, conf = _setup(tmp_path, mode="calibration", bias="800,800,1200")
+    del cfg["session_name"]
+    details = json.loads((tmp_path / "details.json").read_text())
+    details["devices"][0]["channels"]["indices"].append(40)  # AFE 5 does not exist
+    details["devices"].append(dict(details["devices"][0], ip="10.73.137.108",
+                                   channels=dict(details["devices"][0]["channels"], indices=[0])))
+    (tmp_path / "details.json").write_text(json.dumps(details))
+
+    problems = collect_problems(cfg, conf)
+    text = "\n".join(problems)
+    assert "missing 'session_name'" in text
+    assert "bias: expected exactly 5 values" in text
+    with pytest.raises(ValidationError) as err:
+        validate(cfg, conf)
+    assert len(err.value.problems) == len(problems) >= 2
+
+    cfg["bias"] = "800,800,1200,1200,1200"
+    details["devices"][1]["self_trigger"] = dict(details["devices"][1]["self_trigger"], threshold=0)
+    (tmp_path / "details.json").write_text(json.dumps(details))
+    text = "\n".join(collect_problems(cfg, conf))
+    assert "channel in AFE 5" in text
+
+    # every scan point's SSP settings, before any hardware is touched
+    cfg.update(mask_values=[1, 4096], ssp_conf={"pulse_mode": "single"})
+    text = "\n".join(collect_problems(cfg, conf))
+    assert "channel_mask=4096 exceeds 12 channels" in text
+    assert "10.73.137.108, np02_daphne_selftrigger_bias_off: Threshold must be non-zero" in text